@@ -3,6 +3,7 @@
 """
 CDK application entry point file.
 """
+
 from os import environ
 
 from aws_cdk.core import App, Environment, Stack, Tag
@@ -44,6 +45,10 @@ def main() -> None:
         deploy_env=ENV,
         storage_bucket=storage.storage_bucket,
         validation_results_table=storage.validation_results_table,
+        checksum_iteration_concurrency=int(
+            app.node.try_get_context("checksumIterationConcurrency") or 1
+        ),
+        pipelined_validation=bool(app.node.try_get_context("pipelinedValidation")),
     )
 
     APIStack(
@@ -3,8 +3,11 @@ from enum import Enum
 
 class Check(Enum):
     CHECKSUM = "checksum"
+    CONFLICTING_ASSET_CHECKSUM = "conflicting asset checksum"
     DUPLICATE_OBJECT_KEY = "duplicate asset name"
+    FILE_SIZE = "file size"
     JSON_PARSE = "JSON parse"
     JSON_SCHEMA = "JSON schema"
+    MEDIA_TYPE = "media type"
     STAGING_ACCESS = "staging bucket access"
     NON_S3_URL = "not an s3 url"
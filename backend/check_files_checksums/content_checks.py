@@ -0,0 +1,87 @@
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple, Union
+
+from ..check import Check
+from ..processing_assets_model import ProcessingAssetsModelBase
+from ..types import JsonObject
+from ..validation_results_model import ValidationResult
+
+# Leading bytes of files of each media type, ignoring media type parameters
+MAGIC_NUMBERS: Dict[str, Tuple[bytes, ...]] = {
+    "image/jpeg": (b"\xff\xd8\xff",),
+    "image/png": (b"\x89PNG\r\n\x1a\n",),
+    "image/tiff": (b"II*\x00", b"MM\x00*", b"II+\x00", b"MM\x00+"),
+}
+
+
+class ContentCheck:
+    """
+    A check of the contents of an asset. It's fed the same bytes as the checksum digest, so it
+    doesn't need its own download.
+    """
+
+    check: Check
+    # How many bytes from the start of the object the check needs, or `None` for all of them
+    prefix_size: Optional[int] = None
+
+    def update(self, data: Union[bytes, memoryview]) -> None:
+        raise NotImplementedError
+
+    def result(self) -> Tuple[ValidationResult, Optional[JsonObject]]:
+        raise NotImplementedError
+
+
+class MediaTypeCheck(ContentCheck):
+    check = Check.MEDIA_TYPE
+
+    def __init__(self, media_type: str, magic_numbers: Tuple[bytes, ...]):
+        self.media_type = media_type
+        self.magic_numbers = magic_numbers
+        self.prefix_size = max(len(magic_number) for magic_number in magic_numbers)
+        self.prefix = bytearray()
+
+    def update(self, data: Union[bytes, memoryview]) -> None:
+        missing_byte_count = self.prefix_size - len(self.prefix)
+        if missing_byte_count > 0:
+            self.prefix.extend(data[:missing_byte_count])
+
+    def result(self) -> Tuple[ValidationResult, Optional[JsonObject]]:
+        if self.prefix.startswith(self.magic_numbers):
+            return ValidationResult.PASSED, None
+
+        return (
+            ValidationResult.FAILED,
+            {"message": f"Contents don't match media type “{self.media_type}”"},
+        )
+
+
+class ContentCheckFeed:
+    """Passes data on to a digest and every content check"""
+
+    def __init__(self, file_digest: Any, content_checks: Sequence[ContentCheck]):
+        self.file_digest = file_digest
+        self.content_checks = content_checks
+
+    def update(self, data: Union[bytes, memoryview]) -> None:
+        self.file_digest.update(data)
+        for content_check in self.content_checks:
+            content_check.update(data)
+
+    def hexdigest(self) -> str:
+        hex_digest: str = self.file_digest.hexdigest()
+        return hex_digest
+
+
+def get_media_type_check(item: ProcessingAssetsModelBase) -> Optional[ContentCheck]:
+    if item.media_type is None:
+        return None
+
+    magic_numbers = MAGIC_NUMBERS.get(item.media_type.split(";")[0].strip().lower())
+    if magic_numbers is None:
+        return None
+
+    return MediaTypeCheck(item.media_type, magic_numbers)
+
+
+ContentCheckFactory = Callable[[ProcessingAssetsModelBase], Optional[ContentCheck]]
+
+DEFAULT_CONTENT_CHECK_FACTORIES: Sequence[ContentCheckFactory] = (get_media_type_check,)
@@ -0,0 +1,12 @@
+"""
+How many parts of large objects the checksum job keeps in memory. This module has no
+dependencies, so that the infrastructure can size the Batch job from it.
+"""
+
+DEFAULT_CONCURRENCY = 8
+
+PART_SIZE = 8 * 1024 * 1024
+PARTS_IN_FLIGHT = 4
+
+# Each worker holds the parts in flight plus the one it is hashing
+MAX_PART_BUFFER_BYTES = DEFAULT_CONCURRENCY * (PARTS_IN_FLIGHT + 1) * PART_SIZE
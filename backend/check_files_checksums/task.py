@@ -2,10 +2,21 @@
 import sys
 from argparse import ArgumentParser, Namespace
 
+from ..checksum_cache import ChecksumCache
 from ..log import set_up_logging
 from ..processing_assets_model import ProcessingAssetType
 from ..validation_results_model import ValidationResultFactory
-from .utils import ChecksumValidator, get_job_offset
+from .utils import (
+    DEFAULT_BUFFER_SIZE,
+    DEFAULT_CONCURRENCY,
+    DEFAULT_LARGE_OBJECT_THRESHOLD,
+    DEFAULT_MAX_RECONNECTS,
+    DEFAULT_MAX_RECONNECT_BACKOFF,
+    DEFAULT_RECONNECT_BACKOFF,
+    ChecksumValidator,
+    ReconnectPolicy,
+    get_job_item_indexes,
+)
 
 LOGGER = set_up_logging(__name__)
 
@@ -14,26 +25,60 @@ def parse_arguments() -> Namespace:
     argument_parser = ArgumentParser()
     argument_parser.add_argument("--dataset-id", required=True)
     argument_parser.add_argument("--version-id", required=True)
-    argument_parser.add_argument("--first-item", type=int, required=True)
+    argument_parser.add_argument("--first-job", type=int, required=True)
+    argument_parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY)
+    argument_parser.add_argument(
+        "--large-object-threshold", type=int, default=DEFAULT_LARGE_OBJECT_THRESHOLD
+    )
+    argument_parser.add_argument("--buffer-size", type=int, default=DEFAULT_BUFFER_SIZE)
+    argument_parser.add_argument("--max-reconnects", type=int, default=DEFAULT_MAX_RECONNECTS)
+    argument_parser.add_argument(
+        "--reconnect-backoff", type=float, default=DEFAULT_RECONNECT_BACKOFF
+    )
+    argument_parser.add_argument(
+        "--max-reconnect-backoff", type=float, default=DEFAULT_MAX_RECONNECT_BACKOFF
+    )
     argument_parser.add_argument("--results-table-name", required=True)
     argument_parser.add_argument("--assets-table-name", required=True)
+    argument_parser.add_argument("--checksum-cache-table-name")
     return argument_parser.parse_args()
 
 
 def main() -> int:
     arguments = parse_arguments()
 
-    index = arguments.first_item + get_job_offset()
     hash_key = f"DATASET#{arguments.dataset_id}#VERSION#{arguments.version_id}"
-    range_key = f"{ProcessingAssetType.DATA.value}#{index}"
 
     validation_result_factory = ValidationResultFactory(hash_key, arguments.results_table_name)
 
+    checksum_cache = (
+        None
+        if arguments.checksum_cache_table_name is None
+        else ChecksumCache(arguments.checksum_cache_table_name)
+    )
+
     checksum_validator = ChecksumValidator(
-        arguments.assets_table_name, validation_result_factory, LOGGER
+        arguments.assets_table_name,
+        validation_result_factory,
+        LOGGER,
+        arguments.concurrency,
+        arguments.large_object_threshold,
+        arguments.buffer_size,
+        checksum_cache,
+        ReconnectPolicy(
+            arguments.max_reconnects, arguments.reconnect_backoff, arguments.max_reconnect_backoff
+        ),
     )
 
-    checksum_validator.validate(hash_key, range_key)
+    checksum_validator.validate_items(
+        hash_key,
+        [
+            f"{ProcessingAssetType.DATA.value}#{index}"
+            for index in get_job_item_indexes(
+                checksum_validator.processing_assets_model, hash_key, arguments.first_job
+            )
+        ],
+    )
 
     return 0
 
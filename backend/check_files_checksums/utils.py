@@ -1,49 +1,176 @@
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import partial
 from json import dumps
 from logging import Logger
 from os import environ
-from typing import TYPE_CHECKING
+from time import sleep
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Deque,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Type,
+    Union,
+)
 from urllib.parse import urlparse
 
 import boto3
-from botocore.exceptions import ClientError  # type: ignore[import]
+from botocore.config import Config  # type: ignore[import]
+from botocore.exceptions import (  # type: ignore[import]
+    ClientError,
+    ConnectTimeoutError,
+    EndpointConnectionError,
+    HTTPClientError,
+    IncompleteReadError,
+)
+from botocore.response import StreamingBody  # type: ignore[import]
 from multihash import FUNCS, decode  # type: ignore[import]
+from urllib3.exceptions import ProtocolError
 
 from ..check import Check
+from ..checksum_cache import ChecksumCache, get_checksum_cache_key
 from ..error_response_keys import ERROR_KEY
-from ..processing_assets_model import processing_assets_model_with_meta
+from ..processing_assets_model import (
+    CHECKSUM_JOB_PREFIX,
+    ProcessingAssetsModelBase,
+    processing_assets_model_with_meta,
+)
 from ..types import JsonObject
 from ..validation_results_model import ValidationResult, ValidationResultFactory
+from .content_checks import (
+    DEFAULT_CONTENT_CHECK_FACTORIES,
+    ContentCheck,
+    ContentCheckFactory,
+    ContentCheckFeed,
+)
+from .part_buffers import DEFAULT_CONCURRENCY, PARTS_IN_FLIGHT, PART_SIZE
 
 if TYPE_CHECKING:
     # When type checking we want to use the third party package's stub
     from mypy_boto3_s3 import S3Client
+    from mypy_boto3_s3.type_defs import GetObjectOutputTypeDef
 else:
     # In production we want to avoid depending on a package which has no runtime impact
     S3Client = object
+    GetObjectOutputTypeDef = dict
 
 ARRAY_INDEX_VARIABLE_NAME = "AWS_BATCH_JOB_ARRAY_INDEX"
 
-CHUNK_SIZE = 1024
+DEFAULT_BUFFER_SIZE = 1024 * 1024
 
-S3_CLIENT = boto3.client("s3")
+DEFAULT_LARGE_OBJECT_THRESHOLD = 256 * 1024 * 1024
+
+DEFAULT_MAX_RECONNECTS = 5
+DEFAULT_RECONNECT_BACKOFF = 1.0
+DEFAULT_MAX_RECONNECT_BACKOFF = 30.0
+
+# Failures requesting or reading a response body which are worth reconnecting after
+STREAM_INTERRUPTION_ERRORS = (
+    ConnectionError,
+    ConnectTimeoutError,
+    EndpointConnectionError,
+    HTTPClientError,
+    IncompleteReadError,
+    ProtocolError,
+)
+
+CHECKSUM_SOURCE_KEY = "source"
+CACHE_CHECKSUM_SOURCE = "cache"
+STREAM_CHECKSUM_SOURCE = "stream"
+
+# Each worker downloads up to PARTS_IN_FLIGHT parts of a large object at once
+S3_CLIENT = boto3.client(
+    "s3", config=Config(max_pool_connections=DEFAULT_CONCURRENCY * PARTS_IN_FLIGHT)
+)
+
+
+class SizeMismatchError(Exception):
+    def __init__(self, actual_size: int):
+        super().__init__()
+
+        self.actual_size = actual_size
 
 
 class ChecksumMismatchError(Exception):
-    def __init__(self, actual_hex_digest: str):
+    def __init__(self, actual_hex_digest: str, source: str = STREAM_CHECKSUM_SOURCE):
         super().__init__()
 
         self.actual_hex_digest = actual_hex_digest
+        self.source = source
 
 
-class ChecksumValidator:
+ItemError = Union[ChecksumMismatchError, ClientError, SizeMismatchError]
+
+
+class ReconnectPolicy:  # pylint:disable=too-few-public-methods
+    """
+    How often and how patiently to reopen an object stream which failed part way through.
+    """
+
     def __init__(
+        self,
+        max_reconnects: int = DEFAULT_MAX_RECONNECTS,
+        backoff: float = DEFAULT_RECONNECT_BACKOFF,
+        max_backoff: float = DEFAULT_MAX_RECONNECT_BACKOFF,
+    ):
+        self.max_reconnects = max_reconnects
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+
+    def delays(self) -> Iterator[float]:
+        """Exponential backoff, capped at `max_backoff` seconds"""
+        for reconnect_index in range(self.max_reconnects):
+            yield min(self.backoff * 2**reconnect_index, self.max_backoff)
+
+
+class ByteCountingDigest:  # pylint:disable=too-few-public-methods
+    """Passes data on to a digest, keeping track of how many bytes it has received"""
+
+    def __init__(self, file_digest: Any):
+        self.file_digest = file_digest
+        self.byte_count = 0
+
+    def update(self, data: Union[bytes, memoryview]) -> None:
+        self.file_digest.update(data)
+        self.byte_count += len(data)
+
+
+class PartBuffer(bytearray):
+    """Collects an object part through the same interface as a digest"""
+
+    def update(self, data: Union[bytes, memoryview]) -> None:
+        self.extend(data)
+
+
+class ChecksumValidator:  # pylint: disable=too-many-instance-attributes
+    def __init__(  # pylint: disable=too-many-arguments
         self,
         processing_assets_table_name: str,
         validation_result_factory: ValidationResultFactory,
         logger: Logger,
+        concurrency: int = DEFAULT_CONCURRENCY,
+        large_object_threshold: int = DEFAULT_LARGE_OBJECT_THRESHOLD,
+        buffer_size: int = DEFAULT_BUFFER_SIZE,
+        checksum_cache: Optional[ChecksumCache] = None,
+        reconnect_policy: Optional["ReconnectPolicy"] = None,
+        content_check_factories: Sequence[ContentCheckFactory] = DEFAULT_CONTENT_CHECK_FACTORIES,
     ):
         self.validation_result_factory = validation_result_factory
         self.logger = logger
+        self.concurrency = concurrency
+        self.large_object_threshold = large_object_threshold
+        self.buffer_size = buffer_size
+        self.checksum_cache = checksum_cache
+        self.reconnect_policy = ReconnectPolicy() if reconnect_policy is None else reconnect_policy
+        self.content_check_factories = content_check_factories
 
         self.processing_assets_model = processing_assets_model_with_meta(
             processing_assets_table_name
@@ -53,7 +180,27 @@ class ChecksumValidator:
         self.logger.error(dumps({"success": False, **content}))
 
     def validate(self, hash_key: str, range_key: str) -> None:
+        self.validate_items(hash_key, [range_key])
 
+    def validate_items(self, hash_key: str, range_keys: Iterable[str]) -> None:
+        """
+        Keeps up to `concurrency` assets downloading and hashing at the same time, and reports the
+        results in the order of `range_keys`.
+        """
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            for item, error, details, content_checks in executor.map(
+                partial(self.check_item, hash_key), range_keys
+            ):
+                self.report(item, error, details)
+                if not isinstance(error, (ClientError, SizeMismatchError)):
+                    self.report_content_checks(item, content_checks)
+
+    def check_item(self, hash_key: str, range_key: str) -> Tuple[
+        ProcessingAssetsModelBase,
+        Optional[ItemError],
+        Optional[JsonObject],
+        Sequence[ContentCheck],
+    ]:
         try:
             item = self.processing_assets_model.get(hash_key, range_key=range_key)
         except self.processing_assets_model.DoesNotExist:
@@ -65,12 +212,52 @@ class ChecksumValidator:
             )
             raise
 
+        content_checks = [
+            content_check
+            for content_check in (
+                content_check_factory(item)
+                for content_check_factory in self.content_check_factories
+            )
+            if content_check is not None
+        ]
+
         try:
-            self.validate_url_multihash(item.url, item.multihash)
-        except ChecksumMismatchError as error:
+            details = self.validate_url_multihash(
+                item.url, item.multihash, item.size, content_checks
+            )
+        except (ChecksumMismatchError, ClientError, SizeMismatchError) as error:
+            return item, error, None, content_checks
+
+        return item, None, details, content_checks
+
+    def report(
+        self,
+        item: ProcessingAssetsModelBase,
+        error: Optional[ItemError],
+        details: Optional[JsonObject],
+    ) -> None:
+        if isinstance(error, ClientError):
+            self.validation_result_factory.save(
+                item.url,
+                Check.STAGING_ACCESS,
+                ValidationResult.FAILED,
+                details={"message": str(error)},
+            )
+            raise error
+
+        if isinstance(error, SizeMismatchError):
+            content = {
+                "message": f"File size mismatch: expected {item.size}, got {error.actual_size}"
+            }
+            self.log_failure(content)
+            self.validation_result_factory.save(
+                item.url, Check.FILE_SIZE, ValidationResult.FAILED, details=content
+            )
+        elif isinstance(error, ChecksumMismatchError):
             content = {
                 "message": f"Checksum mismatch: expected {item.multihash[4:]},"
-                f" got {error.actual_hex_digest}"
+                f" got {error.actual_hex_digest}",
+                CHECKSUM_SOURCE_KEY: error.source,
             }
             self.log_failure(content)
             self.validation_result_factory.save(
@@ -78,33 +265,396 @@ class ChecksumValidator:
             )
         else:
             self.logger.info(dumps({"success": True, "message": ""}))
-            self.validation_result_factory.save(item.url, Check.CHECKSUM, ValidationResult.PASSED)
+            self.validation_result_factory.save(
+                item.url, Check.CHECKSUM, ValidationResult.PASSED, details=details
+            )
 
-    def validate_url_multihash(self, url: str, hex_multihash: str) -> None:
+    def report_content_checks(
+        self, item: ProcessingAssetsModelBase, content_checks: Sequence[ContentCheck]
+    ) -> None:
+        for content_check in content_checks:
+            result, details = content_check.result()
+            if result == ValidationResult.FAILED:
+                self.log_failure({"check": content_check.check.value, **(details or {})})
+            self.validation_result_factory.save(
+                item.url, content_check.check, result, details=details
+            )
+
+    def validate_url_multihash(
+        self,
+        url: str,
+        hex_multihash: str,
+        expected_size: Optional[int] = None,
+        content_checks: Sequence[ContentCheck] = (),
+    ) -> JsonObject:
+        """
+        Returns the details to save with a passed result. When `expected_size` is given, objects of
+        any other size fail before their contents are read. `content_checks` are fed the contents
+        of the object.
+        """
         parsed_url = urlparse(url)
         bucket = parsed_url.netloc
         key = parsed_url.path.lstrip("/")
+        checksum_function_code = int(hex_multihash[:2], 16)
+
+        hex_digest, source = self.get_hex_digest(
+            bucket, key, checksum_function_code, expected_size, content_checks
+        )
+
+        if hex_digest != decode(bytes.fromhex(hex_multihash)).hex():
+            raise ChecksumMismatchError(hex_digest, source)
+
+        return {CHECKSUM_SOURCE_KEY: source}
+
+    def get_hex_digest(  # pylint: disable=too-many-arguments
+        self,
+        bucket: str,
+        key: str,
+        checksum_function_code: int,
+        expected_size: Optional[int],
+        content_checks: Sequence[ContentCheck],
+    ) -> Tuple[str, str]:
+        """
+        Uses the cached object digest when available. Content checks which need the whole object
+        can only be fed by downloading it.
+        """
+        whole_object_needed = any(
+            content_check.prefix_size is None for content_check in content_checks
+        )
+
+        if whole_object_needed or self.checksum_cache is None:
+            return (
+                self.get_object_hex_digest(
+                    bucket, key, checksum_function_code, expected_size, content_checks
+                ),
+                STREAM_CHECKSUM_SOURCE,
+            )
+
+        return self.get_cached_object_hex_digest(
+            bucket, key, checksum_function_code, expected_size, content_checks
+        )
+
+    def get_cached_object_hex_digest(  # pylint: disable=too-many-arguments
+        self,
+        bucket: str,
+        key: str,
+        checksum_function_code: int,
+        expected_size: Optional[int],
+        content_checks: Sequence[ContentCheck],
+    ) -> Tuple[str, str]:
+        assert self.checksum_cache is not None
+
+        head_response = S3_CLIENT.head_object(Bucket=bucket, Key=key)
+        verify_size(expected_size, head_response["ContentLength"])
+        cache_key = get_checksum_cache_key(
+            bucket,
+            key,
+            head_response.get("VersionId"),
+            head_response["ETag"],
+            head_response["ContentLength"],
+            checksum_function_code,
+        )
+
+        cached_hex_digest = self.checksum_cache.get(cache_key)
+        if cached_hex_digest is not None:
+            update_content_checks_from_prefix(bucket, key, content_checks)
+            return cached_hex_digest, CACHE_CHECKSUM_SOURCE
+
+        hex_digest = self.get_object_hex_digest(
+            bucket,
+            key,
+            checksum_function_code,
+            expected_size,
+            content_checks,
+            head_response["ETag"],
+            head_response["ContentLength"],
+        )
+        self.checksum_cache.put(cache_key, hex_digest)
+        return hex_digest, STREAM_CHECKSUM_SOURCE
+
+    def get_object_hex_digest(  # pylint: disable=too-many-arguments
+        self,
+        bucket: str,
+        key: str,
+        checksum_function_code: int,
+        expected_size: Optional[int] = None,
+        content_checks: Sequence[ContentCheck] = (),
+        etag: Optional[str] = None,
+        size: Optional[int] = None,
+    ) -> str:
+        """
+        `etag` and `size` are known when the object has been looked up already. Otherwise the first
+        part is requested before the size is known, so large objects are never requested whole.
+        """
+        file_digest = ContentCheckFeed(FUNCS[checksum_function_code](), content_checks)
+        if etag is not None and size is not None and size >= self.large_object_threshold:
+            update_digest_from_parts(file_digest, bucket, key, etag, size, self.reconnect_policy)
+            return file_digest.hexdigest()
+
+        response = get_first_object_response(bucket, key, etag)
+        size = get_object_size(response)
         try:
-            url_stream = S3_CLIENT.get_object(Bucket=bucket, Key=key)["Body"]
-        except ClientError as error:
-            self.validation_result_factory.save(
-                url,
-                Check.STAGING_ACCESS,
-                ValidationResult.FAILED,
-                details={"message": str(error)},
+            verify_size(expected_size, size)
+        except SizeMismatchError:
+            response["Body"].close()
+            raise
+
+        if size >= self.large_object_threshold:
+            update_digest_from_parts(
+                file_digest,
+                bucket,
+                key,
+                response["ETag"],
+                size,
+                self.reconnect_policy,
+                response["Body"],
+            )
+        else:
+            update_digest_from_resumable_stream(
+                file_digest,
+                response["Body"],
+                self.buffer_size,
+                size,
+                partial(get_object_stream, bucket, key, get_object_version_arguments(response)),
+                self.reconnect_policy,
             )
+
+        return file_digest.hexdigest()
+
+
+def get_first_object_response(bucket: str, key: str, etag: Optional[str]) -> GetObjectOutputTypeDef:
+    """
+    Objects known to be small are requested whole, pinned to the ETag they were looked up with.
+    Otherwise only the first part is requested, which is also the first part of a large object.
+    """
+    if etag is not None:
+        return S3_CLIENT.get_object(Bucket=bucket, Key=key, IfMatch=etag)
+
+    try:
+        return S3_CLIENT.get_object(Bucket=bucket, Key=key, Range=f"bytes=0-{PART_SIZE - 1}")
+    except ClientError as error:
+        # Empty objects have no byte range
+        if error.response["Error"]["Code"] != "InvalidRange":
             raise
+        return S3_CLIENT.get_object(Bucket=bucket, Key=key)
+
+
+def get_object_size(response: GetObjectOutputTypeDef) -> int:
+    """Responses to ranged requests only state the size of the whole object in `ContentRange`"""
+    if "ContentRange" in response:
+        return int(response["ContentRange"].rsplit("/", 1)[1])
+    return response["ContentLength"]
+
+
+def update_content_checks_from_prefix(
+    bucket: str, key: str, content_checks: Sequence[ContentCheck]
+) -> None:
+    """
+    Feeds content checks when the digest is known without downloading the object, by only
+    downloading as many bytes as they need.
+    """
+    if not content_checks:
+        return
+
+    prefix_size = max(content_check.prefix_size or 0 for content_check in content_checks)
+    try:
+        response = S3_CLIENT.get_object(Bucket=bucket, Key=key, Range=f"bytes=0-{prefix_size - 1}")
+    except ClientError as error:
+        # Empty objects have no byte range
+        if error.response["Error"]["Code"] == "InvalidRange":
+            return
+        raise
+
+    prefix = response["Body"].read()
+    for content_check in content_checks:
+        content_check.update(prefix)
 
-        checksum_function_code = int(hex_multihash[:2], 16)
-        checksum_function = FUNCS[checksum_function_code]
 
-        file_digest = checksum_function()
-        for chunk in url_stream.iter_chunks(chunk_size=CHUNK_SIZE):
+def verify_size(expected_size: Optional[int], actual_size: int) -> None:
+    if expected_size is not None and actual_size != expected_size:
+        raise SizeMismatchError(actual_size)
+
+
+def update_digest_from_stream(file_digest: Any, stream: StreamingBody, buffer_size: int) -> None:
+    """
+    Reads the stream into the same buffer over and over, so the per-chunk cost is a single digest
+    update rather than allocating a new bytes object for every chunk.
+    """
+    if not hasattr(stream, "readinto"):
+        # Older botocore streaming bodies can only return new bytes objects
+        while chunk := stream.read(buffer_size):
             file_digest.update(chunk)
+        return
+
+    buffer = bytearray(buffer_size)
+    view = memoryview(buffer)
+    while byte_count := stream.readinto(buffer):
+        file_digest.update(view[:byte_count])
+
+
+def update_digest_from_resumable_stream(  # pylint: disable=too-many-arguments
+    file_digest: Any,
+    stream: StreamingBody,
+    buffer_size: int,
+    size: int,
+    reopen_stream: Callable[[int], StreamingBody],
+    reconnect_policy: ReconnectPolicy,
+) -> None:
+    """
+    Keeps feeding the same digest until it has received `size` bytes, when the stream only covers
+    the start of the object or the connection drops part way through. `reopen_stream` is called
+    with the number of bytes hashed so far, and has to return the rest of the stream from that
+    offset.
+    """
+    counting_digest = ByteCountingDigest(file_digest)
+    delays = reconnect_policy.delays()
+    while True:
+        stream_offset = counting_digest.byte_count
+        interrupted = update_digest_until_interrupted(counting_digest, stream, buffer_size, delays)
+        if counting_digest.byte_count >= size:
+            return
+        if not interrupted and counting_digest.byte_count == stream_offset:
+            raise IncompleteReadError(actual_bytes=stream_offset, expected_bytes=size)
+
+        stream = reopen_stream_until_connected(reopen_stream, counting_digest.byte_count, delays)
+
+
+def update_digest_until_interrupted(
+    file_digest: Any, stream: StreamingBody, buffer_size: int, delays: Iterator[float]
+) -> bool:
+    """Returns whether the stream was interrupted, after waiting for the next delay"""
+    try:
+        update_digest_from_stream(file_digest, stream, buffer_size)
+    except STREAM_INTERRUPTION_ERRORS:
+        if not wait_for_next_delay(delays):
+            raise
+        return True
+
+    return False
+
+
+def reopen_stream_until_connected(
+    reopen_stream: Callable[[int], StreamingBody], offset: int, delays: Iterator[float]
+) -> StreamingBody:
+    """Reconnecting uses up the same delays as reading, so one policy bounds both"""
+    while True:
+        try:
+            return reopen_stream(offset)
+        except STREAM_INTERRUPTION_ERRORS:
+            if not wait_for_next_delay(delays):
+                raise
+
+
+def wait_for_next_delay(delays: Iterator[float]) -> bool:
+    """Returns whether there was a delay left to wait for"""
+    delay = next(delays, None)
+    if delay is None:
+        return False
+    sleep(delay)
+    return True
 
-        if file_digest.digest() != decode(bytes.fromhex(hex_multihash)):
-            raise ChecksumMismatchError(file_digest.hexdigest())
+
+def update_digest_from_parts(  # pylint: disable=too-many-arguments
+    file_digest: Any,
+    bucket: str,
+    key: str,
+    etag: str,
+    size: int,
+    reconnect_policy: ReconnectPolicy,
+    first_part_stream: Optional[StreamingBody] = None,
+) -> None:
+    """
+    Downloads up to `PARTS_IN_FLIGHT` byte ranges of the object at a time and feeds them to the
+    digest strictly in byte order, so at most that many parts are held in memory. Every part request
+    is pinned to the ETag of the first response, so the parts can't come from different versions.
+    `first_part_stream` is the already requested first part, if any.
+    """
+    pending_parts: Deque["Future[PartBuffer]"] = deque()
+    with ThreadPoolExecutor(max_workers=PARTS_IN_FLIGHT) as executor:
+        for first_byte in range(0, size, PART_SIZE):
+            if len(pending_parts) == PARTS_IN_FLIGHT:
+                file_digest.update(pending_parts.popleft().result())
+
+            last_byte = min(first_byte + PART_SIZE, size) - 1
+            pending_parts.append(
+                executor.submit(
+                    get_object_part,
+                    bucket,
+                    key,
+                    etag,
+                    first_byte,
+                    last_byte,
+                    reconnect_policy,
+                    first_part_stream if first_byte == 0 else None,
+                )
+            )
+
+        while pending_parts:
+            file_digest.update(pending_parts.popleft().result())
+
+
+def get_object_part(  # pylint: disable=too-many-arguments
+    bucket: str,
+    key: str,
+    etag: str,
+    first_byte: int,
+    last_byte: int,
+    reconnect_policy: ReconnectPolicy,
+    stream: Optional[StreamingBody] = None,
+) -> PartBuffer:
+    version_arguments = {"IfMatch": etag}
+
+    def get_part_stream(offset: int) -> StreamingBody:
+        return get_object_stream(bucket, key, version_arguments, first_byte + offset, last_byte)
+
+    part = PartBuffer()
+    update_digest_from_resumable_stream(
+        part,
+        get_part_stream(0) if stream is None else stream,
+        DEFAULT_BUFFER_SIZE,
+        last_byte - first_byte + 1,
+        get_part_stream,
+        reconnect_policy,
+    )
+    return part
+
+
+def get_object_stream(
+    bucket: str,
+    key: str,
+    version_arguments: Dict[str, str],
+    first_byte: int,
+    last_byte: Optional[int] = None,
+) -> StreamingBody:
+    byte_range = f"bytes={first_byte}-" if last_byte is None else f"bytes={first_byte}-{last_byte}"
+    return S3_CLIENT.get_object(Bucket=bucket, Key=key, Range=byte_range, **version_arguments)[
+        "Body"
+    ]
+
+
+def get_object_version_arguments(response: GetObjectOutputTypeDef) -> Dict[str, str]:
+    """Arguments to get the same object version as `response` again"""
+    if "VersionId" in response:
+        return {"VersionId": response["VersionId"]}
+    return {"IfMatch": response["ETag"]}
 
 
 def get_job_offset() -> int:
     return int(environ.get(ARRAY_INDEX_VARIABLE_NAME, 0))
+
+
+def get_job_item_indexes(
+    processing_assets_model: Type[ProcessingAssetsModelBase], hash_key: str, first_job: int
+) -> List[int]:
+    """
+    Each array job checks the assets listed by checksum job `first_job` plus its array index. The
+    job row is read consistently, and a missing one fails the job rather than checking the wrong
+    assets.
+    """
+    checksum_job = processing_assets_model.get(
+        hash_key,
+        range_key=f"{CHECKSUM_JOB_PREFIX}#{first_job + get_job_offset()}",
+        consistent_read=True,
+    )
+    # The stubs type the list items as the attribute class rather than its value
+    return [int(index) for index in checksum_job.item_indexes]  # type: ignore[call-overload]
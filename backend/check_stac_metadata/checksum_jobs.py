@@ -0,0 +1,41 @@
+from heapq import heappop, heappush
+from typing import List, Sequence, Tuple
+
+# Bytes each checksum job should download, so that an array job takes about
+# total bytes / (throughput × number of jobs)
+CHECKSUM_JOB_TARGET_SIZE = 4 * 1024 * 1024 * 1024
+# Fixed cost of checking an asset regardless of its size, such as requests and result writes,
+# expressed in bytes. Keeps a job from getting thousands of tiny sidecar files.
+ASSET_OVERHEAD_SIZE = 1024 * 1024
+# Size assumed for assets whose metadata doesn't declare one, rather than requesting each of them
+# from S3 while planning. A wrong guess only makes the jobs less evenly balanced.
+UNDECLARED_ASSET_SIZE = 64 * 1024 * 1024
+# Keeps each job's row well below the DynamoDB item size limit
+MAX_CHECKSUM_JOB_ITEM_COUNT = 1_000
+# Number of merged assets to pack into checksum jobs at a time when the jobs are published while
+# the crawl is still running
+CHECKSUM_WINDOW_SIZE = 10_000
+
+
+def pack_checksum_jobs(
+    asset_sizes: Sequence[int],
+    target_size: int = CHECKSUM_JOB_TARGET_SIZE,
+    max_item_count: int = MAX_CHECKSUM_JOB_ITEM_COUNT,
+) -> List[List[int]]:
+    """
+    Splits the asset indexes into as many jobs as the target size and the item limit call for, and
+    balances the bytes between them by handing the largest remaining asset to the least loaded job.
+    An asset larger than the target size gets a job of its own, which the smaller assets then avoid.
+    """
+    costs = [asset_size + ASSET_OVERHEAD_SIZE for asset_size in asset_sizes]
+    job_count = max(-(-sum(costs) // target_size), -(-len(costs) // max_item_count))
+
+    jobs: List[List[int]] = [[] for _ in range(job_count)]
+    job_loads: List[Tuple[int, int]] = [(0, job_index) for job_index in range(job_count)]
+    for asset_index in sorted(range(len(costs)), key=lambda index: (-costs[index], index)):
+        job_load, job_index = heappop(job_loads)
+        jobs[job_index].append(asset_index)
+        if len(jobs[job_index]) < max_item_count:
+            heappush(job_loads, (job_load + costs[asset_index], job_index))
+
+    return [sorted(job) for job in jobs]
@@ -0,0 +1,77 @@
+from datetime import timedelta
+from hashlib import sha256
+from typing import Dict, Optional, Union
+
+from ..checksum_cache import DEFAULT_TIME_TO_LIVE
+from ..checksum_cache_model import metadata_fingerprint_model_with_meta
+from ..clock import now
+from .stac_validators import get_validator_version
+
+
+def get_metadata_fingerprint_key(dataset_id: str, url: str, validator_version: str) -> str:
+    return f"DATASET#{dataset_id}#METADATA#{url}#VALIDATOR#{validator_version}"
+
+
+def get_metadata_fingerprint(contents: Union[bytes, str]) -> str:
+    if isinstance(contents, str):
+        contents = contents.encode()
+    return sha256(contents).hexdigest()
+
+
+class MetadataFingerprints:
+    """
+    Digests of the metadata files of a dataset which passed schema validation, so that files which
+    haven't changed since an earlier version don't have to be validated again. Every file is still
+    downloaded to find its links and assets, so this only saves the validation. The digests are
+    keyed by the validator version, so upgrading the bundled schemas validates every file again.
+    """
+
+    def __init__(
+        self,
+        dataset_id: str,
+        checksum_cache_table_name: Optional[str] = None,
+        validator_version: Optional[str] = None,
+        time_to_live: timedelta = DEFAULT_TIME_TO_LIVE,
+    ):
+        self.dataset_id = dataset_id
+        self.metadata_fingerprint_model = metadata_fingerprint_model_with_meta(
+            checksum_cache_table_name
+        )
+        self.validator_version = (
+            get_validator_version() if validator_version is None else validator_version
+        )
+        self.time_to_live = time_to_live
+        # Fingerprints of files which passed in this version, which haven't been written yet
+        self.passed: Dict[str, str] = {}
+
+    def get(self, url: str) -> Optional[str]:
+        try:
+            entry = self.metadata_fingerprint_model.get(self.get_key(url))
+        except self.metadata_fingerprint_model.DoesNotExist:
+            return None
+
+        # DynamoDB can take a while to delete expired items
+        if entry.expires_at <= now():
+            return None
+
+        return entry.fingerprint
+
+    def put(self, url: str, fingerprint: str) -> None:
+        self.passed[self.get_key(url)] = fingerprint
+
+    def get_key(self, url: str) -> str:
+        return get_metadata_fingerprint_key(self.dataset_id, url, self.validator_version)
+
+    def flush(self) -> None:
+        if not self.passed:
+            return
+
+        expires_at = now() + self.time_to_live
+        with self.metadata_fingerprint_model.batch_write() as batch_writer:
+            for key, fingerprint in self.passed.items():
+                batch_writer.save(
+                    self.metadata_fingerprint_model(
+                        pk=key, fingerprint=fingerprint, expires_at=expires_at
+                    )
+                )
+        self.passed = {}
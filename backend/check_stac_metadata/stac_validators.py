@@ -1,38 +1,272 @@
+from enum import Enum
+from functools import lru_cache
+from glob import glob
+from hashlib import sha256
 from json import load
-from os.path import dirname, join
-from typing import List
+from os.path import dirname, join, relpath
+from typing import Any, Callable, Dict, Iterator, List, NoReturn, Optional, Sequence, Union
 
-from jsonschema import Draft7Validator, FormatChecker, RefResolver  # type: ignore[import]
+import fastjsonschema  # type: ignore[import]
+from fastjsonschema.draft07 import CodeGeneratorDraft07  # type: ignore[import]
+from jsonschema import (  # type: ignore[import]
+    Draft7Validator,
+    FormatChecker,
+    RefResolutionError,
+    RefResolver,
+)
 from jsonschema._utils import URIDict  # type: ignore[import]
 
 from ..types import JsonObject
 
+SCRIPT_DIR = dirname(__file__)
+
+# Schemas referenced by the extension schemas, which are bundled with the extension schemas
+EXTENSION_DEPENDENCY_SCHEMAS = ["geojson-spec/Geometry.json"]
+EXTENSION_SCHEMA_GLOB = "stac-extensions/*/*/schema.json"
+BUNDLED_SCHEMA_GLOBS = [
+    "geojson-spec/*.json",
+    "stac-spec/*/json-schema/*.json",
+    EXTENSION_SCHEMA_GLOB,
+]
+
+
+# Draft 7 keywords fastjsonschema generates checks for. A schema using any other keyword which
+# jsonschema checks is never validated by generated code, so that it can't pass objects by mistake.
+COMPILED_KEYWORDS = frozenset(
+    [
+        "$ref",
+        "additionalItems",
+        "additionalProperties",
+        "allOf",
+        "anyOf",
+        "const",
+        "contains",
+        "contentEncoding",
+        "contentMediaType",
+        "dependencies",
+        "else",
+        "enum",
+        "exclusiveMaximum",
+        "exclusiveMinimum",
+        "format",
+        "if",
+        "items",
+        "maxItems",
+        "maxLength",
+        "maxProperties",
+        "maximum",
+        "minItems",
+        "minLength",
+        "minProperties",
+        "minimum",
+        "multipleOf",
+        "not",
+        "oneOf",
+        "pattern",
+        "patternProperties",
+        "properties",
+        "propertyNames",
+        "required",
+        "then",
+        "type",
+        "uniqueItems",
+    ]
+)
+UNCOMPILED_KEYWORDS = frozenset(Draft7Validator.VALIDATORS) - COMPILED_KEYWORDS
+
+
+class STACValidatorBackend(Enum):
+    COMPILED = "compiled"
+    JSONSCHEMA = "jsonschema"
+
+
+STAC_VALIDATOR_BACKEND = STACValidatorBackend.COMPILED
+
 
 class BaseSTACValidator(Draft7Validator):
-    def __init__(self, schema: str, extra_schemas: List[str]) -> None:
-        self.script_dir = dirname(__file__)
+    """
+    Validates against the core schema and the schemas of the given extensions. Every `$ref` is
+    resolved from the bundled schemas, so validation never reaches out to the network.
+    """
 
-        item_schema = self.get_schema_dict(schema)
+    def __init__(
+        self, schema: str, extra_schemas: List[str], stac_extensions: Sequence[str] = ()
+    ) -> None:
+        item_schema = get_schema_dict(schema)
 
-        schema_store = {}
+        self.schema_store = dict(get_extension_schema_store())
         uri_dictionary = URIDict()
-        for extra_schema in extra_schemas:
+        for schema_dict in [item_schema] + [get_schema_dict(path) for path in extra_schemas]:
             # Normalize URLs the same way as jsonschema does
-            schema_dict = self.get_schema_dict(extra_schema)
-            schema_store[uri_dictionary.normalize(schema_dict["$id"])] = schema_dict
+            self.schema_store[uri_dictionary.normalize(schema_dict["$id"])] = schema_dict
+
+        # Referencing the core schema rather than embedding it keeps its `$id` pointing at it
+        self.schema_references = [item_schema["$id"], *stac_extensions]
+        if stac_extensions:
+            base_uri = ""
+            root_schema = get_all_of_references_schema(self.schema_references)
+        else:
+            base_uri = item_schema["$id"]
+            root_schema = item_schema
+
+        resolver = RefResolver(
+            base_uri,
+            root_schema,
+            store=self.schema_store,
+            handlers={"http": refuse_remote_reference, "https": refuse_remote_reference},
+        )
+
+        super().__init__(root_schema, resolver=resolver, format_checker=FormatChecker())
+
+
+class CompiledSTACValidator:
+    """
+    Checks objects with Python code generated from the schemas of a jsonschema validator, which is
+    much faster than interpreting the schemas for every object. Only objects the generated code
+    rejects are validated again by the jsonschema validator, so failures are reported exactly as
+    before, and anything the generated code is stricter about still passes. When fastjsonschema
+    can't compile the schemas, or they use a keyword it doesn't check, every object is validated
+    by jsonschema instead.
+
+    Every `format` fastjsonschema knows is checked by the jsonschema format checker rather than by
+    the fastjsonschema regular expressions, so formats jsonschema doesn't check aren't checked by
+    the generated code either. fastjsonschema anchors `$` in a `pattern` at the very end of the
+    string, which only makes it stricter than jsonschema.
+    """
+
+    def __init__(self, validator: BaseSTACValidator):
+        self.validator = validator
+        self.resolved_schemas: List[JsonObject] = []
+        format_checker = validator.format_checker
+        try:
+            compiled_validate = fastjsonschema.compile(
+                get_all_of_references_schema(validator.schema_references),
+                handlers={"http": self.resolve_reference, "https": self.resolve_reference},
+                formats={
+                    format_name: get_format_conformance_checker(format_checker, format_name)
+                    for format_name in {
+                        *format_checker.checkers,
+                        *CodeGeneratorDraft07.FORMAT_REGEXS,
+                        "regex",
+                    }
+                },
+                # Validation mustn't change the object
+                use_default=False,
+            )
+        except fastjsonschema.JsonSchemaDefinitionException:
+            compiled_validate = None
+
+        self.compiled_validate: Optional[Callable[[Any], Any]] = None
+        if not UNCOMPILED_KEYWORDS.intersection(get_keywords(self.resolved_schemas)):
+            self.compiled_validate = compiled_validate
+
+    def resolve_reference(self, url: str) -> JsonObject:
+        try:
+            schema_dict: JsonObject = self.validator.schema_store[URIDict().normalize(url)]
+        except KeyError:
+            refuse_remote_reference(url)
+        self.resolved_schemas.append(schema_dict)
+        return schema_dict
+
+    def is_valid_compiled(self, instance: Any) -> bool:
+        assert self.compiled_validate is not None
+        try:
+            self.compiled_validate(instance)
+        except fastjsonschema.JsonSchemaValueException:
+            return False
+        return True
+
+    def validate(self, instance: Any) -> None:
+        if self.compiled_validate is None or not self.is_valid_compiled(instance):
+            self.validator.validate(instance)
+
+
+STACValidator = Union[BaseSTACValidator, CompiledSTACValidator]
+
+
+def build_stac_validator(
+    validator: BaseSTACValidator, backend: STACValidatorBackend = STAC_VALIDATOR_BACKEND
+) -> STACValidator:
+    if backend is STACValidatorBackend.COMPILED:
+        return CompiledSTACValidator(validator)
+    return validator
+
+
+def get_all_of_references_schema(references: List[str]) -> JsonObject:
+    return {"allOf": [{"$ref": reference} for reference in references]}
+
+
+def get_format_conformance_checker(
+    format_checker: FormatChecker, format_name: str
+) -> Callable[[str], bool]:
+    def conforms(instance: str) -> bool:
+        result: bool = format_checker.conforms(instance, format_name)
+        return result
+
+    return conforms
+
+
+def get_keywords(schema: Any) -> Iterator[str]:
+    """
+    Every object key anywhere in the schemas, which includes some property names as well as the
+    keywords, so the check errs towards not using the generated code.
+    """
+    if isinstance(schema, dict):
+        for key, value in schema.items():
+            yield key
+            yield from get_keywords(value)
+    elif isinstance(schema, list):
+        for value in schema:
+            yield from get_keywords(value)
+
+
+def get_schema_dict(path: str) -> JsonObject:
+    with open(join(SCRIPT_DIR, path), encoding="utf-8") as file_pointer:
+        schema_dict: JsonObject = load(file_pointer)
+        return schema_dict
+
+
+@lru_cache
+def get_extension_schema_store() -> Dict[str, JsonObject]:
+    """
+    Loads the bundled extension schemas once per process, indexed by their normalized `$id` the
+    same way as jsonschema normalizes references.
+    """
+    uri_dictionary = URIDict()
+    schema_store = {}
+    for path in EXTENSION_DEPENDENCY_SCHEMAS + sorted(
+        glob(join(SCRIPT_DIR, EXTENSION_SCHEMA_GLOB))
+    ):
+        schema_dict = get_schema_dict(path)
+        schema_store[uri_dictionary.normalize(schema_dict["$id"])] = schema_dict
+    return schema_store
+
+
+@lru_cache
+def get_validator_version() -> str:
+    """
+    Digest of the validator backend and of the path and contents of every bundled schema, which
+    changes whenever upgrading the schemas or adding an extension could change validation results.
+    """
+    digest = sha256(STAC_VALIDATOR_BACKEND.value.encode())
+    for pattern in BUNDLED_SCHEMA_GLOBS:
+        for path in sorted(glob(join(SCRIPT_DIR, pattern))):
+            digest.update(relpath(path, SCRIPT_DIR).encode())
+            with open(path, "rb") as file_pointer:
+                digest.update(file_pointer.read())
+    return digest.hexdigest()
+
 
-        resolver = RefResolver.from_schema(item_schema, store=schema_store)
+def is_bundled_extension(stac_extension: str) -> bool:
+    return URIDict().normalize(stac_extension) in get_extension_schema_store()
 
-        super().__init__(item_schema, resolver=resolver, format_checker=FormatChecker())
 
-    def get_schema_dict(self, path: str) -> JsonObject:
-        with open(join(self.script_dir, path)) as file_pointer:
-            schema_dict: JsonObject = load(file_pointer)
-            return schema_dict
+def refuse_remote_reference(url: str) -> NoReturn:
+    raise RefResolutionError(f"Schema “{url}” isn't bundled, and won't be downloaded")
 
 
 class STACItemSchemaValidator(BaseSTACValidator):
-    def __init__(self) -> None:
+    def __init__(self, stac_extensions: Sequence[str] = ()) -> None:
         extra_schemas = [
             "geojson-spec/Feature.json",
             "geojson-spec/Geometry.json",
@@ -44,11 +278,13 @@ class STACItemSchemaValidator(BaseSTACValidator):
             "stac-spec/item-spec/json-schema/provider.json",
         ]
 
-        super().__init__("stac-spec/item-spec/json-schema/item.json", extra_schemas)
+        super().__init__(
+            "stac-spec/item-spec/json-schema/item.json", extra_schemas, stac_extensions
+        )
 
 
 class STACCollectionSchemaValidator(BaseSTACValidator):
-    def __init__(self) -> None:
+    def __init__(self, stac_extensions: Sequence[str] = ()) -> None:
         extra_schemas = [
             "stac-spec/catalog-spec/json-schema/catalog.json",
             "stac-spec/catalog-spec/json-schema/catalog-core.json",
@@ -61,14 +297,18 @@ class STACCollectionSchemaValidator(BaseSTACValidator):
             "stac-spec/item-spec/json-schema/provider.json",
         ]
 
-        super().__init__("stac-spec/collection-spec/json-schema/collection.json", extra_schemas)
+        super().__init__(
+            "stac-spec/collection-spec/json-schema/collection.json", extra_schemas, stac_extensions
+        )
 
 
 class STACCatalogSchemaValidator(BaseSTACValidator):
-    def __init__(self) -> None:
+    def __init__(self, stac_extensions: Sequence[str] = ()) -> None:
         extra_schemas = [
             "stac-spec/catalog-spec/json-schema/catalog.json",
             "stac-spec/catalog-spec/json-schema/catalog-core.json",
         ]
 
-        super().__init__("stac-spec/catalog-spec/json-schema/catalog.json", extra_schemas)
+        super().__init__(
+            "stac-spec/catalog-spec/json-schema/catalog.json", extra_schemas, stac_extensions
+        )
@@ -1,4 +1,5 @@
 from json import dumps
+from typing import Optional
 from urllib.parse import urlparse
 
 import boto3
@@ -8,14 +9,40 @@ from jsonschema import ValidationError, validate  # type: ignore[import]
 from ..error_response_keys import ERROR_KEY, ERROR_MESSAGE_KEY
 from ..log import set_up_logging
 from ..parameter_store import ParameterName, get_param
-from ..step_function_event_keys import DATASET_ID_KEY, METADATA_URL_KEY, VERSION_ID_KEY
+from ..step_function_event_keys import (
+    CRAWL_KEY,
+    CRAWL_PASSES_KEY,
+    CRAWL_SHARDS_KEY,
+    CRAWL_SHARD_KEY,
+    DATASET_ID_KEY,
+    METADATA_URL_KEY,
+    MORE_TO_CRAWL_KEY,
+    MORE_TO_MERGE_KEY,
+    PIPELINED_KEY,
+    VERSION_ID_KEY,
+)
 from ..types import JsonObject
 from ..validation_results_model import ValidationResultFactory
+from .metadata_fingerprints import MetadataFingerprints
 from .utils import STACDatasetValidator
 
 LOGGER = set_up_logging(__name__)
 S3_CLIENT = boto3.client("s3")
 
+METADATA_DOWNLOAD_CONCURRENCY = 16
+PROCESSING_ASSETS_WRITE_CONCURRENCY = 8
+
+# The first invocation stops crawling once this many metadata files are waiting, and leaves them to
+# crawl shards of at least `URLS_PER_CRAWL_SHARD` metadata files each, and at most
+# `MAX_CRAWL_SHARD_COUNT` shards. Each crawl shard pass stops at the same frontier limit, and leaves
+# what's left to the shard's next pass.
+CRAWL_FRONTIER_LIMIT = 1_000
+URLS_PER_CRAWL_SHARD = 100
+MAX_CRAWL_SHARD_COUNT = 20
+# Seconds each crawl keeps validating metadata files for, leaving the rest of the Lambda timeout to
+# write what it found and what's left of its frontier
+CRAWL_TIME_BUDGET_SECONDS = 30
+
 
 def s3_url_reader(url: str) -> StreamingBody:
     parse_result = urlparse(url, allow_fragments=False)
@@ -39,6 +66,16 @@ def lambda_handler(event: JsonObject, _context: bytes) -> JsonObject:
                     DATASET_ID_KEY: {"type": "string"},
                     VERSION_ID_KEY: {"type": "string"},
                     METADATA_URL_KEY: {"type": "string"},
+                    CRAWL_SHARD_KEY: {"type": "integer", "minimum": 0},
+                    CRAWL_KEY: {
+                        "type": "object",
+                        "properties": {CRAWL_PASSES_KEY: {"type": "integer", "minimum": 0}},
+                    },
+                    CRAWL_SHARDS_KEY: {
+                        "type": "array",
+                        "items": {"type": "integer", "minimum": 0},
+                    },
+                    PIPELINED_KEY: {"type": "boolean"},
                 },
                 "required": [DATASET_ID_KEY, METADATA_URL_KEY, VERSION_ID_KEY],
             },
@@ -52,7 +89,52 @@ def lambda_handler(event: JsonObject, _context: bytes) -> JsonObject:
     validation_result_factory = ValidationResultFactory(
         hash_key, get_param(ParameterName.STORAGE_VALIDATION_RESULTS_TABLE_NAME)
     )
-    validator = STACDatasetValidator(s3_url_reader, validation_result_factory)
 
-    validator.run(event[METADATA_URL_KEY], hash_key)
-    return {}
+    dataset_id = event[DATASET_ID_KEY]
+
+    if CRAWL_SHARD_KEY in event:
+        more_to_crawl = get_validator(
+            validation_result_factory, dataset_id, CRAWL_FRONTIER_LIMIT
+        ).run_shard(hash_key, event[CRAWL_SHARD_KEY], event[METADATA_URL_KEY])
+        return {
+            MORE_TO_CRAWL_KEY: more_to_crawl,
+            CRAWL_PASSES_KEY: event.get(CRAWL_KEY, {}).get(CRAWL_PASSES_KEY, 0) + 1,
+        }
+
+    if CRAWL_SHARDS_KEY in event and event.get(PIPELINED_KEY, False):
+        more_to_merge = get_validator(validation_result_factory, dataset_id).merge_finished_shards(
+            hash_key, event[CRAWL_SHARDS_KEY], event[METADATA_URL_KEY]
+        )
+        return {MORE_TO_MERGE_KEY: more_to_merge}
+
+    if CRAWL_SHARDS_KEY in event:
+        more_to_merge = get_validator(validation_result_factory, dataset_id).merge_shards(
+            hash_key, event[CRAWL_SHARDS_KEY], event[METADATA_URL_KEY]
+        )
+        return {MORE_TO_MERGE_KEY: more_to_merge}
+
+    validator = get_validator(validation_result_factory, dataset_id, CRAWL_FRONTIER_LIMIT)
+    unvisited_entries = validator.run(event[METADATA_URL_KEY], hash_key)
+    return {
+        CRAWL_SHARDS_KEY: validator.save_crawl_frontier(
+            event[METADATA_URL_KEY], unvisited_entries, URLS_PER_CRAWL_SHARD, MAX_CRAWL_SHARD_COUNT
+        )
+    }
+
+
+def get_validator(
+    validation_result_factory: ValidationResultFactory,
+    dataset_id: str,
+    frontier_limit: Optional[int] = None,
+) -> STACDatasetValidator:
+    return STACDatasetValidator(
+        s3_url_reader,
+        validation_result_factory,
+        METADATA_DOWNLOAD_CONCURRENCY,
+        PROCESSING_ASSETS_WRITE_CONCURRENCY,
+        frontier_limit=frontier_limit,
+        metadata_fingerprints=MetadataFingerprints(
+            dataset_id, get_param(ParameterName.PROCESSING_CHECKSUM_CACHE_TABLE_NAME)
+        ),
+        time_budget=CRAWL_TIME_BUDGET_SECONDS,
+    )
@@ -1,7 +1,11 @@
+# pylint: disable=too-many-lines
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
 from functools import lru_cache
-from json import JSONDecodeError, dumps, load
-from os.path import dirname
-from typing import Any, Callable, Dict, List, Tuple, Type, Union
+from hashlib import sha256
+from json import JSONDecodeError, dumps, loads
+from time import monotonic
+from typing import Any, Callable, Deque, Dict, List, Optional, Set, Tuple, Type, Union
 
 from botocore.exceptions import ClientError  # type: ignore[import]
 from botocore.response import StreamingBody  # type: ignore[import]
@@ -9,13 +13,25 @@ from jsonschema import ValidationError  # type: ignore[import]
 
 from ..check import Check
 from ..log import set_up_logging
-from ..processing_assets_model import ProcessingAssetType, processing_assets_model_with_meta
+from ..processing_assets_model import (
+    CHECKSUM_JOB_PREFIX,
+    CHECKSUM_PROGRESS_RANGE_KEY,
+    VERSION_SUMMARY_RANGE_KEY,
+    ProcessingAssetType,
+    ProcessingAssetsModelBase,
+    processing_assets_model_with_meta,
+)
 from ..types import JsonObject
 from ..validation_results_model import ValidationResult, ValidationResultFactory
+from .checksum_jobs import CHECKSUM_WINDOW_SIZE, UNDECLARED_ASSET_SIZE, pack_checksum_jobs
+from .metadata_fingerprints import MetadataFingerprints, get_metadata_fingerprint
 from .stac_validators import (
     STACCatalogSchemaValidator,
     STACCollectionSchemaValidator,
     STACItemSchemaValidator,
+    STACValidator,
+    build_stac_validator,
+    is_bundled_extension,
 )
 
 LOGGER = set_up_logging(__name__)
@@ -24,6 +40,27 @@ STAC_COLLECTION_TYPE = "Collection"
 STAC_ITEM_TYPE = "Feature"
 STAC_CATALOG_TYPE = "Catalog"
 
+# DynamoDB limit on the number of items in one BatchWriteItem call
+BATCH_WRITE_ITEM_LIMIT = 25
+# Number of discovered metadata files or assets to keep in memory before writing them
+PROCESSING_ASSETS_FLUSH_SIZE = 1_000
+
+# Range key prefixes of the metadata files left for each crawl shard, and of what each shard found
+CRAWL_FRONTIER_PREFIX = "CRAWL_FRONTIER"
+CRAWL_SHARD_PREFIX = "CRAWL_SHARD"
+# Range key suffix of the row each crawl shard writes once everything it found is written
+CRAWL_SHARD_SUMMARY_SUFFIX = "SUMMARY"
+# Range key suffix of the row with what a crawl shard has found so far and its frontier range
+CRAWL_SHARD_PROGRESS_SUFFIX = "PROGRESS"
+# Range key prefixes of the rows with the index of each merged metadata file and asset, keyed by a
+# hash of the URL to stay within the DynamoDB key size limit
+METADATA_URL_PREFIX = "METADATA_URL"
+ASSET_URL_PREFIX = "ASSET_URL"
+# Number of shard rows to merge at a time, and of shard rows merged plus asset rows packed into
+# checksum jobs before a merge call returns, which keeps it well within the Lambda timeout
+MERGE_PAGE_SIZE = 1_000
+MERGE_ROW_LIMIT = 10_000
+
 STAC_TYPE_VALIDATION_MAP: Dict[
     str,
     Union[
@@ -39,31 +76,129 @@ STAC_TYPE_VALIDATION_MAP: Dict[
 
 S3_URL_PREFIX = "s3://"
 
+# URL of a metadata file waiting to be crawled, and the index of its first link still to be
+# followed, which is only nonzero when the file had more links than fitted in the frontier
+FrontierEntry = Tuple[str, int]
+
+
+@lru_cache
+def get_stac_validator(stac_type: str, stac_extensions: Tuple[str, ...] = ()) -> STACValidator:
+    """
+    Building a validator reads and parses all of its schema files, and possibly compiles them, so
+    each one is only built once per process and combination of extensions, and reused for every
+    metadata file, including in later warm Lambda invocations.
+    """
+    return build_stac_validator(STAC_TYPE_VALIDATION_MAP[stac_type](stac_extensions))
+
+
+def get_bundled_stac_extensions(object_json: JsonObject) -> Tuple[str, ...]:
+    """
+    Extensions without a bundled schema are only validated against the core schema. Sorted, so
+    that every combination of extensions gets a single validator. Runs before schema validation,
+    so anything other than a list of strings is left for the core schema to report.
+    """
+    stac_extensions = object_json.get("stac_extensions", [])
+    if not isinstance(stac_extensions, list):
+        return ()
+
+    return tuple(
+        sorted(
+            {
+                stac_extension
+                for stac_extension in stac_extensions
+                if isinstance(stac_extension, str) and is_bundled_extension(stac_extension)
+            }
+        )
+    )
+
 
 @lru_cache
 def maybe_convert_relative_url_to_absolute(url_or_path: str, parent_url: str) -> str:
     if url_or_path[:5] == S3_URL_PREFIX:
-        return url_or_path
+        return normalize_s3_url(url_or_path)
 
-    return f"{dirname(parent_url)}/{url_or_path}"
+    parent_directory_url = parent_url[: parent_url.rindex("/")]
+    return normalize_s3_url(f"{parent_directory_url}/{url_or_path}")
 
 
-class STACDatasetValidator:
-    def __init__(
+def normalize_s3_url(url: str) -> str:
+    """
+    Resolves "." and ".." path segments, so that every reference to the same file has the same URL.
+    Empty segments and trailing slashes are significant in S3 keys, so unlike `normpath` this keeps
+    them. Doesn't use `urllib.parse`, since "?" and "#" are valid in S3 keys.
+    """
+    bucket, _, key = url[len(S3_URL_PREFIX) :].partition("/")
+    key_segments = key.split("/")
+    segments: List[str] = []
+    for segment in key_segments:
+        if segment == "..":
+            if segments:
+                segments.pop()
+        elif segment != ".":
+            segments.append(segment)
+
+    if key_segments[-1] in (".", ".."):
+        # Like a trailing slash, a trailing dot segment refers to a directory
+        segments.append("")
+
+    return f"{S3_URL_PREFIX}{bucket}/{'/'.join(segments)}"
+
+
+class STACDatasetValidator:  # pylint: disable=too-many-instance-attributes,too-many-public-methods
+    def __init__(  # pylint: disable=too-many-arguments
         self,
         url_reader: Callable[[str], StreamingBody],
         validation_result_factory: ValidationResultFactory,
+        concurrency: int = 1,
+        write_concurrency: int = 1,
+        flush_size: int = PROCESSING_ASSETS_FLUSH_SIZE,
+        frontier_limit: Optional[int] = None,
+        metadata_fingerprints: Optional[MetadataFingerprints] = None,
+        time_budget: Optional[float] = None,
     ):
         self.url_reader = url_reader
         self.validation_result_factory = validation_result_factory
+        self.concurrency = concurrency
+        self.write_concurrency = write_concurrency
+        self.flush_size = flush_size
+        self.frontier_limit = frontier_limit
+        self.metadata_fingerprints = metadata_fingerprints
+        # Seconds a crawl keeps validating metadata files for before it stops with what's left
+        self.time_budget = time_budget
 
-        self.traversed_urls: List[str] = []
-        self.dataset_assets: List[Dict[str, str]] = []
+        self.hash_key: Optional[str] = None
+        self.range_key_prefix = ""
+        self.traversed_urls: Set[str] = set()
+        self.dataset_asset_multihashes: Dict[str, str] = {}
+        self.conflicting_asset_urls: Set[str] = set()
+        # Discovered assets and metadata files which haven't been written yet
+        self.dataset_assets: List[Dict[str, Any]] = []
         self.dataset_metadata: List[Dict[str, str]] = []
+        self.saved_asset_count = 0
+        self.saved_metadata_count = 0
+        # Sum of the declared sizes of the saved assets
+        self.saved_asset_size = 0
+        # Index of each saved asset, so that a conflict found after writing it can still exclude it
+        # from the checksum jobs
+        self.saved_asset_indexes: Dict[str, int] = {}
+        # Saved assets and checksum jobs which checksum validation can already start on
+        self.published_asset_count = 0
+        self.published_job_count = 0
+        # Crawl shards merged or discarded so far, and rows of the next one merged or discarded so
+        # far, metadata files first
+        self.merged_shard_count = 0
+        self.merged_shard_row_count = 0
+        # Whether the crawl, or one of the crawl shards, has failed
+        self.crawl_failed = False
 
         self.processing_assets_model = processing_assets_model_with_meta()
 
-    def run(self, metadata_url: str, hash_key: str) -> None:
+    def run(self, metadata_url: str, hash_key: str) -> List[FrontierEntry]:
+        """
+        Returns the frontier entries which were left for crawl shards because the frontier grew to
+        `frontier_limit` or the crawl ran out of time. Saves the first checksum progress row, with
+        what was found so far counted as merged.
+        """
         if metadata_url[:5] != S3_URL_PREFIX:
             error_message = f"URL doesn't start with “{S3_URL_PREFIX}”: “{metadata_url}”"
             self.validation_result_factory.save(
@@ -73,35 +208,855 @@ class STACDatasetValidator:
                 details={"message": error_message},
             )
             LOGGER.error(dumps({"success": False, "message": error_message}))
-            return
+            self.hash_key = hash_key
+            unvisited_urls = []
+        else:
+            unvisited_urls = self.crawl([(metadata_url, 0)], hash_key)
 
+        self.save_checksum_progress(metadata_url)
+        return unvisited_urls
+
+    def crawl(self, frontier_entries: List[FrontierEntry], hash_key: str) -> List[FrontierEntry]:
+        self.hash_key = hash_key
         try:
-            self.validate(metadata_url)
+            unvisited_urls = self.validate_urls(frontier_entries)
         except (ValidationError, ClientError, JSONDecodeError) as error:
             LOGGER.error(dumps({"success": False, "message": str(error)}))
+            self.crawl_failed = True
+            self.delete_crawled_rows()
+            return []
+
+        self.flush_processing_assets(minimum_row_count=1)
+        return unvisited_urls
+
+    def save_crawl_frontier(
+        self,
+        metadata_url: str,
+        unvisited_entries: List[FrontierEntry],
+        urls_per_shard: int,
+        max_shard_count: int,
+    ) -> List[int]:
+        """
+        Splits the unvisited frontier entries into contiguous ranges of about the same size, with
+        at least `urls_per_shard` entries each unless that would take more than `max_shard_count`
+        shards. Saves each range as the start of a shard's frontier, and returns the shard numbers.
+        """
+        shard_count = min(-(-len(unvisited_entries) // urls_per_shard), max_shard_count)
+        processing_assets: List[ProcessingAssetsModelBase] = []
+        for shard in range(shard_count):
+            shard_entries = unvisited_entries[
+                len(unvisited_entries)
+                * shard
+                // shard_count : len(unvisited_entries)
+                * (shard + 1)
+                // shard_count
+            ]
+            processing_assets.extend(self.get_crawl_frontier_rows(shard, 0, shard_entries))
+            processing_assets.append(
+                self.processing_assets_model(
+                    hash_key=self.hash_key,
+                    range_key=get_crawl_shard_progress_range_key(shard),
+                    url=metadata_url,
+                    metadata_count=0,
+                    asset_count=0,
+                    frontier_start=0,
+                    frontier_end=len(shard_entries),
+                )
+            )
+        self.save_processing_assets(processing_assets)
+        return list(range(shard_count))
+
+    def get_crawl_frontier_rows(
+        self, shard: int, first_index: int, frontier_entries: List[FrontierEntry]
+    ) -> List[ProcessingAssetsModelBase]:
+        return [
+            self.processing_assets_model(
+                hash_key=self.hash_key,
+                range_key=f"{get_crawl_frontier_range_key_prefix(shard)}{index}",
+                url=url,
+                link_index=link_index or None,
+            )
+            for index, (url, link_index) in enumerate(frontier_entries, first_index)
+        ]
+
+    def run_shard(self, hash_key: str, shard: int, metadata_url: str) -> bool:
+        """
+        Crawls a pass from the start of the shard's frontier, skipping the metadata files the
+        coordinator and the shard's earlier passes already validated. A pass starts from up to half
+        of `frontier_limit` entries, leaving the crawl room to grow, and adds what's left of its
+        frontier to the end of the shard's frontier. Metadata files reachable from several shards
+        are crawled by each of them, and deduplicated by `merge_shards`. Once the frontier is empty
+        or the crawl fails, writes the shard summary, which tells the merge that the shard has
+        finished, how many rows it has to merge, and whether the shard failed. Returns whether the
+        shard has more to crawl.
+        """
+        self.hash_key = hash_key
+        frontier_range = self.load_crawl_shard_progress(shard)
+        for range_key_prefix in [
+            f"{ProcessingAssetType.METADATA.value}#",
+            f"{get_crawl_shard_range_key_prefix(shard)}{ProcessingAssetType.METADATA.value}#",
+        ]:
+            for processing_asset in self.query_processing_assets(range_key_prefix):
+                self.traversed_urls.add(processing_asset.url)
+
+        pass_end = frontier_range.stop
+        if self.frontier_limit is not None:
+            pass_end = min(frontier_range.start + max(self.frontier_limit // 2, 1), pass_end)
+        frontier = self.get_processing_assets(
+            get_crawl_frontier_range_key_prefix(shard), range(frontier_range.start, pass_end)
+        )
+
+        self.range_key_prefix = get_crawl_shard_range_key_prefix(shard)
+        unvisited_entries = self.crawl(
+            [
+                (processing_asset.url, int(processing_asset.link_index or 0))
+                for processing_asset in frontier
+            ],
+            hash_key,
+        )
+        if self.crawl_failed:
+            self.finish_crawl_shard(shard, metadata_url, frontier_range)
+            return False
+
+        self.save_processing_assets(
+            self.get_crawl_frontier_rows(shard, frontier_range.stop, unvisited_entries)
+        )
+        frontier_range = range(pass_end, frontier_range.stop + len(unvisited_entries))
+        if not frontier_range:
+            self.finish_crawl_shard(shard, metadata_url, range(0))
+            self.delete_processing_assets(frontier)
+            return False
+
+        self.save_crawl_shard_progress(shard, metadata_url, frontier_range)
+        self.delete_processing_assets(frontier)
+        return True
+
+    def load_crawl_shard_progress(self, shard: int) -> range:
+        """Loads the counts of what the shard has found so far, and returns its frontier range"""
+        shard_progress = self.processing_assets_model.get(
+            self.hash_key,
+            range_key=get_crawl_shard_progress_range_key(shard),
+            consistent_read=True,
+        )
+        self.saved_metadata_count = int(shard_progress.metadata_count)
+        self.saved_asset_count = int(shard_progress.asset_count)
+        return range(int(shard_progress.frontier_start), int(shard_progress.frontier_end))
+
+    def save_crawl_shard_progress(
+        self, shard: int, metadata_url: str, frontier_range: range
+    ) -> None:
+        self.processing_assets_model(
+            hash_key=self.hash_key,
+            range_key=get_crawl_shard_progress_range_key(shard),
+            url=metadata_url,
+            metadata_count=self.saved_metadata_count,
+            asset_count=self.saved_asset_count,
+            frontier_start=frontier_range.start,
+            frontier_end=frontier_range.stop,
+        ).save()
+
+    def finish_crawl_shard(self, shard: int, metadata_url: str, frontier_range: range) -> None:
+        """
+        Writes the shard summary, and then deletes the shard progress and the frontier rows in
+        `frontier_range`, which a failed shard leaves uncrawled.
+        """
+        self.processing_assets_model(
+            hash_key=self.hash_key,
+            range_key=get_crawl_shard_summary_range_key(shard),
+            url=metadata_url,
+            metadata_count=self.saved_metadata_count,
+            asset_count=self.saved_asset_count,
+            crawl_failed=self.crawl_failed,
+        ).save()
+        self.delete_processing_assets(
+            [
+                self.processing_assets_model(hash_key=self.hash_key, range_key=range_key)
+                for range_key in [
+                    get_crawl_shard_progress_range_key(shard),
+                    *(
+                        f"{get_crawl_frontier_range_key_prefix(shard)}{index}"
+                        for index in frontier_range
+                    ),
+                ]
+            ]
+        )
+
+    def merge_shards(self, hash_key: str, shards: List[int], metadata_url: str) -> bool:
+        """
+        Appends what each shard found to the coordinator's metadata files and assets, in shard
+        order, so that the result doesn't depend on which shard finished first. Once every shard is
+        merged, plans the checksum jobs and writes the version summary, so that later steps don't
+        have to count the rows. Returns whether it stopped at `MERGE_ROW_LIMIT` rows with more
+        left, in which case it has to be called again.
+        """
+        return self.merge(hash_key, shards, metadata_url, publish_while_crawling=False)
+
+    def merge_finished_shards(self, hash_key: str, shards: List[int], metadata_url: str) -> bool:
+        """
+        Merges the shards which have finished crawling since the last call, in shard order and up
+        to the first one still crawling, and publishes checksum jobs for each complete window of
+        `CHECKSUM_WINDOW_SIZE` merged assets. Once every shard is merged, publishes the remaining
+        assets and writes the version summary. Only reads the checksum progress and the next shard
+        summary if no shard has finished since the last call, so that it can be called repeatedly
+        while the shards are crawling. Returns whether it stopped at `MERGE_ROW_LIMIT` rows with
+        more left, in which case there's no need to wait before calling it again.
+        """
+        return self.merge(hash_key, shards, metadata_url, publish_while_crawling=True)
+
+    def merge(
+        self, hash_key: str, shards: List[int], metadata_url: str, publish_while_crawling: bool
+    ) -> bool:
+        """
+        Carries on from the checksum progress row, which is saved after each page of shard rows
+        and each window of checksum jobs, so that only a page or window is held in memory, and a
+        failed call can be retried. Once a failed shard is found, discards the crawl instead.
+        """
+        self.hash_key = hash_key
+        self.load_checksum_progress()
+
+        row_budget = self.merge_shard_pages(shards, metadata_url, MERGE_ROW_LIMIT)
+        if self.crawl_failed:
+            return self.discard_crawl(shards, metadata_url)
+
+        crawl_merged = self.merged_shard_count == len(shards)
+        if publish_while_crawling or crawl_merged:
+            row_budget = self.publish_checksum_jobs(metadata_url, crawl_merged, row_budget)
+
+        if crawl_merged and self.published_asset_count == self.saved_asset_count:
+            self.save_version_summary(metadata_url, self.published_job_count)
+            return False
+        return row_budget <= 0
+
+    def load_checksum_progress(self) -> None:
+        checksum_progress = self.processing_assets_model.get(
+            self.hash_key, range_key=CHECKSUM_PROGRESS_RANGE_KEY, consistent_read=True
+        )
+        self.saved_metadata_count = int(checksum_progress.metadata_count)
+        self.saved_asset_count = int(checksum_progress.asset_count)
+        self.saved_asset_size = int(checksum_progress.total_asset_size)
+        self.published_asset_count = int(checksum_progress.published_asset_count)
+        self.published_job_count = int(checksum_progress.checksum_job_count)
+        self.merged_shard_count = int(checksum_progress.merged_shard_count)
+        self.merged_shard_row_count = int(checksum_progress.merged_shard_row_count)
+        self.crawl_failed = bool(checksum_progress.crawl_failed)
+
+    def save_checksum_progress(self, metadata_url: str) -> None:
+        self.processing_assets_model(
+            hash_key=self.hash_key,
+            range_key=CHECKSUM_PROGRESS_RANGE_KEY,
+            url=metadata_url,
+            metadata_count=self.saved_metadata_count,
+            asset_count=self.saved_asset_count,
+            total_asset_size=self.saved_asset_size,
+            published_asset_count=self.published_asset_count,
+            checksum_job_count=self.published_job_count,
+            merged_shard_count=self.merged_shard_count,
+            merged_shard_row_count=self.merged_shard_row_count,
+            crawl_failed=self.crawl_failed,
+        ).save()
+
+    def merge_shard_pages(self, shards: List[int], metadata_url: str, row_budget: int) -> int:
+        """
+        Merges pages of shard rows until `row_budget` rows have been merged, the next shard is
+        still crawling or has failed, and returns the budget left.
+        """
+        while row_budget > 0 and not self.crawl_failed and self.merged_shard_count < len(shards):
+            shard = shards[self.merged_shard_count]
+            shard_summary = self.get_crawl_shard_summary(shard)
+            if shard_summary is None:
+                break
+            if shard_summary.crawl_failed:
+                self.crawl_failed = True
+                self.save_checksum_progress(metadata_url)
+                break
+            row_budget -= self.merge_shard_page(shard, shard_summary, metadata_url)
+        return row_budget
+
+    def get_crawl_shard_summary(self, shard: int) -> Optional[ProcessingAssetsModelBase]:
+        """
+        Returns `None` while the shard is still crawling. Read consistently, so that every row the
+        shard wrote before its summary can be read too.
+        """
+        try:
+            return self.processing_assets_model.get(
+                self.hash_key,
+                range_key=get_crawl_shard_summary_range_key(shard),
+                consistent_read=True,
+            )
+        except self.processing_assets_model.DoesNotExist:
+            return None
+
+    def merge_shard_page(
+        self, shard: int, shard_summary: ProcessingAssetsModelBase, metadata_url: str
+    ) -> int:
+        """
+        Merges up to `MERGE_PAGE_SIZE` of the shard's rows, and deletes them once the progress is
+        saved. Returns the number of shard rows merged.
+        """
+        shard_metadata_count = int(shard_summary.metadata_count)
+        shard_row_count = shard_metadata_count + int(shard_summary.asset_count)
+        page_start = self.merged_shard_row_count
+        if page_start < shard_metadata_count:
+            page_end = min(page_start + MERGE_PAGE_SIZE, shard_metadata_count)
+            shard_rows = self.merge_shard_metadata(shard, range(page_start, page_end))
+        else:
+            page_end = min(page_start + MERGE_PAGE_SIZE, shard_row_count)
+            shard_rows = self.merge_shard_assets(
+                shard, range(page_start - shard_metadata_count, page_end - shard_metadata_count)
+            )
+        self.flush_processing_assets(minimum_row_count=1)
+
+        if page_end == shard_row_count:
+            shard_rows.append(shard_summary)
+            self.merged_shard_count += 1
+            self.merged_shard_row_count = 0
+        else:
+            self.merged_shard_row_count = page_end
+        self.save_checksum_progress(metadata_url)
+        self.delete_processing_assets(shard_rows)
+        return page_end - page_start
+
+    def discard_crawl(self, shards: List[int], metadata_url: str) -> bool:
+        """
+        Publishes no more checksum jobs once the crawl has failed. Deletes the rows of each shard
+        once it has finished, in shard order, and then the merged metadata files and the assets
+        which haven't been published, so that none of them is checked. Checksum jobs published
+        before the failure may already be running, so their assets are kept. Once everything is
+        deleted, writes the version summary with the checksum jobs published so far. Returns
+        whether it stopped at `MERGE_ROW_LIMIT` rows with more left.
+        """
+        row_budget = self.discard_shard_pages(shards, metadata_url, MERGE_ROW_LIMIT)
+        if self.merged_shard_count < len(shards):
+            return row_budget <= 0
+
+        self.discard_merged_pages(metadata_url, row_budget)
+        if self.saved_metadata_count > 0 or self.saved_asset_count > self.published_asset_count:
+            return True
+
+        self.save_version_summary(metadata_url, self.published_job_count)
+        return False
+
+    def discard_shard_pages(self, shards: List[int], metadata_url: str, row_budget: int) -> int:
+        """
+        Deletes pages of shard rows until `row_budget` rows have been deleted or the next shard is
+        still crawling, and returns the budget left.
+        """
+        while row_budget > 0 and self.merged_shard_count < len(shards):
+            shard = shards[self.merged_shard_count]
+            shard_summary = self.get_crawl_shard_summary(shard)
+            if shard_summary is None:
+                break
+            row_budget -= self.discard_shard_page(shard, shard_summary, metadata_url)
+        return row_budget
+
+    def discard_shard_page(
+        self, shard: int, shard_summary: ProcessingAssetsModelBase, metadata_url: str
+    ) -> int:
+        """
+        Deletes up to `MERGE_PAGE_SIZE` of the shard's rows, and the shard summary with the last
+        page, before saving the progress. Returns the number of shard rows deleted.
+        """
+        shard_metadata_count = int(shard_summary.metadata_count)
+        shard_row_count = shard_metadata_count + int(shard_summary.asset_count)
+        page_start = self.merged_shard_row_count
+        page_end = min(page_start + MERGE_PAGE_SIZE, shard_row_count)
+        shard_rows = [
+            self.processing_assets_model(
+                hash_key=self.hash_key,
+                range_key=get_crawl_shard_row_range_key(shard, shard_metadata_count, index),
+            )
+            for index in range(page_start, page_end)
+        ]
+
+        if page_end == shard_row_count:
+            shard_rows.append(shard_summary)
+            self.merged_shard_count += 1
+            self.merged_shard_row_count = 0
+        else:
+            self.merged_shard_row_count = page_end
+        self.delete_processing_assets(shard_rows)
+        self.save_checksum_progress(metadata_url)
+        return page_end - page_start
+
+    def discard_merged_pages(self, metadata_url: str, row_budget: int) -> None:
+        """
+        Deletes pages of the unpublished assets and then of the metadata files, with their URL
+        lookups, from the last one backwards, until `row_budget` rows have been deleted.
+        """
+        while row_budget > 0 and self.saved_asset_count > self.published_asset_count:
+            page_start = max(self.saved_asset_count - MERGE_PAGE_SIZE, self.published_asset_count)
+            self.discard_merged_page(
+                ProcessingAssetType.DATA,
+                ASSET_URL_PREFIX,
+                range(page_start, self.saved_asset_count),
+            )
+            row_budget -= self.saved_asset_count - page_start
+            self.saved_asset_count = page_start
+            self.save_checksum_progress(metadata_url)
+
+        while row_budget > 0 and self.saved_metadata_count > 0:
+            page_start = max(self.saved_metadata_count - MERGE_PAGE_SIZE, 0)
+            self.discard_merged_page(
+                ProcessingAssetType.METADATA,
+                METADATA_URL_PREFIX,
+                range(page_start, self.saved_metadata_count),
+            )
+            row_budget -= self.saved_metadata_count - page_start
+            self.saved_metadata_count = page_start
+            self.save_checksum_progress(metadata_url)
+
+    def discard_merged_page(
+        self, processing_asset_type: ProcessingAssetType, lookup_prefix: str, indexes: range
+    ) -> None:
+        processing_assets = self.get_processing_assets(f"{processing_asset_type.value}#", indexes)
+        self.delete_processing_assets(
+            [
+                *processing_assets,
+                *(
+                    self.processing_assets_model(
+                        hash_key=self.hash_key,
+                        range_key=get_url_lookup_range_key(lookup_prefix, processing_asset.url),
+                    )
+                    for processing_asset in processing_assets
+                ),
+            ]
+        )
+
+    def merge_shard_metadata(
+        self, shard: int, shard_indexes: range
+    ) -> List[ProcessingAssetsModelBase]:
+        shard_metadata = self.get_processing_assets(
+            f"{get_crawl_shard_range_key_prefix(shard)}{ProcessingAssetType.METADATA.value}#",
+            shard_indexes,
+        )
+        self.traversed_urls = set(
+            self.get_merged_url_lookups(
+                METADATA_URL_PREFIX,
+                [processing_asset.url for processing_asset in shard_metadata],
+                self.saved_metadata_count,
+            )
+        )
+        for processing_asset in shard_metadata:
+            if processing_asset.url not in self.traversed_urls:
+                self.traversed_urls.add(processing_asset.url)
+                self.dataset_metadata.append({"url": processing_asset.url})
+        return shard_metadata
+
+    def merge_shard_assets(
+        self, shard: int, shard_indexes: range
+    ) -> List[ProcessingAssetsModelBase]:
+        shard_assets = self.get_processing_assets(
+            f"{get_crawl_shard_range_key_prefix(shard)}{ProcessingAssetType.DATA.value}#",
+            shard_indexes,
+        )
+        self.load_merged_assets([processing_asset.url for processing_asset in shard_assets])
+        for processing_asset in shard_assets:
+            if processing_asset.conflicting:
+                # The shard has already reported the conflict
+                self.discard_asset(processing_asset.url)
+            else:
+                self.add_asset(
+                    processing_asset.url,
+                    get_asset_object(processing_asset),
+                    processing_asset.metadata_url,
+                )
+        return shard_assets
+
+    def load_merged_assets(self, asset_urls: List[str]) -> None:
+        """
+        Loads the merged assets with the given URLs, so that the assets about to be merged are
+        deduplicated against them without loading every merged asset.
+        """
+        self.dataset_asset_multihashes = {}
+        self.conflicting_asset_urls = set()
+        self.saved_asset_indexes = {}
+        for asset_url, lookup in self.get_merged_url_lookups(
+            ASSET_URL_PREFIX, asset_urls, self.saved_asset_count
+        ).items():
+            self.saved_asset_indexes[asset_url] = int(lookup.item_index)
+            if lookup.conflicting:
+                self.conflicting_asset_urls.add(asset_url)
+            else:
+                self.dataset_asset_multihashes[asset_url] = lookup.multihash
+
+    def get_merged_url_lookups(
+        self, lookup_prefix: str, urls: List[str], merged_count: int
+    ) -> Dict[str, ProcessingAssetsModelBase]:
+        """
+        Returns the URL lookup rows of the merged metadata files or assets among `urls`, ignoring
+        any left beyond `merged_count` by a call which failed before saving its progress.
+        """
+        lookups = self.processing_assets_model.batch_get(
+            [(self.hash_key, get_url_lookup_range_key(lookup_prefix, url)) for url in set(urls)],
+            consistent_read=True,
+        )
+        return {lookup.url: lookup for lookup in lookups if int(lookup.item_index) < merged_count}
+
+    def publish_checksum_jobs(self, metadata_url: str, final: bool, row_budget: int) -> int:
+        """
+        Saves the checksum jobs of each complete window of unpublished assets, and if `final` of
+        the assets left over, numbering the jobs on from those already published. Stops once
+        `row_budget` asset rows have been read, and returns the budget left.
+        """
+        while row_budget > 0 and (
+            self.saved_asset_count - self.published_asset_count >= CHECKSUM_WINDOW_SIZE
+            or (final and self.saved_asset_count > self.published_asset_count)
+        ):
+            window_end = min(
+                self.published_asset_count + CHECKSUM_WINDOW_SIZE, self.saved_asset_count
+            )
+            self.published_job_count += self.save_checksum_jobs(
+                metadata_url,
+                range(self.published_asset_count, window_end),
+                self.published_job_count,
+            )
+            row_budget -= window_end - self.published_asset_count
+            self.published_asset_count = window_end
+            self.save_checksum_progress(metadata_url)
+        return row_budget
+
+    def save_version_summary(self, metadata_url: str, checksum_job_count: int) -> None:
+        self.processing_assets_model(
+            hash_key=self.hash_key,
+            range_key=VERSION_SUMMARY_RANGE_KEY,
+            url=metadata_url,
+            asset_count=self.saved_asset_count,
+            metadata_count=self.saved_metadata_count,
+            total_asset_size=self.saved_asset_size,
+            checksum_job_count=checksum_job_count,
+        ).save()
+
+    def save_checksum_jobs(
+        self, metadata_url: str, asset_indexes: range, first_job_index: int
+    ) -> int:
+        """
+        Packs the saved assets at `asset_indexes` into checksum jobs of similar size, and writes the
+        asset indexes of each job so that the array job can look them up by its index. Assets with
+        conflicting multihashes are left out. Returns the number of jobs.
+        """
+        checked_assets = [
+            processing_asset
+            for processing_asset in self.get_processing_assets(
+                f"{ProcessingAssetType.DATA.value}#", asset_indexes
+            )
+            if not processing_asset.conflicting
+        ]
+        asset_sizes = [
+            get_planned_asset_size(processing_asset) for processing_asset in checked_assets
+        ]
+        jobs = pack_checksum_jobs(asset_sizes)
+        self.save_processing_assets(
+            [
+                self.processing_assets_model(
+                    hash_key=self.hash_key,
+                    range_key=f"{CHECKSUM_JOB_PREFIX}#{first_job_index + job_index}",
+                    url=metadata_url,
+                    size=sum(asset_sizes[item_index] for item_index in item_indexes),
+                    item_indexes=[
+                        get_item_index(checked_assets[item_index]) for item_index in item_indexes
+                    ],
+                )
+                for job_index, item_indexes in enumerate(jobs)
+            ]
+        )
+        return len(jobs)
+
+    def get_processing_assets(
+        self, range_key_prefix: str, indexes: range
+    ) -> List[ProcessingAssetsModelBase]:
+        """
+        Returns the rows at `indexes` in index order. Read consistently, so that none written
+        before the shard summary or checksum progress which counted them is missed.
+        """
+        processing_assets = self.processing_assets_model.batch_get(
+            [(self.hash_key, f"{range_key_prefix}{index}") for index in indexes],
+            consistent_read=True,
+        )
+        return sorted(processing_assets, key=get_item_index)
+
+    def query_processing_assets(self, range_key_prefix: str) -> List[ProcessingAssetsModelBase]:
+        """
+        Returns the rows in index order, rather than the lexicographic order of their range keys.
+        """
+        processing_assets = self.processing_assets_model.query(
+            self.hash_key,
+            range_key_condition=self.processing_assets_model.sk.startswith(range_key_prefix),
+            consistent_read=True,
+        )
+        return sorted(
+            processing_assets,
+            key=lambda processing_asset: int(processing_asset.sk[len(range_key_prefix) :]),
+        )
+
+    def flush_processing_assets(self, minimum_row_count: int) -> None:
+        """
+        Writes the discovered metadata files or assets once at least `minimum_row_count` of them are
+        waiting, so that memory use doesn't grow with the size of the catalog. Each type is numbered
+        contiguously from zero in the order it was discovered. Nothing is written when validating
+        outside of `run`.
+        """
+        if self.hash_key is None:
             return
 
-        for index, metadata_file in enumerate(self.dataset_metadata):
+        if (
+            self.metadata_fingerprints is not None
+            and len(self.metadata_fingerprints.passed) >= minimum_row_count
+        ):
+            self.metadata_fingerprints.flush()
+
+        processing_assets: List[ProcessingAssetsModelBase] = []
+        if len(self.dataset_metadata) >= minimum_row_count:
+            processing_assets.extend(self.pop_metadata_rows())
+        if len(self.dataset_assets) >= minimum_row_count:
+            processing_assets.extend(self.pop_asset_rows())
+        self.save_processing_assets(processing_assets)
+
+    def pop_metadata_rows(self) -> List[ProcessingAssetsModelBase]:
+        processing_assets = [
             self.processing_assets_model(
-                hash_key=hash_key,
-                range_key=f"{ProcessingAssetType.METADATA.value}#{index}",
+                hash_key=self.hash_key,
+                range_key=f"{self.range_key_prefix}{ProcessingAssetType.METADATA.value}#{index}",
                 url=metadata_file["url"],
-            ).save()
+            )
+            for index, metadata_file in enumerate(self.dataset_metadata, self.saved_metadata_count)
+        ]
+        processing_assets.extend(
+            self.get_url_lookups(
+                METADATA_URL_PREFIX, self.dataset_metadata, self.saved_metadata_count
+            )
+        )
+        self.saved_metadata_count += len(self.dataset_metadata)
+        self.dataset_metadata = []
+        return processing_assets
 
-        for index, asset in enumerate(self.dataset_assets):
+    def pop_asset_rows(self) -> List[ProcessingAssetsModelBase]:
+        processing_assets = [
             self.processing_assets_model(
-                hash_key=hash_key,
-                range_key=f"{ProcessingAssetType.DATA.value}#{index}",
+                hash_key=self.hash_key,
+                range_key=f"{self.range_key_prefix}{ProcessingAssetType.DATA.value}#{index}",
                 url=asset["url"],
                 multihash=asset["multihash"],
-            ).save()
+                size=asset.get("size"),
+                media_type=asset.get("media_type"),
+                metadata_url=asset.get("metadata_url"),
+            )
+            for index, asset in enumerate(self.dataset_assets, self.saved_asset_count)
+        ]
+        processing_assets.extend(
+            self.get_url_lookups(ASSET_URL_PREFIX, self.dataset_assets, self.saved_asset_count)
+        )
+        for index, asset in enumerate(self.dataset_assets, self.saved_asset_count):
+            self.saved_asset_indexes[asset["url"]] = index
+        self.saved_asset_count += len(self.dataset_assets)
+        self.saved_asset_size += sum(asset.get("size", 0) for asset in self.dataset_assets)
+        self.dataset_assets = []
+        return processing_assets
+
+    def get_url_lookups(
+        self, lookup_prefix: str, items: List[Dict[str, Any]], first_index: int
+    ) -> List[ProcessingAssetsModelBase]:
+        """
+        Merged metadata files and assets can be looked up by URL, so that merging a crawl shard
+        doesn't have to load all of them. Crawl shards are only deduplicated once merged, so their
+        rows don't need lookups.
+        """
+        if self.range_key_prefix:
+            return []
+
+        return [
+            self.processing_assets_model(
+                hash_key=self.hash_key,
+                range_key=get_url_lookup_range_key(lookup_prefix, item["url"]),
+                url=item["url"],
+                multihash=item.get("multihash"),
+                item_index=index,
+            )
+            for index, item in enumerate(items, first_index)
+        ]
+
+    def save_processing_assets(self, processing_assets: List[ProcessingAssetsModelBase]) -> None:
+        """
+        Writes the rows in BatchWriteItem calls of up to `BATCH_WRITE_ITEM_LIMIT` rows, with up to
+        `write_concurrency` calls in flight. PynamoDB resends unprocessed items with backoff.
+        """
+        batches = [
+            processing_assets[start : start + BATCH_WRITE_ITEM_LIMIT]
+            for start in range(0, len(processing_assets), BATCH_WRITE_ITEM_LIMIT)
+        ]
+        with ThreadPoolExecutor(max_workers=self.write_concurrency) as executor:
+            for _ in executor.map(self.save_processing_assets_batch, batches):
+                pass
+
+    def save_processing_assets_batch(self, batch: List[ProcessingAssetsModelBase]) -> None:
+        with self.processing_assets_model.batch_write() as batch_writer:
+            for processing_asset in batch:
+                batch_writer.save(processing_asset)
+
+    def delete_crawled_rows(self) -> None:
+        """
+        Deletes what the failed crawl has written so far, so that none of it is checked.
+        """
+        range_keys = [
+            f"{self.range_key_prefix}{processing_asset_type.value}#{index}"
+            for processing_asset_type, row_count in [
+                (ProcessingAssetType.METADATA, self.saved_metadata_count),
+                (ProcessingAssetType.DATA, self.saved_asset_count),
+            ]
+            for index in range(row_count)
+        ]
+        if not self.range_key_prefix:
+            range_keys.extend(
+                get_url_lookup_range_key(lookup_prefix, url)
+                for lookup_prefix, urls in [
+                    (METADATA_URL_PREFIX, self.traversed_urls),
+                    (ASSET_URL_PREFIX, {*self.saved_asset_indexes, *self.conflicting_asset_urls}),
+                ]
+                for url in urls
+            )
+        self.delete_processing_assets(
+            [
+                self.processing_assets_model(hash_key=self.hash_key, range_key=range_key)
+                for range_key in range_keys
+            ]
+        )
+        self.saved_metadata_count = 0
+        self.saved_asset_count = 0
+        self.saved_asset_size = 0
+        self.dataset_metadata = []
+        self.dataset_assets = []
 
-    def validate(self, url: str) -> None:  # pylint: disable=too-complex
-        self.traversed_urls.append(url)
-        object_json = self.get_object(url)
+    def delete_processing_assets(self, processing_assets: List[ProcessingAssetsModelBase]) -> None:
+        with self.processing_assets_model.batch_write() as batch_writer:
+            for processing_asset in processing_assets:
+                batch_writer.delete(processing_asset)
 
-        stac_type = object_json["type"]
-        validator = STAC_TYPE_VALIDATION_MAP[stac_type]()
+    def validate(self, url: str) -> List[FrontierEntry]:
+        return self.validate_urls([(url, 0)])
+
+    def validate_urls(self, frontier_entries: List[FrontierEntry]) -> List[FrontierEntry]:
+        """
+        Crawls the catalog breadth first, keeping up to `concurrency` metadata files downloading
+        while the ones already downloaded are validated in the order they were found. Stops once
+        `frontier_limit` metadata files are waiting, or once `time_budget` seconds have passed
+        after validating at least one, and returns what's left of the frontier.
+        """
+        frontier: Deque[FrontierEntry] = deque(
+            (normalize_s3_url(url), link_index) for url, link_index in frontier_entries
+        )
+        self.traversed_urls.update(url for url, _ in frontier)
+        downloads: Deque[
+            Tuple[FrontierEntry, "Future[Tuple[Union[bytes, str], Optional[str]]]"]
+        ] = deque()
+        deadline = None
+
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            try:
+                while (frontier or downloads) and not self.should_yield(
+                    frontier, downloads, deadline
+                ):
+                    while frontier and len(downloads) < self.concurrency:
+                        next_entry = frontier.popleft()
+                        downloads.append(
+                            (next_entry, executor.submit(self.read_url, next_entry[0]))
+                        )
+
+                    (downloaded_url, first_link_index), download = downloads.popleft()
+                    frontier.extend(
+                        self.validate_object(downloaded_url, download, first_link_index)
+                    )
+                    deadline = deadline or self.get_crawl_deadline()
+            finally:
+                for _, download in downloads:
+                    download.cancel()
+
+        return [download_entry for download_entry, _ in downloads] + list(frontier)
+
+    def get_crawl_deadline(self) -> Optional[float]:
+        if self.time_budget is None:
+            return None
+        return monotonic() + self.time_budget
+
+    def should_yield(
+        self,
+        frontier: Deque[FrontierEntry],
+        downloads: Deque[Tuple[FrontierEntry, "Future[Tuple[Union[bytes, str], Optional[str]]]"]],
+        deadline: Optional[float],
+    ) -> bool:
+        if deadline is not None and monotonic() >= deadline:
+            return True
+        return self.frontier_limit is not None and (
+            len(frontier) + len(downloads) >= self.frontier_limit
+        )
+
+    def validate_object(
+        self,
+        url: str,
+        download: "Future[Tuple[Union[bytes, str], Optional[str]]]",
+        first_link_index: int,
+    ) -> List[FrontierEntry]:
+        """
+        Returns the frontier entries of the linked URLs which haven't been seen yet, from the link
+        at `first_link_index`. Files with the same fingerprint as when they last passed schema
+        validation are still parsed for links and assets, but aren't validated again. Files whose
+        earlier links have already been followed have already been validated.
+        """
+        contents, previous_fingerprint = self.get_contents(url, download)
+        object_json = self.get_object(url, contents)
+        if first_link_index == 0:
+            self.validate_contents(url, contents, previous_fingerprint, object_json)
+
+        return self.get_next_frontier_entries(url, object_json["links"], first_link_index)
+
+    def validate_contents(
+        self,
+        url: str,
+        contents: Union[bytes, str],
+        previous_fingerprint: Optional[str],
+        object_json: JsonObject,
+    ) -> None:
+        if self.metadata_fingerprints is None:
+            self.validate_schema(url, object_json)
+        else:
+            fingerprint = get_metadata_fingerprint(contents)
+            if fingerprint != previous_fingerprint:
+                self.validate_schema(url, object_json)
+                self.metadata_fingerprints.put(url, fingerprint)
+
+        self.validation_result_factory.save(url, Check.JSON_SCHEMA, ValidationResult.PASSED)
+        self.dataset_metadata.append({"url": url})
+
+        for asset in object_json.get("assets", {}).values():
+            asset_url = maybe_convert_relative_url_to_absolute(asset["href"], url)
+
+            self.add_asset(asset_url, asset, url)
+
+        self.flush_processing_assets(self.flush_size)
+
+    def get_next_frontier_entries(
+        self, url: str, links: List[JsonObject], first_link_index: int
+    ) -> List[FrontierEntry]:
+        """
+        Once `frontier_limit` linked URLs haven't been seen yet, leaves the rest of the links to an
+        entry for this file, so that a file with very many links can't grow the frontier far
+        beyond the limit.
+        """
+        next_entries: List[FrontierEntry] = []
+        for link_index in range(first_link_index, len(links)):
+            if self.frontier_limit is not None and len(next_entries) >= self.frontier_limit:
+                next_entries.append((url, link_index))
+                break
+
+            next_url = maybe_convert_relative_url_to_absolute(links[link_index]["href"], url)
+            if next_url not in self.traversed_urls:
+                self.traversed_urls.add(next_url)
+                next_entries.append((next_url, 0))
+
+        return next_entries
+
+    def validate_schema(self, url: str, object_json: JsonObject) -> None:
+        validator = get_stac_validator(
+            object_json["type"], get_bundled_stac_extensions(object_json)
+        )
 
         try:
             validator.validate(object_json)
@@ -113,25 +1068,119 @@ class STACDatasetValidator:
                 details={"message": str(error)},
             )
             raise
-        self.validation_result_factory.save(url, Check.JSON_SCHEMA, ValidationResult.PASSED)
-        self.dataset_metadata.append({"url": url})
 
-        for asset in object_json.get("assets", {}).values():
-            asset_url = maybe_convert_relative_url_to_absolute(asset["href"], url)
+    def add_asset(self, asset_url: str, asset: JsonObject, metadata_url: str) -> None:
+        """
+        Collects each asset URL once, so that every asset is only downloaded once. References to the
+        same asset with different multihashes can't all be valid, so none of them are checked.
+        """
+        if asset_url in self.conflicting_asset_urls:
+            return
+
+        multihash = asset["file:checksum"]
 
-            asset_dict = {"url": asset_url, "multihash": asset["file:checksum"]}
+        if asset_url not in self.dataset_asset_multihashes:
+            asset_dict = self.get_asset_dict(asset_url, asset, metadata_url)
             LOGGER.debug(dumps({"asset": asset_dict}))
+            self.dataset_asset_multihashes[asset_url] = multihash
             self.dataset_assets.append(asset_dict)
+            return
+
+        existing_multihash = self.dataset_asset_multihashes[asset_url]
+        if multihash == existing_multihash:
+            return
 
-        for link_object in object_json["links"]:
-            next_url = maybe_convert_relative_url_to_absolute(link_object["href"], url)
+        error_message = (
+            f"Found conflicting multihashes “{existing_multihash}” and “{multihash}”"
+            f" for asset “{asset_url}” in “{metadata_url}”"
+        )
+        self.validation_result_factory.save(
+            asset_url,
+            Check.CONFLICTING_ASSET_CHECKSUM,
+            ValidationResult.FAILED,
+            details={"message": error_message},
+        )
+        LOGGER.error(dumps({"success": False, "message": error_message}))
+        self.discard_asset(asset_url)
 
-            if next_url not in self.traversed_urls:
-                self.validate(next_url)
+    def discard_asset(self, asset_url: str) -> None:
+        """
+        Leaves a conflicting asset out of the checksum jobs. If its row has already been written,
+        it is marked as conflicting right away, so that merging and planning skip it too.
+        """
+        if asset_url in self.conflicting_asset_urls:
+            return
+
+        self.conflicting_asset_urls.add(asset_url)
+        self.dataset_asset_multihashes.pop(asset_url, None)
+        if asset_url not in self.saved_asset_indexes:
+            self.dataset_assets = [
+                asset_dict for asset_dict in self.dataset_assets if asset_dict["url"] != asset_url
+            ]
+            return
 
-    def get_object(self, url: str) -> JsonObject:
+        asset_index = self.saved_asset_indexes.pop(asset_url)
+        conflicting_rows = [
+            self.processing_assets_model(
+                hash_key=self.hash_key,
+                range_key=f"{self.range_key_prefix}{ProcessingAssetType.DATA.value}#{asset_index}",
+                url=asset_url,
+            ),
+            *self.get_url_lookups(ASSET_URL_PREFIX, [{"url": asset_url}], asset_index),
+        ]
+        for conflicting_row in conflicting_rows:
+            conflicting_row.conflicting = True
+        self.save_processing_assets(conflicting_rows)
+
+    def get_asset_dict(
+        self, asset_url: str, asset: JsonObject, metadata_url: str
+    ) -> Dict[str, Any]:
+        asset_dict: Dict[str, Any] = {"url": asset_url, "multihash": asset["file:checksum"]}
+        if "file:size" in asset:
+            if is_file_size(asset["file:size"]):
+                asset_dict["size"] = asset["file:size"]
+            else:
+                self.report_invalid_file_size(asset_url, asset["file:size"], metadata_url)
+        if "type" in asset:
+            asset_dict["media_type"] = asset["type"]
+        if self.range_key_prefix:
+            # Needed to report conflicts found when merging shards
+            asset_dict["metadata_url"] = metadata_url
+        return asset_dict
+
+    def report_invalid_file_size(self, asset_url: str, size: Any, metadata_url: str) -> None:
+        """
+        Nothing else checks `file:size` when the metadata doesn't declare the file extension, so an
+        invalid size is reported here and the asset is checked as if it had no size.
+        """
+        error_message = (
+            f"Invalid file size {dumps(size)} for asset “{asset_url}” in “{metadata_url}”:"
+            " expected a non-negative integer"
+        )
+        self.validation_result_factory.save(
+            asset_url,
+            Check.FILE_SIZE,
+            ValidationResult.FAILED,
+            details={"message": error_message},
+        )
+        LOGGER.error(dumps({"success": False, "message": error_message}))
+
+    def read_url(self, url: str) -> Tuple[Union[bytes, str], Optional[str]]:
+        """
+        Returns the contents and, when fingerprints are in use, the fingerprint the file had when
+        it last passed schema validation. Looking it up here overlaps it with the other downloads.
+        """
+        contents: Union[bytes, str] = self.url_reader(url).read()
+        if self.metadata_fingerprints is None:
+            return contents, None
+
+        return contents, self.metadata_fingerprints.get(url)
+
+    def get_contents(
+        self, url: str, download: "Future[Tuple[Union[bytes, str], Optional[str]]]"
+    ) -> Tuple[Union[bytes, str], Optional[str]]:
         try:
-            url_stream = self.url_reader(url)
+            return download.result()
         except ClientError as error:
             self.validation_result_factory.save(
                 url,
@@ -140,9 +1189,11 @@ class STACDatasetValidator:
                 details={"message": str(error)},
             )
             raise
+
+    def get_object(self, url: str, contents: Union[bytes, str]) -> JsonObject:
         try:
-            json_object: JsonObject = load(
-                url_stream, object_pairs_hook=self.duplicate_object_names_report_builder(url)
+            json_object: JsonObject = loads(
+                contents, object_pairs_hook=self.duplicate_object_names_report_builder(url)
             )
         except JSONDecodeError as error:
             self.validation_result_factory.save(
@@ -155,6 +1206,12 @@ class STACDatasetValidator:
         self, url: str
     ) -> Callable[[List[Tuple[str, Any]]], JsonObject]:
         def report_duplicate_object_names(object_pairs: List[Tuple[str, Any]]) -> JsonObject:
+            # Building the dictionary in one go is much faster than pair by pair, and only loses
+            # pairs when a name is repeated
+            result = dict(object_pairs)
+            if len(result) == len(object_pairs):
+                return result
+
             result = {}
             for key, value in object_pairs:
                 if key in result:
@@ -174,3 +1231,59 @@ class STACDatasetValidator:
 @lru_cache
 def get_url_before_filename(url: str) -> str:
     return url.rsplit("/", maxsplit=1)[0]
+
+
+def get_crawl_frontier_range_key_prefix(shard: int) -> str:
+    return f"{CRAWL_FRONTIER_PREFIX}#{shard}#"
+
+
+def get_crawl_shard_range_key_prefix(shard: int) -> str:
+    return f"{CRAWL_SHARD_PREFIX}#{shard}#"
+
+
+def get_crawl_shard_summary_range_key(shard: int) -> str:
+    return f"{get_crawl_shard_range_key_prefix(shard)}{CRAWL_SHARD_SUMMARY_SUFFIX}"
+
+
+def get_crawl_shard_progress_range_key(shard: int) -> str:
+    return f"{get_crawl_shard_range_key_prefix(shard)}{CRAWL_SHARD_PROGRESS_SUFFIX}"
+
+
+def get_crawl_shard_row_range_key(shard: int, shard_metadata_count: int, index: int) -> str:
+    """Range key of the shard row at `index`, counting the shard's metadata files first"""
+    if index < shard_metadata_count:
+        return (
+            f"{get_crawl_shard_range_key_prefix(shard)}{ProcessingAssetType.METADATA.value}#{index}"
+        )
+    return (
+        f"{get_crawl_shard_range_key_prefix(shard)}{ProcessingAssetType.DATA.value}"
+        f"#{index - shard_metadata_count}"
+    )
+
+
+def get_url_lookup_range_key(lookup_prefix: str, url: str) -> str:
+    return f"{lookup_prefix}#{sha256(url.encode()).hexdigest()}"
+
+
+def is_file_size(value: Any) -> bool:
+    # `bool` is a subclass of `int`
+    return isinstance(value, int) and not isinstance(value, bool) and value >= 0
+
+
+def get_planned_asset_size(processing_asset: ProcessingAssetsModelBase) -> int:
+    if processing_asset.size is None:
+        return UNDECLARED_ASSET_SIZE
+    return int(processing_asset.size)
+
+
+def get_item_index(processing_asset: ProcessingAssetsModelBase) -> int:
+    return int(processing_asset.sk.rpartition("#")[2])
+
+
+def get_asset_object(processing_asset: ProcessingAssetsModelBase) -> JsonObject:
+    asset: JsonObject = {"file:checksum": processing_asset.multihash}
+    if processing_asset.size is not None:
+        asset["file:size"] = processing_asset.size
+    if processing_asset.media_type is not None:
+        asset["type"] = processing_asset.media_type
+    return asset
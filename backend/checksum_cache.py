@@ -0,0 +1,63 @@
+from datetime import timedelta
+from typing import Dict, Optional
+
+from .checksum_cache_model import checksum_cache_model_with_meta
+from .clock import now
+
+DEFAULT_TIME_TO_LIVE = timedelta(days=30)
+
+
+def get_checksum_cache_key(  # pylint: disable=too-many-arguments
+    bucket: str,
+    key: str,
+    version_id: Optional[str],
+    etag: str,
+    size: int,
+    checksum_function_code: int,
+) -> str:
+    """
+    Buckets with versioning suspended report the same "null" version ID for every overwrite, so
+    the version ID alone doesn't identify the object contents.
+    """
+    return (
+        f"OBJECT#s3://{bucket}/{key}#VERSION#{version_id}#ETAG#{etag}#SIZE#{size}"
+        f"#MULTIHASH#{checksum_function_code:x}"
+    )
+
+
+class ChecksumCache:
+    """
+    Digests of previously hashed S3 objects, so unchanged assets in a new dataset version don't
+    have to be downloaded again.
+    """
+
+    def __init__(self, table_name: str, time_to_live: timedelta = DEFAULT_TIME_TO_LIVE):
+        self.time_to_live = time_to_live
+        self.checksum_cache_model = checksum_cache_model_with_meta(table_name)
+
+    def get(self, cache_key: str) -> Optional[str]:
+        try:
+            entry = self.checksum_cache_model.get(cache_key)
+        except self.checksum_cache_model.DoesNotExist:
+            return None
+
+        # DynamoDB can take a while to delete expired items
+        if entry.expires_at <= now():
+            return None
+
+        return entry.hex_digest
+
+    def put(self, cache_key: str, hex_digest: str) -> None:
+        self.checksum_cache_model(
+            pk=cache_key, hex_digest=hex_digest, expires_at=now() + self.time_to_live
+        ).save()
+
+    def put_all(self, hex_digests: Dict[str, str]) -> None:
+        expires_at = now() + self.time_to_live
+        with self.checksum_cache_model.batch_write() as batch_writer:
+            for cache_key, hex_digest in hex_digests.items():
+                batch_writer.save(
+                    self.checksum_cache_model(
+                        pk=cache_key, hex_digest=hex_digest, expires_at=expires_at
+                    )
+                )
@@ -0,0 +1,54 @@
+"""Checksum cache DynamoDB models."""
+
+from os import environ
+from typing import Optional, Type
+
+from pynamodb.attributes import TTLAttribute, UnicodeAttribute
+from pynamodb.models import Model
+
+from .parameter_store import ParameterName, get_param
+
+
+class ChecksumCacheModelBase(Model):
+    pk = UnicodeAttribute(hash_key=True)
+    hex_digest = UnicodeAttribute()
+    expires_at = TTLAttribute()
+
+
+def checksum_cache_model_with_meta(
+    checksum_cache_table_name: Optional[str] = None,
+) -> Type[ChecksumCacheModelBase]:
+    if checksum_cache_table_name is None:
+        checksum_cache_table_name = get_param(ParameterName.PROCESSING_CHECKSUM_CACHE_TABLE_NAME)
+
+    class ChecksumCacheModel(ChecksumCacheModelBase):
+        class Meta:  # pylint:disable=too-few-public-methods
+            table_name = checksum_cache_table_name
+            region = environ["AWS_DEFAULT_REGION"]
+
+    return ChecksumCacheModel
+
+
+class MetadataFingerprintModelBase(Model):
+    """
+    Metadata file fingerprints share the checksum cache table and its time to live, but not its
+    attributes.
+    """
+
+    pk = UnicodeAttribute(hash_key=True)
+    fingerprint = UnicodeAttribute()
+    expires_at = TTLAttribute()
+
+
+def metadata_fingerprint_model_with_meta(
+    checksum_cache_table_name: Optional[str] = None,
+) -> Type[MetadataFingerprintModelBase]:
+    if checksum_cache_table_name is None:
+        checksum_cache_table_name = get_param(ParameterName.PROCESSING_CHECKSUM_CACHE_TABLE_NAME)
+
+    class MetadataFingerprintModel(MetadataFingerprintModelBase):
+        class Meta:  # pylint:disable=too-few-public-methods
+            table_name = checksum_cache_table_name
+            region = environ["AWS_DEFAULT_REGION"]
+
+    return MetadataFingerprintModel
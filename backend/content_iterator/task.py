@@ -1,12 +1,41 @@
+from copy import deepcopy
+from os import environ
+from typing import List, Tuple, Type
+
 from jsonschema import validate  # type: ignore[import]
 
 from ..parameter_store import ParameterName, get_param
-from ..processing_assets_model import ProcessingAssetType, processing_assets_model_with_meta
-from ..step_function_event_keys import DATASET_ID_KEY, METADATA_URL_KEY, VERSION_ID_KEY
+from ..processing_assets_model import (
+    CHECKSUM_PROGRESS_RANGE_KEY,
+    VERSION_SUMMARY_RANGE_KEY,
+    ProcessingAssetsModelBase,
+    processing_assets_model_with_meta,
+)
+from ..step_function_event_keys import (
+    CRAWL_KEY,
+    CRAWL_SHARDS_KEY,
+    DATASET_ID_KEY,
+    METADATA_URL_KEY,
+    VERSION_ID_KEY,
+)
 from ..types import JsonObject
 
 MAX_ITERATION_SIZE = 10_000
 
+# When "true", every iteration is returned at once, split into partitions which the state machine
+# runs concurrently as child executions
+CONCURRENT_ITERATIONS_VARIABLE_NAME = "CONCURRENT_ITERATIONS"
+# Each partition adds a fixed number of events to the parent execution history, so capping them
+# keeps it well below the history limit however many assets there are
+MAX_PARTITION_COUNT = 100
+# When "true", each iteration covers the checksum jobs published since the previous one, while the
+# crawl is still running
+PIPELINED_ITERATIONS_VARIABLE_NAME = "PIPELINED_ITERATIONS"
+# Each pipelined iteration counts as a step, as does each of its partitions. Both add fewer than 20
+# events to the execution history, so an execution which stops once it has taken this many steps
+# stays below the history limit, even when its last iteration has `MAX_PARTITION_COUNT` partitions
+MAX_PIPELINED_EXECUTION_STEPS = 1000
+
 EVENT_SCHEMA = {
     "type": "object",
     "properties": {
@@ -24,10 +53,20 @@ EVENT_SCHEMA = {
                     "minimum": MAX_ITERATION_SIZE,
                     "multipleOf": MAX_ITERATION_SIZE,
                 },
+                "job_count": {"type": "string", "pattern": r"^\d+$"},
+                "assets_table_name": {"type": "string"},
+                "results_table_name": {"type": "string"},
+                "checksum_cache_table_name": {"type": "string"},
             },
             "required": ["first_item", "iteration_size", "next_item"],
             "additionalProperties": False,
         },
+        CRAWL_KEY: {
+            "type": "object",
+            "properties": {
+                CRAWL_SHARDS_KEY: {"type": "array", "items": {"type": "integer", "minimum": 0}}
+            },
+        },
         DATASET_ID_KEY: {"type": "string"},
         METADATA_URL_KEY: {"type": "string"},
         VERSION_ID_KEY: {"type": "string"},
@@ -35,41 +74,177 @@ EVENT_SCHEMA = {
     "required": [DATASET_ID_KEY, METADATA_URL_KEY, VERSION_ID_KEY],
     "additionalProperties": False,
 }
+# Pipelined iterations start wherever the previous one ended, and are empty while waiting for the
+# crawl to publish more jobs. Each execution starts from where the previous one stopped, with only
+# the next item.
+PIPELINED_EVENT_SCHEMA = deepcopy(EVENT_SCHEMA)
+PIPELINED_EVENT_SCHEMA["properties"]["content"]["properties"].update(  # type: ignore[index]
+    {
+        "iteration_size": {"type": "integer", "minimum": 0},
+        "next_item": {"type": "integer", "minimum": 0},
+        "partitions": {"type": "array"},
+        "steps": {"type": "integer", "minimum": 0},
+    }
+)
+PIPELINED_EVENT_SCHEMA["properties"]["content"]["required"] = ["next_item"]  # type: ignore[index]
 
 
 def lambda_handler(event: JsonObject, _context: bytes) -> JsonObject:
-    validate(event, EVENT_SCHEMA)
+    pipelined = environ.get(PIPELINED_ITERATIONS_VARIABLE_NAME) == "true"
+    validate(event, PIPELINED_EVENT_SCHEMA if pipelined else EVENT_SCHEMA)
+
+    hash_key = f"DATASET#{event[DATASET_ID_KEY]}#VERSION#{event[VERSION_ID_KEY]}"
+    if pipelined:
+        previous_iteration = event.get("content", {})
+        iteration = get_pipelined_iteration(
+            processing_assets_model_with_meta(),
+            hash_key,
+            previous_iteration.get("next_item", 0),
+            previous_iteration.get("steps", 0),
+        )
+    else:
+        iteration = get_iteration(event, hash_key)
+
+    return {
+        **iteration,
+        "assets_table_name": get_param(ParameterName.PROCESSING_ASSETS_TABLE_NAME),
+        "results_table_name": get_param(ParameterName.STORAGE_VALIDATION_RESULTS_TABLE_NAME),
+        "checksum_cache_table_name": get_param(ParameterName.PROCESSING_CHECKSUM_CACHE_TABLE_NAME),
+    }
+
 
+def get_iteration(event: JsonObject, hash_key: str) -> JsonObject:
     if "content" in event.keys():
         assert int(event["content"]["first_item"]) % MAX_ITERATION_SIZE == 0
         first_item_index = event["content"]["next_item"]
     else:
         first_item_index = 0
 
-    dataset_id = event[DATASET_ID_KEY]
-    version_id = event[VERSION_ID_KEY]
-
-    processing_assets_model = processing_assets_model_with_meta()
+    if "job_count" in event.get("content", {}):
+        job_count = int(event["content"]["job_count"])
+    else:
+        job_count = get_checksum_job_count(processing_assets_model_with_meta(), hash_key)
 
-    asset_count = processing_assets_model.count(
-        hash_key=f"DATASET#{dataset_id}#VERSION#{version_id}",
-        range_key_condition=processing_assets_model.sk.startswith(
-            f"{ProcessingAssetType.DATA.value}#"
-        ),
-    )
+    if environ.get(CONCURRENT_ITERATIONS_VARIABLE_NAME) == "true":
+        return {"partitions": get_partitions(job_count), "job_count": str(job_count)}
 
-    remaining_assets = asset_count - first_item_index
-    if remaining_assets > MAX_ITERATION_SIZE:
+    remaining_jobs = job_count - first_item_index
+    if remaining_jobs > MAX_ITERATION_SIZE:
         next_item_index = first_item_index + MAX_ITERATION_SIZE
         iteration_size = MAX_ITERATION_SIZE
     else:
         next_item_index = -1
-        iteration_size = remaining_assets
+        iteration_size = remaining_jobs
 
     return {
         "first_item": str(first_item_index),
         "iteration_size": iteration_size,
         "next_item": next_item_index,
-        "assets_table_name": get_param(ParameterName.PROCESSING_ASSETS_TABLE_NAME),
-        "results_table_name": get_param(ParameterName.STORAGE_VALIDATION_RESULTS_TABLE_NAME),
+        "job_count": str(job_count),
     }
+
+
+def get_partitions(job_count: int, first_item_index: int = 0) -> List[JsonObject]:
+    """
+    Splits the iterations from `first_item_index` into up to `MAX_PARTITION_COUNT` contiguous
+    partitions, with the same number of iterations give or take one.
+    """
+    iterations = get_iterations(job_count, first_item_index)
+    partition_count = min(len(iterations), MAX_PARTITION_COUNT)
+
+    partitions: List[JsonObject] = []
+    for partition_index in range(partition_count):
+        partition_iterations = iterations[
+            len(iterations)
+            * partition_index
+            // partition_count : len(iterations)
+            * (partition_index + 1)
+            // partition_count
+        ]
+        last_iteration = partition_iterations[-1]
+        partitions.append(
+            {
+                "first_item": partition_iterations[0]["first_item"],
+                "end_item": str(
+                    int(last_iteration["first_item"]) + last_iteration["iteration_size"]
+                ),
+                "iterations": partition_iterations,
+            }
+        )
+    return partitions
+
+
+def get_iterations(job_count: int, first_item_index: int = 0) -> List[JsonObject]:
+    """The same windows of up to `MAX_ITERATION_SIZE` jobs as the sequential iterations"""
+    return [
+        {
+            "first_item": str(iteration_first_item_index),
+            "iteration_size": min(job_count - iteration_first_item_index, MAX_ITERATION_SIZE),
+        }
+        for iteration_first_item_index in range(first_item_index, job_count, MAX_ITERATION_SIZE)
+    ]
+
+
+def get_pipelined_iteration(
+    processing_assets_model: Type[ProcessingAssetsModelBase],
+    hash_key: str,
+    first_item_index: int,
+    previous_steps: int,
+) -> JsonObject:
+    """
+    Covers the jobs published so far, starting at `first_item_index`, split into partitions like
+    the concurrent iterations. The next item is -1 once the crawl has finished and this iteration
+    covers the last job.
+    """
+    published_job_count, crawl_finished = get_published_checksum_job_count(
+        processing_assets_model, hash_key
+    )
+    partitions = get_partitions(published_job_count, first_item_index)
+    next_item_index = published_job_count
+    if crawl_finished:
+        next_item_index = -1
+
+    return {
+        "first_item": str(first_item_index),
+        "iteration_size": published_job_count - first_item_index,
+        "next_item": next_item_index,
+        "partitions": partitions,
+        "job_count": str(published_job_count),
+        "steps": previous_steps + 1 + len(partitions),
+    }
+
+
+def get_published_checksum_job_count(
+    processing_assets_model: Type[ProcessingAssetsModelBase], hash_key: str
+) -> Tuple[int, bool]:
+    """
+    Returns how many checksum jobs have been published, and whether the crawl has finished, in
+    which case the version summary has the final count. Read consistently, so that an iteration
+    never starts from an older count than the previous one.
+    """
+    for range_key, crawl_finished in [
+        (VERSION_SUMMARY_RANGE_KEY, True),
+        (CHECKSUM_PROGRESS_RANGE_KEY, False),
+    ]:
+        try:
+            checksum_progress = processing_assets_model.get(
+                hash_key, range_key=range_key, consistent_read=True
+            )
+        except processing_assets_model.DoesNotExist:
+            continue
+        return int(checksum_progress.checksum_job_count), crawl_finished
+
+    return 0, False
+
+
+def get_checksum_job_count(
+    processing_assets_model: Type[ProcessingAssetsModelBase], hash_key: str
+) -> int:
+    """
+    Reads the count from the version summary, which the merge writes once it has planned every
+    checksum job. A missing summary fails the iteration rather than checking the wrong assets.
+    """
+    version_summary = processing_assets_model.get(
+        hash_key, range_key=VERSION_SUMMARY_RANGE_KEY, consistent_read=True
+    )
+    return int(version_summary.checksum_job_count)
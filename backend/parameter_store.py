@@ -22,6 +22,7 @@ class ParameterName(Enum):
         return f"/{ENV}/{name.lower()}"
 
     PROCESSING_ASSETS_TABLE_NAME = auto()
+    PROCESSING_CHECKSUM_CACHE_TABLE_NAME = auto()
     PROCESSING_DATASET_VERSION_CREATION_STEP_FUNCTION_ARN = auto()
     PROCESSING_IMPORT_ASSET_FILE_FUNCTION_TASK_ARN = auto()
     PROCESSING_IMPORT_DATASET_ROLE_ARN = auto()
@@ -1,9 +1,10 @@
 """Dataset object DynamoDB model."""
+
 from enum import Enum
 from os import environ
 from typing import Optional, Type
 
-from pynamodb.attributes import UnicodeAttribute
+from pynamodb.attributes import BooleanAttribute, ListAttribute, NumberAttribute, UnicodeAttribute
 from pynamodb.models import Model
 
 from .parameter_store import ParameterName, get_param
@@ -14,11 +15,44 @@ class ProcessingAssetType(Enum):
     METADATA = "METADATA_ITEM_INDEX"
 
 
+# Range key of the row with the totals of a dataset version, written once the crawl has finished
+VERSION_SUMMARY_RANGE_KEY = "VERSION_SUMMARY"
+# Range key prefix of the rows listing the assets each checksum job validates, numbered from zero
+CHECKSUM_JOB_PREFIX = "CHECKSUM_JOB"
+# Range key of the row with how many metadata files and assets have been merged and how many of them
+# have been published as checksum jobs, and how far the merge of the crawl shards has got
+CHECKSUM_PROGRESS_RANGE_KEY = "CHECKSUM_PROGRESS"
+
+
 class ProcessingAssetsModelBase(Model):
     pk = UnicodeAttribute(hash_key=True)
     sk = UnicodeAttribute(range_key=True)
     url = UnicodeAttribute()
     multihash = UnicodeAttribute(null=True)
+    size = NumberAttribute(null=True)
+    media_type = UnicodeAttribute(null=True)
+    metadata_url = UnicodeAttribute(null=True)
+    asset_count = NumberAttribute(null=True)
+    metadata_count = NumberAttribute(null=True)
+    total_asset_size = NumberAttribute(null=True)
+    checksum_job_count = NumberAttribute(null=True)
+    item_indexes = ListAttribute(of=NumberAttribute, null=True)
+    merged_shard_count = NumberAttribute(null=True)
+    merged_shard_row_count = NumberAttribute(null=True)
+    published_asset_count = NumberAttribute(null=True)
+    # Index of the metadata file or asset a URL lookup row refers to
+    item_index = NumberAttribute(null=True)
+    # Set on asset rows written before a conflicting multihash for the same URL was found
+    conflicting = BooleanAttribute(null=True)
+    # Set on the summary of a crawl shard which failed, and on the checksum progress once the crawl
+    # or the merge has found a failure
+    crawl_failed = BooleanAttribute(null=True)
+    # Set on crawl frontier rows of metadata files with more links than fitted in the frontier, to
+    # the index of the first link still to be followed
+    link_index = NumberAttribute(null=True)
+    # Range of the frontier rows a crawl shard has yet to crawl, on its progress row
+    frontier_start = NumberAttribute(null=True)
+    frontier_end = NumberAttribute(null=True)
 
 
 def processing_assets_model_with_meta(
@@ -31,5 +65,7 @@ def processing_assets_model_with_meta(
         class Meta:  # pylint:disable=too-few-public-methods
             table_name = assets_table_name
             region = environ["AWS_DEFAULT_REGION"]
+            # Allow more resends of items left unprocessed by throttled batch writes
+            max_retry_attempts = 8
 
     return ProcessingAssetsModel
@@ -1,3 +1,11 @@
+CRAWL_KEY = "crawl"
+CRAWL_PASSES_KEY = "passes"
+CRAWL_SHARD_KEY = "shard"
+CRAWL_SHARDS_KEY = "shards"
 DATASET_ID_KEY = "dataset_id"
+MERGE_KEY = "merge"
 METADATA_URL_KEY = "metadata_url"
+MORE_TO_CRAWL_KEY = "more_to_crawl"
+MORE_TO_MERGE_KEY = "more_to_merge"
+PIPELINED_KEY = "pipelined"
 VERSION_ID_KEY = "version_id"
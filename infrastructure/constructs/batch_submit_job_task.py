@@ -20,6 +20,8 @@ class BatchSubmitJobTask(Construct):
         payload_object: Mapping[str, str],
         container_overrides_command: List[str],
         array_size: Optional[int] = None,
+        extra_memory_limit_mib: int = 0,
+        vcpus: int = 1,
     ):
         super().__init__(scope, construct_id)
 
@@ -38,6 +40,8 @@ class BatchSubmitJobTask(Construct):
             deploy_env=deploy_env,
             directory=directory,
             job_role=self.job_role,
+            extra_memory_limit_mib=extra_memory_limit_mib,
+            vcpus=vcpus,
         )
 
         container_overrides = aws_stepfunctions_tasks.BatchContainerOverrides(
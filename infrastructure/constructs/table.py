@@ -9,7 +9,7 @@ from ..removal_policy import REMOVAL_POLICY
 
 
 class Table(aws_dynamodb.Table):
-    def __init__(
+    def __init__(  # pylint: disable=too-many-arguments
         self,
         scope: Construct,
         construct_id: str,
@@ -17,6 +17,7 @@ class Table(aws_dynamodb.Table):
         deploy_env: str,
         parameter_name: ParameterName,
         sort_key: Optional[aws_dynamodb.Attribute] = None,
+        time_to_live_attribute: Optional[str] = None,
     ):
 
         super().__init__(
@@ -27,6 +28,7 @@ class Table(aws_dynamodb.Table):
             point_in_time_recovery=True,
             removal_policy=REMOVAL_POLICY,
             billing_mode=aws_dynamodb.BillingMode.PAY_PER_REQUEST,
+            time_to_live_attribute=time_to_live_attribute,
         )
 
         self.name_parameter = aws_ssm.StringParameter(
@@ -15,11 +15,13 @@ class TaskJobDefinition(aws_batch.JobDefinition):
         deploy_env: str,
         directory: str,
         job_role: aws_iam.Role,
+        extra_memory_limit_mib: int = 0,
+        vcpus: int = 1,
     ):
         if deploy_env == "prod":
             batch_job_definition_memory_limit = 3900
         else:
-            batch_job_definition_memory_limit = 500
+            batch_job_definition_memory_limit = 500 + extra_memory_limit_mib
 
         image = aws_ecs.ContainerImage.from_asset(
             directory=".",
@@ -31,7 +33,7 @@ class TaskJobDefinition(aws_batch.JobDefinition):
             image=image,
             job_role=job_role,  # type: ignore[arg-type]
             memory_limit_mib=batch_job_definition_memory_limit,
-            vcpus=1,
+            vcpus=vcpus,
             environment={
                 "AWS_DEFAULT_REGION": job_role.stack.region,
                 "DEPLOY_ENV": deploy_env,
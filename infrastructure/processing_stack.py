@@ -1,10 +1,41 @@
 """
 Data Lake processing stack.
 """
-from aws_cdk import aws_dynamodb, aws_iam, aws_lambda_python, aws_s3, aws_ssm, aws_stepfunctions
-from aws_cdk.core import Construct, NestedStack, Tags
 
+from typing import Dict
+
+from aws_cdk import (
+    aws_dynamodb,
+    aws_iam,
+    aws_lambda,
+    aws_lambda_python,
+    aws_s3,
+    aws_ssm,
+    aws_stepfunctions,
+    aws_stepfunctions_tasks,
+)
+from aws_cdk.core import Construct, Duration, NestedStack, Tags
+
+from backend.check_files_checksums.part_buffers import MAX_PART_BUFFER_BYTES
+from backend.content_iterator.task import (
+    CONCURRENT_ITERATIONS_VARIABLE_NAME,
+    MAX_PIPELINED_EXECUTION_STEPS,
+    PIPELINED_ITERATIONS_VARIABLE_NAME,
+)
 from backend.parameter_store import ParameterName
+from backend.step_function_event_keys import (
+    CRAWL_KEY,
+    CRAWL_PASSES_KEY,
+    CRAWL_SHARDS_KEY,
+    CRAWL_SHARD_KEY,
+    DATASET_ID_KEY,
+    MERGE_KEY,
+    METADATA_URL_KEY,
+    MORE_TO_CRAWL_KEY,
+    MORE_TO_MERGE_KEY,
+    PIPELINED_KEY,
+    VERSION_ID_KEY,
+)
 
 from .common import grant_parameter_read_access
 from .constructs.batch_job_queue import BatchJobQueue
@@ -13,6 +44,16 @@ from .constructs.import_file_function import ImportFileFunction
 from .constructs.lambda_task import LambdaTask
 from .constructs.table import Table
 
+CHECK_STAC_METADATA_MAX_SHARD_CONCURRENCY = 20
+# Each crawl shard child execution stops after this many passes, of about 7 history events each, and
+# the next one carries on from the shard's frontier
+CHECK_STAC_METADATA_SHARD_PASSES_PER_EXECUTION = 1_000
+# Part hashing releases the GIL, so checksum workers can keep more than one CPU busy. Fits the
+# smallest instance type in every environment.
+CHECK_FILES_CHECKSUMS_VCPUS = 2
+# How long pipelined validation waits before looking for newly published checksum jobs again
+CHECKSUM_JOB_POLL_INTERVAL_SECONDS = 30
+
 
 class ProcessingStack(NestedStack):
     """Data Lake processing stack definition."""
@@ -27,8 +68,18 @@ class ProcessingStack(NestedStack):
         deploy_env: str,
         storage_bucket: aws_s3.Bucket,
         validation_results_table: Table,
+        checksum_iteration_concurrency: int = 1,
+        pipelined_validation: bool = False,
     ) -> None:
-        # pylint: disable=too-many-locals
+        """
+        The checksum iterations are split into partitions, each checked by a child execution. Up to
+        `checksum_iteration_concurrency` of them run at the same time, so by default each partition
+        starts once the previous one has finished.
+
+        With `pipelined_validation`, checksum iterations start while the crawl shards are still
+        running, on the checksum jobs published so far.
+        """
+        # pylint: disable=too-many-locals,too-many-statements
         super().__init__(scope, stack_id)
 
         ############################################################################################
@@ -41,6 +92,16 @@ class ProcessingStack(NestedStack):
             sort_key=aws_dynamodb.Attribute(name="sk", type=aws_dynamodb.AttributeType.STRING),
         )
 
+        ############################################################################################
+        # CHECKSUM CACHE TABLE
+        checksum_cache_table = Table(
+            self,
+            f"{deploy_env}-checksum-cache",
+            deploy_env=deploy_env,
+            parameter_name=ParameterName.PROCESSING_CHECKSUM_CACHE_TABLE_NAME,
+            time_to_live_attribute="expires_at",
+        )
+
         ############################################################################################
         # BATCH JOB DEPENDENCIES
         batch_job_queue = BatchJobQueue(
@@ -62,6 +123,7 @@ class ProcessingStack(NestedStack):
             "check-stac-metadata-task",
             directory="check_stac_metadata",
             botocore_lambda_layer=botocore_lambda_layer,
+            result_path=f"$.{CRAWL_KEY}",
             extra_environment={"DEPLOY_ENV": deploy_env},
         )
         assert check_stac_metadata_task.lambda_function.role
@@ -69,20 +131,50 @@ class ProcessingStack(NestedStack):
             policy=s3_read_only_access_policy
         )
 
-        for table in [processing_assets_table, validation_results_table]:
+        for table in [processing_assets_table, validation_results_table, checksum_cache_table]:
             table.grant_read_write_data(check_stac_metadata_task.lambda_function)
             table.grant(
                 check_stac_metadata_task.lambda_function,
                 "dynamodb:DescribeTable",
             )
 
+        check_stac_metadata_event_object = {
+            f"{DATASET_ID_KEY}.$": f"$.{DATASET_ID_KEY}",
+            f"{VERSION_ID_KEY}.$": f"$.{VERSION_ID_KEY}",
+            f"{METADATA_URL_KEY}.$": f"$.{METADATA_URL_KEY}",
+        }
+        check_stac_metadata_shards_map = get_check_stac_metadata_shards_map(
+            self,
+            check_stac_metadata_task.lambda_function,
+            check_stac_metadata_event_object,
+            deploy_env,
+        )
+        check_stac_metadata_merge_shards_lambda_invoke = aws_stepfunctions_tasks.LambdaInvoke(
+            self,
+            "check-stac-metadata-merge-shards-lambda-invoke",
+            lambda_function=check_stac_metadata_task.lambda_function,
+            payload=aws_stepfunctions.TaskInput.from_object(
+                {
+                    **check_stac_metadata_event_object,
+                    f"{CRAWL_SHARDS_KEY}.$": f"$.{CRAWL_KEY}.{CRAWL_SHARDS_KEY}",
+                    PIPELINED_KEY: pipelined_validation,
+                }
+            ),
+            result_path=f"$.{CRAWL_KEY}.{MERGE_KEY}",
+            payload_response_only=True,
+        )
+
         content_iterator_task = LambdaTask(
             self,
             "content-iterator-task",
             directory="content_iterator",
             botocore_lambda_layer=botocore_lambda_layer,
             result_path="$.content",
-            extra_environment={"DEPLOY_ENV": deploy_env},
+            extra_environment={
+                "DEPLOY_ENV": deploy_env,
+                CONCURRENT_ITERATIONS_VARIABLE_NAME: str(not pipelined_validation).lower(),
+                PIPELINED_ITERATIONS_VARIABLE_NAME: str(pipelined_validation).lower(),
+            },
         )
 
         check_files_checksums_directory = "check_files_checksums"
@@ -90,10 +182,13 @@ class ProcessingStack(NestedStack):
             "dataset_id.$": "$.dataset_id",
             "version_id.$": "$.version_id",
             "metadata_url.$": "$.metadata_url",
-            "first_item.$": "$.content.first_item",
+            "first_job.$": "$.content.first_item",
             "assets_table_name.$": "$.content.assets_table_name",
             "results_table_name.$": "$.content.results_table_name",
+            "checksum_cache_table_name.$": "$.content.checksum_cache_table_name",
         }
+        # Room for the part buffers of large objects
+        check_files_checksums_extra_memory_limit_mib = MAX_PART_BUFFER_BYTES // (1024 * 1024)
         check_files_checksums_single_task = BatchSubmitJobTask(
             self,
             "check-files-checksums-single-task",
@@ -101,18 +196,22 @@ class ProcessingStack(NestedStack):
             directory=check_files_checksums_directory,
             s3_policy=s3_read_only_access_policy,
             job_queue=batch_job_queue,
+            extra_memory_limit_mib=check_files_checksums_extra_memory_limit_mib,
+            vcpus=CHECK_FILES_CHECKSUMS_VCPUS,
             payload_object=check_files_checksums_default_payload_object,
             container_overrides_command=[
                 "--dataset-id",
                 "Ref::dataset_id",
                 "--version-id",
                 "Ref::version_id",
-                "--first-item",
-                "Ref::first_item",
+                "--first-job",
+                "Ref::first_job",
                 "--assets-table-name",
                 "Ref::assets_table_name",
                 "--results-table-name",
                 "Ref::results_table_name",
+                "--checksum-cache-table-name",
+                "Ref::checksum_cache_table_name",
             ],
         )
         array_size = int(aws_stepfunctions.JsonPath.number_at("$.content.iteration_size"))
@@ -123,18 +222,22 @@ class ProcessingStack(NestedStack):
             directory=check_files_checksums_directory,
             s3_policy=s3_read_only_access_policy,
             job_queue=batch_job_queue,
+            extra_memory_limit_mib=check_files_checksums_extra_memory_limit_mib,
+            vcpus=CHECK_FILES_CHECKSUMS_VCPUS,
             payload_object=check_files_checksums_default_payload_object,
             container_overrides_command=[
                 "--dataset-id",
                 "Ref::dataset_id",
                 "--version-id",
                 "Ref::version_id",
-                "--first-item",
-                "Ref::first_item",
+                "--first-job",
+                "Ref::first_job",
                 "--assets-table-name",
                 "Ref::assets_table_name",
                 "--results-table-name",
                 "Ref::results_table_name",
+                "--checksum-cache-table-name",
+                "Ref::checksum_cache_table_name",
             ],
             array_size=array_size,
         )
@@ -157,6 +260,8 @@ class ProcessingStack(NestedStack):
             validation_results_table.grant(
                 writer, "dynamodb:DescribeTable"  # type: ignore[arg-type]
             )
+            checksum_cache_table.grant_read_write_data(writer)  # type: ignore[arg-type]
+            checksum_cache_table.grant(writer, "dynamodb:DescribeTable")  # type: ignore[arg-type]
 
         validation_summary_task = LambdaTask(
             self,
@@ -270,6 +375,10 @@ class ProcessingStack(NestedStack):
                     content_iterator_task.lambda_function,
                     import_dataset_task.lambda_function,
                 ],
+                checksum_cache_table.name_parameter: [
+                    check_stac_metadata_task.lambda_function.role,
+                    content_iterator_task.lambda_function,
+                ],
                 validation_results_table.name_parameter: [
                     check_stac_metadata_task.lambda_function.role,
                     validation_summary_task.lambda_function,
@@ -282,39 +391,35 @@ class ProcessingStack(NestedStack):
 
         ############################################################################################
         # STATE MACHINE
-        dataset_version_creation_definition = (
-            check_stac_metadata_task.lambda_invoke.next(content_iterator_task.lambda_invoke)
-            .next(
-                aws_stepfunctions.Choice(  # type: ignore[arg-type]
-                    self, "check_files_checksums_maybe_array"
-                )
-                .when(
-                    aws_stepfunctions.Condition.number_equals("$.content.iteration_size", 1),
-                    check_files_checksums_single_task.batch_submit_job,
-                )
-                .otherwise(check_files_checksums_array_task.batch_submit_job)
-                .afterwards()
+        check_files_checksums_definition = (
+            aws_stepfunctions.Choice(self, "check_files_checksums_maybe_array")
+            .when(
+                aws_stepfunctions.Condition.number_equals("$.content.iteration_size", 1),
+                check_files_checksums_single_task.batch_submit_job,
             )
-            .next(
-                aws_stepfunctions.Choice(self, "content_iteration_finished")
-                .when(
-                    aws_stepfunctions.Condition.number_equals("$.content.next_item", -1),
-                    validation_summary_task.lambda_invoke.next(
-                        aws_stepfunctions.Choice(  # type: ignore[arg-type]
-                            self, "validation_successful"
-                        )
-                        .when(
-                            aws_stepfunctions.Condition.boolean_equals(
-                                "$.validation.success", True
-                            ),
-                            import_dataset_task.lambda_invoke.next(
-                                success_task  # type: ignore[arg-type]
-                            ),
-                        )
-                        .otherwise(validation_failure_lambda_invoke)
-                    ),
-                )
-                .otherwise(content_iterator_task.lambda_invoke)
+            .otherwise(check_files_checksums_array_task.batch_submit_job)
+            .afterwards()
+        )
+        validation_summary_definition = validation_summary_task.lambda_invoke.next(
+            aws_stepfunctions.Choice(self, "validation_successful")  # type: ignore[arg-type]
+            .when(
+                aws_stepfunctions.Condition.boolean_equals("$.validation.success", True),
+                import_dataset_task.lambda_invoke.next(success_task),  # type: ignore[arg-type]
+            )
+            .otherwise(validation_failure_lambda_invoke)
+        )
+
+        dataset_version_creation_definition = check_stac_metadata_task.lambda_invoke.next(
+            get_crawl_and_checksums_definition(
+                self,
+                check_stac_metadata_shards_map,
+                check_stac_metadata_merge_shards_lambda_invoke,
+                content_iterator_task.lambda_invoke,
+                check_files_checksums_definition,
+                validation_summary_definition,
+                deploy_env,
+                checksum_iteration_concurrency,
+                pipelined_validation,
             )
         )
 
@@ -333,3 +438,374 @@ class ProcessingStack(NestedStack):
         )
 
         Tags.of(self).add("ApplicationLayer", "processing")  # type: ignore[arg-type]
+
+
+def get_check_stac_metadata_shards_map(
+    scope: Construct,
+    check_stac_metadata_lambda_function: aws_lambda.IFunction,
+    check_stac_metadata_event_object: Dict[str, str],
+    deploy_env: str,
+) -> aws_stepfunctions.Map:
+    """
+    Crawls each shard in child executions, one after another until the shard has nothing more to
+    crawl, so that neither the parent nor any child execution history grows with the size of the
+    crawl.
+    """
+    check_stac_metadata_shard_state_machine = aws_stepfunctions.StateMachine(
+        scope,
+        f"{deploy_env}-check-stac-metadata-shard",
+        definition=get_check_stac_metadata_shard_definition(
+            scope, check_stac_metadata_lambda_function
+        ),
+    )
+    check_stac_metadata_shard_execution = aws_stepfunctions_tasks.StepFunctionsStartExecution(
+        scope,
+        "check-stac-metadata-shard-execution",
+        state_machine=check_stac_metadata_shard_state_machine,
+        integration_pattern=aws_stepfunctions.IntegrationPattern.RUN_JOB,
+        input=aws_stepfunctions.TaskInput.from_object(
+            {
+                **check_stac_metadata_event_object,
+                f"{CRAWL_SHARD_KEY}.$": f"$.{CRAWL_SHARD_KEY}",
+            }
+        ),
+        result_path="$.crawl_shard",
+    )
+    check_stac_metadata_shard_execution.next(
+        aws_stepfunctions.Choice(scope, "check_stac_metadata_shard_executions_finished")
+        .when(
+            aws_stepfunctions.Condition.boolean_equals(
+                f"$.crawl_shard.Output.{MORE_TO_CRAWL_KEY}", True
+            ),
+            check_stac_metadata_shard_execution,
+        )
+        .otherwise(aws_stepfunctions.Succeed(scope, "check_stac_metadata_shard_crawled"))
+    )
+
+    return aws_stepfunctions.Map(
+        scope,
+        "check-stac-metadata-shards",
+        items_path=f"$.{CRAWL_KEY}.{CRAWL_SHARDS_KEY}",
+        max_concurrency=CHECK_STAC_METADATA_MAX_SHARD_CONCURRENCY,
+        parameters={
+            **check_stac_metadata_event_object,
+            f"{CRAWL_SHARD_KEY}.$": "$$.Map.Item.Value",
+        },
+        result_path=aws_stepfunctions.JsonPath.DISCARD,
+    ).iterator(check_stac_metadata_shard_execution)
+
+
+def get_check_stac_metadata_shard_definition(
+    scope: Construct, check_stac_metadata_lambda_function: aws_lambda.IFunction
+) -> aws_stepfunctions.Chain:
+    """
+    Crawls passes of the shard until it has nothing more to crawl or the execution has taken
+    `CHECK_STAC_METADATA_SHARD_PASSES_PER_EXECUTION` passes, and says whether there's more to crawl.
+    """
+    check_stac_metadata_shard_lambda_invoke = aws_stepfunctions_tasks.LambdaInvoke(
+        scope,
+        "check-stac-metadata-shard-lambda-invoke",
+        lambda_function=check_stac_metadata_lambda_function,
+        result_path=f"$.{CRAWL_KEY}",
+        payload_response_only=True,
+    )
+    execution_finished = aws_stepfunctions.Pass(
+        scope,
+        "check_stac_metadata_shard_execution_finished",
+        parameters={f"{MORE_TO_CRAWL_KEY}.$": f"$.{CRAWL_KEY}.{MORE_TO_CRAWL_KEY}"},
+    )
+    return check_stac_metadata_shard_lambda_invoke.next(
+        aws_stepfunctions.Choice(scope, "check_stac_metadata_shard_pass_finished")
+        .when(
+            aws_stepfunctions.Condition.boolean_equals(f"$.{CRAWL_KEY}.{MORE_TO_CRAWL_KEY}", False),
+            execution_finished,
+        )
+        .when(
+            aws_stepfunctions.Condition.number_greater_than_equals(
+                f"$.{CRAWL_KEY}.{CRAWL_PASSES_KEY}",
+                CHECK_STAC_METADATA_SHARD_PASSES_PER_EXECUTION,
+            ),
+            execution_finished,
+        )
+        .otherwise(check_stac_metadata_shard_lambda_invoke)
+    )
+
+
+def get_crawl_and_checksums_definition(  # pylint: disable=too-many-arguments
+    scope: Construct,
+    check_stac_metadata_shards_map: aws_stepfunctions.Map,
+    check_stac_metadata_merge_shards_lambda_invoke: aws_stepfunctions_tasks.LambdaInvoke,
+    content_iterator_lambda_invoke: aws_stepfunctions_tasks.LambdaInvoke,
+    check_files_checksums_definition: aws_stepfunctions.Chain,
+    validation_summary_definition: aws_stepfunctions.Chain,
+    deploy_env: str,
+    checksum_iteration_concurrency: int,
+    pipelined_validation: bool,
+) -> aws_stepfunctions.Chain:
+    """
+    Crawls the shards and merges them, calling the merge until it has caught up, and then checks
+    the checksums, or checks them while the shards are crawling with `pipelined_validation`.
+    """
+    if pipelined_validation:
+        return get_pipelined_validation_definition(
+            scope,
+            check_stac_metadata_shards_map,
+            check_stac_metadata_merge_shards_lambda_invoke,
+            content_iterator_lambda_invoke,
+            get_checksum_partitions_map(
+                scope,
+                check_files_checksums_definition,
+                deploy_env,
+                checksum_iteration_concurrency,
+                aws_stepfunctions.JsonPath.DISCARD,
+            ),
+            deploy_env,
+        ).next(validation_summary_definition)
+
+    return check_stac_metadata_shards_map.next(check_stac_metadata_merge_shards_lambda_invoke).next(
+        aws_stepfunctions.Choice(scope, "more_crawl_shard_rows_to_merge")
+        .when(more_to_merge_condition(), check_stac_metadata_merge_shards_lambda_invoke)
+        .otherwise(
+            content_iterator_lambda_invoke.next(
+                get_checksum_iterations_definition(
+                    scope,
+                    check_files_checksums_definition,
+                    validation_summary_definition,
+                    deploy_env,
+                    checksum_iteration_concurrency,
+                )
+            )
+        )
+    )
+
+
+def more_to_merge_condition() -> aws_stepfunctions.Condition:
+    """The merge stops after a fixed number of rows, and says whether it has to be called again"""
+    return aws_stepfunctions.Condition.boolean_equals(
+        f"$.{CRAWL_KEY}.{MERGE_KEY}.{MORE_TO_MERGE_KEY}", True
+    )
+
+
+def get_checksum_iterations_definition(
+    scope: Construct,
+    check_files_checksums_definition: aws_stepfunctions.Chain,
+    validation_summary_definition: aws_stepfunctions.Chain,
+    deploy_env: str,
+    checksum_iteration_concurrency: int,
+) -> aws_stepfunctions.Chain:
+    """
+    Runs the iterations as child executions, up to `checksum_iteration_concurrency` at a time.
+
+    Each child execution works through a contiguous partition of the iterations and reports only
+    the item range it covered, so the parent execution history grows with the number of
+    partitions rather than the number of assets.
+    """
+    return get_checksum_partitions_map(
+        scope,
+        check_files_checksums_definition,
+        deploy_env,
+        checksum_iteration_concurrency,
+        "$.checksum_partitions",
+    ).next(validation_summary_definition)
+
+
+def get_checksum_partitions_map(
+    scope: Construct,
+    check_files_checksums_definition: aws_stepfunctions.Chain,
+    deploy_env: str,
+    checksum_iteration_concurrency: int,
+    result_path: str,
+) -> aws_stepfunctions.Map:
+    """Checks each partition of `$.content.partitions` in a child execution"""
+    checksum_partition_state_machine = aws_stepfunctions.StateMachine(
+        scope,
+        f"{deploy_env}-check-files-checksums",
+        definition=get_checksum_partition_definition(scope, check_files_checksums_definition),
+    )
+
+    checksum_partitions_map = aws_stepfunctions.Map(
+        scope,
+        "check-files-checksums-partitions",
+        items_path="$.content.partitions",
+        max_concurrency=checksum_iteration_concurrency,
+        parameters={
+            f"{DATASET_ID_KEY}.$": f"$.{DATASET_ID_KEY}",
+            f"{VERSION_ID_KEY}.$": f"$.{VERSION_ID_KEY}",
+            f"{METADATA_URL_KEY}.$": f"$.{METADATA_URL_KEY}",
+            "first_item.$": "$$.Map.Item.Value.first_item",
+            "end_item.$": "$$.Map.Item.Value.end_item",
+            "iterations.$": "$$.Map.Item.Value.iterations",
+            "job_count.$": "$.content.job_count",
+            "assets_table_name.$": "$.content.assets_table_name",
+            "results_table_name.$": "$.content.results_table_name",
+            "checksum_cache_table_name.$": "$.content.checksum_cache_table_name",
+        },
+        result_path=result_path,
+    )
+    checksum_partition_execution = aws_stepfunctions_tasks.StepFunctionsStartExecution(
+        scope,
+        "check-files-checksums-partition-execution",
+        state_machine=checksum_partition_state_machine,
+        integration_pattern=aws_stepfunctions.IntegrationPattern.RUN_JOB,
+        output_path="$.Output",
+    )
+    return checksum_partitions_map.iterator(checksum_partition_execution)
+
+
+def get_pipelined_validation_definition(  # pylint: disable=too-many-arguments
+    scope: Construct,
+    check_stac_metadata_shards_map: aws_stepfunctions.Map,
+    check_stac_metadata_merge_shards_lambda_invoke: aws_stepfunctions_tasks.LambdaInvoke,
+    content_iterator_lambda_invoke: aws_stepfunctions_tasks.LambdaInvoke,
+    checksum_partitions_map: aws_stepfunctions.Map,
+    deploy_env: str,
+) -> aws_stepfunctions.Parallel:
+    """
+    Crawls the shards alongside child executions which merge the shards that have finished and
+    check the checksum jobs published since, until the crawl has finished and the last job has been
+    checked. Each child execution stops after `MAX_PIPELINED_EXECUTION_STEPS` steps, and the next
+    one carries on from the next item, so neither history grows with the length of the crawl. The
+    parallel state is the barrier before the validation summary.
+
+    Checksums are checked as soon as their jobs are published, so the assets of jobs published
+    before the crawl later fails or finds a conflicting checksum have already been checked. The
+    version is still rejected, but those checks aren't undone.
+    """
+    pipelined_checksums_state_machine = aws_stepfunctions.StateMachine(
+        scope,
+        f"{deploy_env}-check-files-checksums-pipelined",
+        definition=get_pipelined_checksums_definition(
+            scope,
+            check_stac_metadata_merge_shards_lambda_invoke,
+            content_iterator_lambda_invoke,
+            checksum_partitions_map,
+        ),
+    )
+    pipelined_checksums_execution = aws_stepfunctions_tasks.StepFunctionsStartExecution(
+        scope,
+        "check-files-checksums-pipelined-execution",
+        state_machine=pipelined_checksums_state_machine,
+        integration_pattern=aws_stepfunctions.IntegrationPattern.RUN_JOB,
+        result_path="$.pipelined_checksums",
+    )
+    pipelined_checksums_execution.next(
+        aws_stepfunctions.Pass(
+            scope,
+            "check-files-checksums-pipelined-progress",
+            parameters={
+                f"{DATASET_ID_KEY}.$": f"$.{DATASET_ID_KEY}",
+                f"{VERSION_ID_KEY}.$": f"$.{VERSION_ID_KEY}",
+                f"{METADATA_URL_KEY}.$": f"$.{METADATA_URL_KEY}",
+                f"{CRAWL_KEY}.$": f"$.{CRAWL_KEY}",
+                "content.$": "$.pipelined_checksums.Output",
+            },
+        ).next(
+            aws_stepfunctions.Choice(scope, "pipelined_checksum_executions_finished")
+            .when(
+                aws_stepfunctions.Condition.number_equals("$.content.next_item", -1),
+                aws_stepfunctions.Succeed(scope, "pipelined_checksum_iterations_finished"),
+            )
+            .otherwise(pipelined_checksums_execution)
+        )
+    )
+
+    return (
+        aws_stepfunctions.Parallel(
+            scope,
+            "check-stac-metadata-shards-and-files-checksums",
+            result_path=aws_stepfunctions.JsonPath.DISCARD,
+        )
+        .branch(check_stac_metadata_shards_map)
+        .branch(pipelined_checksums_execution)
+    )
+
+
+def get_pipelined_checksums_definition(
+    scope: Construct,
+    check_stac_metadata_merge_shards_lambda_invoke: aws_stepfunctions_tasks.LambdaInvoke,
+    content_iterator_lambda_invoke: aws_stepfunctions_tasks.LambdaInvoke,
+    checksum_partitions_map: aws_stepfunctions.Map,
+) -> aws_stepfunctions.Chain:
+    """
+    Loops over merging the shards that have finished, and checking the partitions of the checksum
+    jobs published since the previous iteration. Whenever there are none, it merges again straight
+    away if the merge stopped at its row limit, and waits otherwise. Stops once the last job has
+    been checked or the execution has taken its steps, with the next item to carry on from.
+    """
+    execution_finished = aws_stepfunctions.Pass(
+        scope,
+        "pipelined_checksum_execution_finished",
+        parameters={"next_item.$": "$.content.next_item"},
+    )
+    next_iteration = (
+        aws_stepfunctions.Choice(scope, "pipelined_content_iteration_finished")
+        .when(
+            aws_stepfunctions.Condition.number_equals("$.content.next_item", -1),
+            execution_finished,
+        )
+        .when(
+            aws_stepfunctions.Condition.number_greater_than_equals(
+                "$.content.steps", MAX_PIPELINED_EXECUTION_STEPS
+            ),
+            execution_finished,
+        )
+        .when(
+            aws_stepfunctions.Condition.or_(
+                aws_stepfunctions.Condition.number_greater_than("$.content.iteration_size", 0),
+                more_to_merge_condition(),
+            ),
+            check_stac_metadata_merge_shards_lambda_invoke,
+        )
+        .otherwise(
+            aws_stepfunctions.Wait(
+                scope,
+                "wait_for_published_checksum_jobs",
+                time=aws_stepfunctions.WaitTime.duration(
+                    Duration.seconds(CHECKSUM_JOB_POLL_INTERVAL_SECONDS)
+                ),
+            ).next(check_stac_metadata_merge_shards_lambda_invoke)
+        )
+    )
+    return check_stac_metadata_merge_shards_lambda_invoke.next(content_iterator_lambda_invoke).next(
+        aws_stepfunctions.Choice(scope, "checksum_jobs_published")
+        .when(
+            aws_stepfunctions.Condition.number_greater_than("$.content.iteration_size", 0),
+            checksum_partitions_map.next(next_iteration),
+        )
+        .otherwise(next_iteration)
+    )
+
+
+def get_checksum_partition_definition(
+    scope: Construct, check_files_checksums_definition: aws_stepfunctions.Chain
+) -> aws_stepfunctions.Chain:
+    """
+    Runs the iterations of a partition one after another and summarises the items they covered.
+    """
+    checksum_iterations_map = aws_stepfunctions.Map(
+        scope,
+        "check-files-checksums-iterations",
+        items_path="$.iterations",
+        max_concurrency=1,
+        parameters={
+            f"{DATASET_ID_KEY}.$": f"$.{DATASET_ID_KEY}",
+            f"{VERSION_ID_KEY}.$": f"$.{VERSION_ID_KEY}",
+            f"{METADATA_URL_KEY}.$": f"$.{METADATA_URL_KEY}",
+            "content": {
+                "first_item.$": "$$.Map.Item.Value.first_item",
+                "iteration_size.$": "$$.Map.Item.Value.iteration_size",
+                "job_count.$": "$.job_count",
+                "assets_table_name.$": "$.assets_table_name",
+                "results_table_name.$": "$.results_table_name",
+                "checksum_cache_table_name.$": "$.checksum_cache_table_name",
+            },
+        },
+        result_path=aws_stepfunctions.JsonPath.DISCARD,
+    )
+    return checksum_iterations_map.iterator(check_files_checksums_definition).next(
+        aws_stepfunctions.Pass(
+            scope,
+            "check-files-checksums-partition-summary",
+            parameters={"first_item.$": "$.first_item", "end_item.$": "$.end_item"},
+        )
+    )
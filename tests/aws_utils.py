@@ -1,11 +1,13 @@
 import string
 import time
 from contextlib import AbstractContextManager
+from datetime import datetime, timedelta
 from io import StringIO
 from json import dump
 from random import randrange
+from threading import Lock
 from types import TracebackType
-from typing import Any, BinaryIO, Dict, List, Optional, TextIO, Tuple, Type
+from typing import Any, BinaryIO, Dict, List, Optional, Set, TextIO, Tuple, Type
 from unittest.mock import Mock
 from uuid import uuid4
 
@@ -16,8 +18,11 @@ from mypy_boto3_s3 import S3Client
 from mypy_boto3_s3.type_defs import DeleteTypeDef, ObjectIdentifierTypeDef
 from mypy_boto3_s3control import S3ControlClient
 from mypy_boto3_s3control.type_defs import DescribeJobResultTypeDef
+from pynamodb.expressions.condition import Condition
 from pytest_subtests import SubTests  # type: ignore[import]
 
+from backend.checksum_cache import DEFAULT_TIME_TO_LIVE, ChecksumCache
+from backend.clock import now
 from backend.content_iterator.task import MAX_ITERATION_SIZE
 from backend.datasets_model import DatasetsModelBase, datasets_model_with_meta
 from backend.import_file_batch_job_id_keys import ASSET_JOB_ID_KEY, METADATA_JOB_ID_KEY
@@ -111,6 +116,11 @@ def any_s3_bucket_arn() -> str:
     return f"arn:aws:s3:::{any_s3_bucket_name()}"
 
 
+def any_s3_version_id() -> str:
+    """Arbitrary-length string"""
+    return random_string(32)
+
+
 def any_job_id() -> str:
     return uuid4().hex
 
@@ -266,6 +276,124 @@ class MockValidationResultFactory(Mock):
     pass
 
 
+class InMemoryChecksumCache(ChecksumCache):
+    """Local stand-in for the checksum cache table."""
+
+    def __init__(  # pylint: disable=super-init-not-called
+        self, time_to_live: timedelta = DEFAULT_TIME_TO_LIVE
+    ):
+        self.time_to_live = time_to_live
+        self.entries: Dict[str, Tuple[str, datetime]] = {}
+
+    def get(self, cache_key: str) -> Optional[str]:
+        if cache_key not in self.entries:
+            return None
+
+        hex_digest, expires_at = self.entries[cache_key]
+        if expires_at <= now():
+            return None
+
+        return hex_digest
+
+    def put(self, cache_key: str, hex_digest: str) -> None:
+        self.entries[cache_key] = (hex_digest, now() + self.time_to_live)
+
+    def put_all(self, hex_digests: Dict[str, str]) -> None:
+        for cache_key, hex_digest in hex_digests.items():
+            self.put(cache_key, hex_digest)
+
+
+class InMemoryTableConnection:  # pylint: disable=too-many-instance-attributes
+    """
+    Local stand-in for the DynamoDB table connection used by batch writes and reads, single item
+    writes and reads, and range key prefix queries. Items of tables without a range key are stored
+    with an empty range key. Batch writes leave every
+    `unprocessed_interval`th item unprocessed the first time it's sent, and take `latency` seconds
+    to respond. Counts the items each read returns in `read_count`.
+    """
+
+    def __init__(self, table_name: str, unprocessed_interval: int = 0, latency: float = 0):
+        self.table_name = table_name
+        self.unprocessed_interval = unprocessed_interval
+        self.latency = latency
+        self.items: Dict[Tuple[str, str], JsonObject] = {}
+        self.unprocessed_keys: Set[Tuple[str, str]] = set()
+        self.batch_sizes: List[int] = []
+        self.put_count = 0
+        self.read_count = 0
+        self.lock = Lock()
+
+    def batch_write_item(
+        self,
+        put_items: List[JsonObject],
+        delete_items: Optional[List[JsonObject]] = None,
+        **_kwargs: Any,
+    ) -> Dict[str, Dict[str, List[JsonObject]]]:
+        time.sleep(self.latency)
+        delete_items = delete_items or []
+        unprocessed_items: List[JsonObject] = []
+        with self.lock:
+            self.batch_sizes.append(len(put_items) + len(delete_items))
+            for key_item in delete_items:
+                self.items.pop((key_item["pk"], key_item["sk"]), None)
+            for item in put_items:
+                key = (item["pk"]["S"], item["sk"]["S"] if "sk" in item else "")
+                self.put_count += 1
+                if (
+                    self.unprocessed_interval
+                    and key not in self.unprocessed_keys
+                    and self.put_count % self.unprocessed_interval == 0
+                ):
+                    self.unprocessed_keys.add(key)
+                    unprocessed_items.append({"PutRequest": {"Item": item}})
+                else:
+                    self.items[key] = item
+
+        return {"UnprocessedItems": {self.table_name: unprocessed_items}}
+
+    def put_item(
+        self, hash_key: str, range_key: str, attributes: JsonObject, **_kwargs: Any
+    ) -> JsonObject:
+        with self.lock:
+            self.items[(hash_key, range_key)] = {
+                "pk": {"S": hash_key},
+                "sk": {"S": range_key},
+                **attributes,
+            }
+        return {}
+
+    def batch_get_item(self, keys: List[JsonObject], **_kwargs: Any) -> JsonObject:
+        with self.lock:
+            items = [
+                self.items[key["pk"], key["sk"]]
+                for key in keys
+                if (key["pk"], key["sk"]) in self.items
+            ]
+            self.read_count += len(items)
+        return {"Responses": {self.table_name: items}, "UnprocessedKeys": {}}
+
+    def get_item(
+        self, hash_key: str, range_key: Optional[str] = None, **_kwargs: Any
+    ) -> JsonObject:
+        with self.lock:
+            item = self.items.get((hash_key, range_key or ""))
+            self.read_count += item is not None
+        return {} if item is None else {"Item": item}
+
+    def query(
+        self, hash_key: str, range_key_condition: Condition, **_kwargs: Any
+    ) -> Dict[str, Any]:
+        range_key_prefix = range_key_condition.values[1].value["S"]
+        with self.lock:
+            items = [
+                item
+                for (item_hash_key, range_key), item in sorted(self.items.items())
+                if item_hash_key == hash_key and range_key.startswith(range_key_prefix)
+            ]
+            self.read_count += len(items)
+        return {"Items": items, "Count": len(items), "ScannedCount": len(items)}
+
+
 # Utility functions
 
 
@@ -62,6 +62,10 @@ def any_file_contents() -> bytes:
     return urandom(20)
 
 
+def any_file_size() -> int:
+    return randrange(1_000_000)
+
+
 def any_error_message() -> str:
     """Arbitrary-length string"""
     return random_string(50)
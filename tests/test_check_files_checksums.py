@@ -1,9 +1,14 @@
 import logging
 import sys
+from datetime import timedelta
+from hashlib import sha256
 from io import BytesIO
 from json import dumps
 from os import environ
-from unittest.mock import MagicMock, call, patch
+from threading import Barrier
+from time import sleep
+from typing import List, Optional, Sequence
+from unittest.mock import ANY, MagicMock, call, patch
 
 from botocore.exceptions import ClientError  # type: ignore[import]
 from botocore.response import StreamingBody  # type: ignore[import]
@@ -12,24 +17,42 @@ from pytest import raises
 from pytest_subtests import SubTests  # type: ignore[import]
 
 from backend.check import Check
+from backend.check_files_checksums.content_checks import MAGIC_NUMBERS, ContentCheck, MediaTypeCheck
 from backend.check_files_checksums.task import main
 from backend.check_files_checksums.utils import (
     ARRAY_INDEX_VARIABLE_NAME,
     ChecksumMismatchError,
     ChecksumValidator,
+    SizeMismatchError,
+    get_job_item_indexes,
     get_job_offset,
 )
-from backend.processing_assets_model import ProcessingAssetType, ProcessingAssetsModelBase
+from backend.checksum_cache import get_checksum_cache_key
+from backend.processing_assets_model import (
+    CHECKSUM_JOB_PREFIX,
+    ProcessingAssetType,
+    ProcessingAssetsModelBase,
+)
+from backend.types import JsonObject
 from backend.validation_results_model import ValidationResult
 
 from .aws_utils import (
     EMPTY_FILE_MULTIHASH,
+    InMemoryChecksumCache,
     MockValidationResultFactory,
     any_batch_job_array_index,
+    any_s3_bucket_name,
     any_s3_url,
+    any_s3_version_id,
     any_table_name,
 )
-from .general_generators import any_program_name
+from .general_generators import (
+    any_etag,
+    any_file_contents,
+    any_file_size,
+    any_program_name,
+    any_safe_filename,
+)
 from .stac_generators import (
     any_dataset_id,
     any_dataset_version_id,
@@ -39,6 +62,14 @@ from .stac_generators import (
 )
 
 
+def any_checksum_job(
+    hash_key: str, range_key: str, item_indexes: List[int]
+) -> ProcessingAssetsModelBase:
+    return ProcessingAssetsModelBase(
+        hash_key=hash_key, range_key=range_key, url=any_s3_url(), item_indexes=item_indexes
+    )
+
+
 def should_return_offset_from_array_index_variable() -> None:
     index = any_batch_job_array_index()
     with patch.dict(environ, {ARRAY_INDEX_VARIABLE_NAME: str(index)}):
@@ -71,8 +102,14 @@ def should_validate_given_index(
 
     array_index = "1"
 
-    def get_mock(given_hash_key: str, range_key: str) -> ProcessingAssetsModelBase:
+    def get_mock(
+        given_hash_key: str, range_key: str, consistent_read: bool = False
+    ) -> ProcessingAssetsModelBase:
         assert given_hash_key == hash_key
+        if range_key.startswith(CHECKSUM_JOB_PREFIX):
+            assert consistent_read
+            assert range_key == f"{CHECKSUM_JOB_PREFIX}#{array_index}"
+            return any_checksum_job(given_hash_key, range_key, [int(array_index)])
         assert range_key == f"{ProcessingAssetType.DATA.value}#{array_index}"
         return ProcessingAssetsModelBase(
             hash_key=given_hash_key,
@@ -82,11 +119,12 @@ def should_validate_given_index(
         )
 
     processing_assets_model_mock.return_value.get.side_effect = get_mock
+    validate_url_multihash_mock.return_value = {"source": "stream"}
     logger = logging.getLogger("backend.check_files_checksums.task")
     validation_results_table_name = any_table_name()
     expected_calls = [
         call(hash_key, validation_results_table_name),
-        call().save(url, Check.CHECKSUM, ValidationResult.PASSED),
+        call().save(url, Check.CHECKSUM, ValidationResult.PASSED, details={"source": "stream"}),
     ]
 
     # When
@@ -96,7 +134,7 @@ def should_validate_given_index(
         f"--version-id={version_id}",
         f"--assets-table-name={any_table_name()}",
         f"--results-table-name={validation_results_table_name}",
-        "--first-item=0",
+        "--first-job=0",
     ]
     with patch.object(logger, "info") as info_log_mock, patch.dict(
         environ, {ARRAY_INDEX_VARIABLE_NAME: array_index}
@@ -109,12 +147,98 @@ def should_validate_given_index(
             info_log_mock.assert_any_call('{"success": true, "message": ""}')
 
     with subtests.test(msg="Validate checksums"):
-        assert validate_url_multihash_mock.mock_calls == [call(url, hex_multihash)]
+        assert validate_url_multihash_mock.mock_calls == [call(url, hex_multihash, None, [])]
 
     with subtests.test(msg="Validation result"):
         assert validation_results_factory_mock.mock_calls == expected_calls
 
 
+@patch("backend.check_files_checksums.utils.ChecksumValidator.validate_url_multihash")
+@patch("backend.check_files_checksums.utils.processing_assets_model_with_meta")
+@patch("backend.check_files_checksums.task.ValidationResultFactory")
+def should_validate_items_listed_by_checksum_job_of_array_index(
+    validation_results_factory_mock: MagicMock,
+    processing_assets_model_mock: MagicMock,
+    validate_url_multihash_mock: MagicMock,
+    subtests: SubTests,
+) -> None:
+    # Given a checksum job packed with two assets which aren't next to each other
+    dataset_id = any_dataset_id()
+    version_id = any_dataset_version_id()
+    hash_key = f"DATASET#{dataset_id}#VERSION#{version_id}"
+    item_indexes = [3, 7]
+
+    def get_mock(
+        given_hash_key: str, range_key: str, consistent_read: bool = False
+    ) -> ProcessingAssetsModelBase:
+        if range_key.startswith(CHECKSUM_JOB_PREFIX):
+            assert consistent_read
+            return any_checksum_job(given_hash_key, range_key, item_indexes)
+        return ProcessingAssetsModelBase(
+            hash_key=given_hash_key,
+            range_key=range_key,
+            url=range_key,
+            multihash=any_hex_multihash(),
+        )
+
+    processing_assets_model_mock.return_value.get.side_effect = get_mock
+    validate_url_multihash_mock.return_value = {"source": "stream"}
+
+    sys.argv = [
+        any_program_name(),
+        f"--dataset-id={dataset_id}",
+        f"--version-id={version_id}",
+        f"--assets-table-name={any_table_name()}",
+        f"--results-table-name={any_table_name()}",
+        "--first-job=10",
+    ]
+
+    # When
+    with patch.dict(environ, {ARRAY_INDEX_VARIABLE_NAME: "1"}):
+        assert main() == 0
+
+    # Then
+    with subtests.test(msg="Items fetched"):
+        assert processing_assets_model_mock.return_value.get.mock_calls == [
+            call(hash_key, range_key=f"{CHECKSUM_JOB_PREFIX}#11", consistent_read=True),
+            call(hash_key, range_key=f"{ProcessingAssetType.DATA.value}#3"),
+            call(hash_key, range_key=f"{ProcessingAssetType.DATA.value}#7"),
+        ]
+
+    with subtests.test(msg="Validation results"):
+        assert validation_results_factory_mock.return_value.save.mock_calls == [
+            call(
+                f"{ProcessingAssetType.DATA.value}#{index}",
+                Check.CHECKSUM,
+                ValidationResult.PASSED,
+                details={"source": "stream"},
+            )
+            for index in item_indexes
+        ]
+
+    with subtests.test(msg="Validate checksums"):
+        assert validate_url_multihash_mock.call_count == 2
+
+
+@patch("backend.check_files_checksums.utils.processing_assets_model_with_meta")
+def should_raise_does_not_exist_when_checksum_job_row_is_missing(
+    processing_assets_model_mock: MagicMock,
+) -> None:
+    class DoesNotExist(Exception):
+        pass
+
+    processing_assets_model_mock.DoesNotExist = DoesNotExist
+    processing_assets_model_mock.get.side_effect = DoesNotExist()
+    hash_key = f"DATASET#{any_dataset_id()}#VERSION#{any_dataset_version_id()}"
+
+    with patch.dict(environ, {ARRAY_INDEX_VARIABLE_NAME: "2"}), raises(DoesNotExist):
+        get_job_item_indexes(processing_assets_model_mock, hash_key, 10)
+
+    processing_assets_model_mock.get.assert_called_once_with(
+        hash_key, range_key=f"{CHECKSUM_JOB_PREFIX}#12", consistent_read=True
+    )
+
+
 @patch("backend.check_files_checksums.utils.ChecksumValidator.validate_url_multihash")
 @patch("backend.check_files_checksums.utils.processing_assets_model_with_meta")
 @patch("backend.check_files_checksums.task.ValidationResultFactory")
@@ -133,14 +257,18 @@ def should_log_error_when_validation_fails(  # pylint: disable=too-many-locals
     dataset_version_id = any_dataset_version_id()
     hash_key = f"DATASET#{dataset_id}#VERSION#{dataset_version_id}"
     url = any_s3_url()
-    processing_assets_model_mock.return_value.get.return_value = ProcessingAssetsModelBase(
-        hash_key=hash_key,
-        range_key=f"{ProcessingAssetType.DATA.value}#0",
-        url=url,
-        multihash=expected_hex_multihash,
-    )
+    processing_assets_model_mock.return_value.get.side_effect = [
+        any_checksum_job(hash_key, f"{CHECKSUM_JOB_PREFIX}#0", [0]),
+        ProcessingAssetsModelBase(
+            hash_key=hash_key,
+            range_key=f"{ProcessingAssetType.DATA.value}#0",
+            url=url,
+            multihash=expected_hex_multihash,
+        ),
+    ]
     expected_details = {
-        "message": f"Checksum mismatch: expected {expected_hex_digest}, got {actual_hex_digest}"
+        "message": f"Checksum mismatch: expected {expected_hex_digest}, got {actual_hex_digest}",
+        "source": "stream",
     }
     expected_log = dumps({"success": False, **expected_details})
     validate_url_multihash_mock.side_effect = ChecksumMismatchError(actual_hex_digest)
@@ -154,7 +282,7 @@ def should_log_error_when_validation_fails(  # pylint: disable=too-many-locals
         f"--version-id={dataset_version_id}",
         f"--assets-table-name={any_table_name()}",
         f"--results-table-name={validation_results_table_name}",
-        "--first-item=0",
+        "--first-job=0",
     ]
 
     # Then
@@ -202,11 +330,17 @@ def should_save_staging_access_validation_results(
         f"--version-id={version_id}",
         f"--assets-table-name={any_table_name()}",
         f"--results-table-name={validation_results_table_name}",
-        "--first-item=0",
+        "--first-job=0",
     ]
 
-    def get_mock(given_hash_key: str, range_key: str) -> ProcessingAssetsModelBase:
+    def get_mock(
+        given_hash_key: str, range_key: str, consistent_read: bool = False
+    ) -> ProcessingAssetsModelBase:
         assert given_hash_key == hash_key
+        if range_key.startswith(CHECKSUM_JOB_PREFIX):
+            assert consistent_read
+            assert range_key == f"{CHECKSUM_JOB_PREFIX}#{array_index}"
+            return any_checksum_job(given_hash_key, range_key, [int(array_index)])
         assert range_key == f"{ProcessingAssetType.DATA.value}#{array_index}"
         return ProcessingAssetsModelBase(
             hash_key=given_hash_key,
@@ -231,6 +365,130 @@ def should_save_staging_access_validation_results(
     ]
 
 
+@patch("backend.check_files_checksums.utils.ChecksumValidator.validate_url_multihash")
+@patch("backend.check_files_checksums.utils.processing_assets_model_with_meta")
+def should_hash_assets_concurrently_and_report_results_in_item_order(
+    processing_assets_model_mock: MagicMock, validate_url_multihash_mock: MagicMock
+) -> None:
+    # Given every download waits until all of them are in flight
+    concurrency = 3
+    barrier = Barrier(concurrency, timeout=5)
+    urls = [any_s3_url() for _ in range(concurrency)]
+    range_keys = [f"{ProcessingAssetType.DATA.value}#{index}" for index in range(concurrency)]
+
+    def get_mock(hash_key: str, range_key: str) -> ProcessingAssetsModelBase:
+        return ProcessingAssetsModelBase(
+            hash_key=hash_key,
+            range_key=range_key,
+            url=urls[range_keys.index(range_key)],
+            multihash=any_hex_multihash(),
+        )
+
+    def wait_for_other_downloads(
+        url: str,
+        _hex_multihash: str,
+        _expected_size: Optional[int],
+        _content_checks: Sequence[ContentCheck],
+    ) -> JsonObject:
+        barrier.wait()
+        # Finish in reverse order of the items
+        sleep(0.01 * (concurrency - urls.index(url)))
+        return {"source": "stream"}
+
+    processing_assets_model_mock.return_value.get.side_effect = get_mock
+    validate_url_multihash_mock.side_effect = wait_for_other_downloads
+    validation_result_factory = MockValidationResultFactory()
+
+    # When
+    ChecksumValidator(
+        any_table_name(),
+        validation_result_factory,
+        logging.getLogger("backend.check_files_checksums.task"),
+        concurrency,
+    ).validate_items(any_table_name(), range_keys)
+
+    # Then
+    assert validation_result_factory.save.mock_calls == [
+        call(url, Check.CHECKSUM, ValidationResult.PASSED, details={"source": "stream"})
+        for url in urls
+    ]
+
+
+@patch("backend.check_files_checksums.utils.ChecksumValidator.validate_url_multihash")
+@patch("backend.check_files_checksums.utils.processing_assets_model_with_meta")
+def should_save_file_size_validation_results(
+    processing_assets_model_mock: MagicMock, validate_url_multihash_mock: MagicMock
+) -> None:
+    # Given
+    url = any_s3_url()
+    expected_size = any_file_size()
+    actual_size = expected_size + 1
+    processing_assets_model_mock.return_value.get.return_value = ProcessingAssetsModelBase(
+        hash_key=any_table_name(),
+        range_key=f"{ProcessingAssetType.DATA.value}#0",
+        url=url,
+        multihash=any_hex_multihash(),
+        size=expected_size,
+    )
+    validate_url_multihash_mock.side_effect = SizeMismatchError(actual_size)
+    validation_result_factory = MockValidationResultFactory()
+
+    # When
+    ChecksumValidator(
+        any_table_name(),
+        validation_result_factory,
+        logging.getLogger("backend.check_files_checksums.task"),
+    ).validate(any_table_name(), f"{ProcessingAssetType.DATA.value}#0")
+
+    # Then
+    assert validate_url_multihash_mock.mock_calls == [call(url, ANY, expected_size, [])]
+    assert validation_result_factory.save.mock_calls == [
+        call(
+            url,
+            Check.FILE_SIZE,
+            ValidationResult.FAILED,
+            details={"message": f"File size mismatch: expected {expected_size}, got {actual_size}"},
+        )
+    ]
+
+
+@patch("backend.check_files_checksums.utils.S3_CLIENT.get_object")
+@patch("backend.check_files_checksums.utils.processing_assets_model_with_meta")
+def should_feed_content_checks_from_checksum_download(
+    processing_assets_model_mock: MagicMock, get_object_mock: MagicMock
+) -> None:
+    # Given a TIFF asset
+    url = any_s3_url()
+    contents = b"II*\x00" + any_file_contents()
+    processing_assets_model_mock.return_value.get.return_value = ProcessingAssetsModelBase(
+        hash_key=any_table_name(),
+        range_key=f"{ProcessingAssetType.DATA.value}#0",
+        url=url,
+        multihash=sha256_hex_digest_to_multihash(sha256(contents).hexdigest()),
+        media_type="image/tiff; application=geotiff",
+    )
+    get_object_mock.return_value = {
+        "Body": StreamingBody(BytesIO(contents), len(contents)),
+        "ContentLength": len(contents),
+        "ETag": any_etag(),
+    }
+    validation_result_factory = MockValidationResultFactory()
+
+    # When
+    ChecksumValidator(
+        any_table_name(),
+        validation_result_factory,
+        logging.getLogger("backend.check_files_checksums.task"),
+    ).validate(any_table_name(), f"{ProcessingAssetType.DATA.value}#0")
+
+    # Then every check is reported from a single download
+    assert get_object_mock.call_count == 1
+    assert validation_result_factory.save.mock_calls == [
+        call(url, Check.CHECKSUM, ValidationResult.PASSED, details={"source": "stream"}),
+        call(url, Check.MEDIA_TYPE, ValidationResult.PASSED, details=None),
+    ]
+
+
 class TestsWithLogger:
     logger: logging.Logger
 
@@ -240,18 +498,44 @@ class TestsWithLogger:
 
     @patch("backend.check_files_checksums.utils.S3_CLIENT.get_object")
     def should_return_when_empty_file_checksum_matches(self, get_object_mock: MagicMock) -> None:
-        get_object_mock.return_value = {"Body": StreamingBody(BytesIO(), 0)}
+        get_object_mock.return_value = {
+            "Body": StreamingBody(BytesIO(), 0),
+            "ContentLength": 0,
+            "ETag": any_etag(),
+        }
+
+        with patch("backend.check_files_checksums.utils.processing_assets_model_with_meta"):
+            ChecksumValidator(
+                any_table_name(), MockValidationResultFactory(), self.logger
+            ).validate_url_multihash(any_s3_url(), EMPTY_FILE_MULTIHASH)
+
+    @patch("backend.check_files_checksums.utils.S3_CLIENT.get_object")
+    def should_request_empty_object_whole_after_its_first_part_is_out_of_range(
+        self, get_object_mock: MagicMock
+    ) -> None:
+        get_object_mock.side_effect = [
+            ClientError(
+                {"Error": {"Code": "InvalidRange", "Message": "TEST"}}, operation_name="get_object"
+            ),
+            {"Body": StreamingBody(BytesIO(), 0), "ContentLength": 0, "ETag": any_etag()},
+        ]
 
         with patch("backend.check_files_checksums.utils.processing_assets_model_with_meta"):
             ChecksumValidator(
                 any_table_name(), MockValidationResultFactory(), self.logger
             ).validate_url_multihash(any_s3_url(), EMPTY_FILE_MULTIHASH)
 
+        assert get_object_mock.mock_calls[1] == call(Bucket=ANY, Key=ANY)
+
     @patch("backend.check_files_checksums.utils.S3_CLIENT.get_object")
     def should_raise_exception_when_checksum_does_not_match(
         self, get_object_mock: MagicMock
     ) -> None:
-        get_object_mock.return_value = {"Body": StreamingBody(BytesIO(), 0)}
+        get_object_mock.return_value = {
+            "Body": StreamingBody(BytesIO(), 0),
+            "ContentLength": 0,
+            "ETag": any_etag(),
+        }
 
         checksum = "0" * 64
         checksum_byte_count = 32
@@ -262,3 +546,292 @@ class TestsWithLogger:
             ChecksumValidator(
                 any_table_name(), MockValidationResultFactory(), self.logger
             ).validate_url_multihash(any_s3_url(), f"{SHA2_256:x}{checksum_byte_count:x}{checksum}")
+
+    @patch("backend.check_files_checksums.utils.S3_CLIENT.get_object")
+    def should_hash_large_object_parts_in_byte_order(self, get_object_mock: MagicMock) -> None:
+        # Given an object above the threshold, whose earlier parts are slowest to download
+        contents = any_file_contents()
+        etag = any_etag()
+        part_size = 3
+
+        def get_object(**kwargs: str) -> JsonObject:
+            first_byte, last_byte = (int(byte) for byte in kwargs["Range"][6:].split("-"))
+            assert kwargs.get("IfMatch") == (None if first_byte == 0 else etag)
+            sleep(0.001 * (len(contents) - first_byte))
+            part = contents[first_byte : last_byte + 1]
+            return {
+                "Body": StreamingBody(BytesIO(part), len(part)),
+                "ContentLength": len(part),
+                "ContentRange": f"bytes {first_byte}-{last_byte}/{len(contents)}",
+                "ETag": etag,
+            }
+
+        get_object_mock.side_effect = get_object
+
+        # When/Then
+        with patch("backend.check_files_checksums.utils.processing_assets_model_with_meta"), patch(
+            "backend.check_files_checksums.utils.PART_SIZE", part_size
+        ):
+            ChecksumValidator(
+                any_table_name(),
+                MockValidationResultFactory(),
+                self.logger,
+                large_object_threshold=len(contents),
+            ).validate_url_multihash(
+                any_s3_url(), sha256_hex_digest_to_multihash(sha256(contents).hexdigest())
+            )
+
+        # Then the first part request is the only one made before the size is known
+        assert get_object_mock.call_count == -(-len(contents) // part_size)
+
+    @patch("backend.check_files_checksums.utils.S3_CLIENT.get_object")
+    @patch("backend.check_files_checksums.utils.S3_CLIENT.head_object")
+    def should_hash_large_object_parts_pinned_to_looked_up_etag(
+        self, head_object_mock: MagicMock, get_object_mock: MagicMock
+    ) -> None:
+        # Given a large object which has not been hashed before
+        contents = any_file_contents()
+        etag = any_etag()
+        part_size = 3
+        head_object_mock.return_value = {"ContentLength": len(contents), "ETag": etag}
+
+        def get_object(**kwargs: str) -> JsonObject:
+            assert kwargs["IfMatch"] == etag
+            first_byte, last_byte = (int(byte) for byte in kwargs["Range"][6:].split("-"))
+            part = contents[first_byte : last_byte + 1]
+            return {"Body": StreamingBody(BytesIO(part), len(part))}
+
+        get_object_mock.side_effect = get_object
+
+        # When
+        with patch("backend.check_files_checksums.utils.processing_assets_model_with_meta"), patch(
+            "backend.check_files_checksums.utils.PART_SIZE", part_size
+        ):
+            details = ChecksumValidator(
+                any_table_name(),
+                MockValidationResultFactory(),
+                self.logger,
+                checksum_cache=InMemoryChecksumCache(),
+                large_object_threshold=len(contents),
+            ).validate_url_multihash(
+                any_s3_url(), sha256_hex_digest_to_multihash(sha256(contents).hexdigest())
+            )
+
+        # Then only parts are requested
+        assert details == {"source": "stream"}
+        assert get_object_mock.call_count == -(-len(contents) // part_size)
+
+    @patch("backend.check_files_checksums.utils.S3_CLIENT.get_object")
+    @patch("backend.check_files_checksums.utils.S3_CLIENT.head_object")
+    def should_use_cached_checksum_without_downloading_object(
+        self, head_object_mock: MagicMock, get_object_mock: MagicMock
+    ) -> None:
+        # Given an object hashed by a previous dataset version
+        bucket = any_s3_bucket_name()
+        key = any_safe_filename()
+        version_id = any_s3_version_id()
+        etag = any_etag()
+        hex_digest = any_sha256_hex_digest()
+        head_object_mock.return_value = {"ContentLength": 1, "ETag": etag, "VersionId": version_id}
+        checksum_cache = InMemoryChecksumCache()
+        checksum_cache.put(
+            get_checksum_cache_key(bucket, key, version_id, etag, 1, SHA2_256), hex_digest
+        )
+
+        # When
+        with patch("backend.check_files_checksums.utils.processing_assets_model_with_meta"):
+            details = ChecksumValidator(
+                any_table_name(),
+                MockValidationResultFactory(),
+                self.logger,
+                checksum_cache=checksum_cache,
+            ).validate_url_multihash(
+                f"s3://{bucket}/{key}", sha256_hex_digest_to_multihash(hex_digest)
+            )
+
+        # Then
+        assert details == {"source": "cache"}
+        get_object_mock.assert_not_called()
+
+    @patch("backend.check_files_checksums.utils.S3_CLIENT.get_object")
+    @patch("backend.check_files_checksums.utils.S3_CLIENT.head_object")
+    def should_only_download_content_check_prefix_when_checksum_is_cached(
+        self, head_object_mock: MagicMock, get_object_mock: MagicMock
+    ) -> None:
+        # Given a cached checksum and a content check needing the first four bytes
+        bucket = any_s3_bucket_name()
+        key = any_safe_filename()
+        etag = any_etag()
+        hex_digest = any_sha256_hex_digest()
+        head_object_mock.return_value = {"ContentLength": 1, "ETag": etag}
+        get_object_mock.return_value = {"Body": BytesIO(b"MM\x00*")}
+        checksum_cache = InMemoryChecksumCache()
+        checksum_cache.put(get_checksum_cache_key(bucket, key, None, etag, 1, SHA2_256), hex_digest)
+        media_type_check = MediaTypeCheck("image/tiff", MAGIC_NUMBERS["image/tiff"])
+
+        # When
+        with patch("backend.check_files_checksums.utils.processing_assets_model_with_meta"):
+            details = ChecksumValidator(
+                any_table_name(),
+                MockValidationResultFactory(),
+                self.logger,
+                checksum_cache=checksum_cache,
+            ).validate_url_multihash(
+                f"s3://{bucket}/{key}",
+                sha256_hex_digest_to_multihash(hex_digest),
+                content_checks=[media_type_check],
+            )
+
+        # Then
+        assert details == {"source": "cache"}
+        assert get_object_mock.mock_calls == [call(Bucket=bucket, Key=key, Range="bytes=0-3")]
+        assert media_type_check.result() == (ValidationResult.PASSED, None)
+
+    @patch("backend.check_files_checksums.utils.S3_CLIENT.get_object")
+    @patch("backend.check_files_checksums.utils.S3_CLIENT.head_object")
+    def should_cache_checksum_of_downloaded_object(
+        self, head_object_mock: MagicMock, get_object_mock: MagicMock
+    ) -> None:
+        # Given an object which has not been hashed before
+        contents = any_file_contents()
+        etag = any_etag()
+        head_object_mock.return_value = {"ContentLength": len(contents), "ETag": etag}
+        get_object_mock.return_value = {
+            "Body": StreamingBody(BytesIO(contents), len(contents)),
+            "ContentLength": len(contents),
+            "ETag": etag,
+        }
+        checksum_cache = InMemoryChecksumCache()
+        url = any_s3_url()
+        hex_multihash = sha256_hex_digest_to_multihash(sha256(contents).hexdigest())
+
+        with patch("backend.check_files_checksums.utils.processing_assets_model_with_meta"):
+            checksum_validator = ChecksumValidator(
+                any_table_name(),
+                MockValidationResultFactory(),
+                self.logger,
+                checksum_cache=checksum_cache,
+            )
+
+        # When
+        first_details = checksum_validator.validate_url_multihash(url, hex_multihash)
+        second_details = checksum_validator.validate_url_multihash(url, hex_multihash)
+
+        # Then the object is downloaded once, pinned to the version which was looked up
+        assert first_details == {"source": "stream"}
+        assert second_details == {"source": "cache"}
+        assert get_object_mock.mock_calls == [
+            call(Bucket=ANY, Key=ANY, IfMatch=etag)
+        ], get_object_mock.mock_calls
+
+    @patch("backend.check_files_checksums.utils.S3_CLIENT.get_object")
+    @patch("backend.check_files_checksums.utils.S3_CLIENT.head_object")
+    def should_download_object_overwritten_with_same_size_while_versioning_is_suspended(
+        self, head_object_mock: MagicMock, get_object_mock: MagicMock
+    ) -> None:
+        # Given a cached checksum of the previous contents, which had the same "null" version ID
+        bucket = any_s3_bucket_name()
+        key = any_safe_filename()
+        contents = any_file_contents()
+        etag = any_etag()
+        head_object_mock.return_value = {
+            "ContentLength": len(contents),
+            "ETag": etag,
+            "VersionId": "null",
+        }
+        get_object_mock.return_value = {
+            "Body": StreamingBody(BytesIO(contents), len(contents)),
+            "ContentLength": len(contents),
+            "ETag": etag,
+        }
+        checksum_cache = InMemoryChecksumCache()
+        checksum_cache.put(
+            get_checksum_cache_key(bucket, key, "null", any_etag(), len(contents), SHA2_256),
+            any_sha256_hex_digest(),
+        )
+
+        # When
+        with patch("backend.check_files_checksums.utils.processing_assets_model_with_meta"):
+            details = ChecksumValidator(
+                any_table_name(),
+                MockValidationResultFactory(),
+                self.logger,
+                checksum_cache=checksum_cache,
+            ).validate_url_multihash(
+                f"s3://{bucket}/{key}", sha256_hex_digest_to_multihash(sha256(contents).hexdigest())
+            )
+
+        # Then
+        assert details == {"source": "stream"}
+        get_object_mock.assert_called_once()
+
+    @patch("backend.check_files_checksums.utils.S3_CLIENT.get_object")
+    @patch("backend.check_files_checksums.utils.S3_CLIENT.head_object")
+    def should_download_object_when_cached_checksum_has_expired(
+        self, head_object_mock: MagicMock, get_object_mock: MagicMock
+    ) -> None:
+        etag = any_etag()
+        head_object_mock.return_value = {"ContentLength": 0, "ETag": etag}
+        get_object_mock.side_effect = lambda **_kwargs: {
+            "Body": StreamingBody(BytesIO(), 0),
+            "ContentLength": 0,
+            "ETag": etag,
+        }
+        checksum_cache = InMemoryChecksumCache(time_to_live=timedelta())
+        url = any_s3_url()
+
+        with patch("backend.check_files_checksums.utils.processing_assets_model_with_meta"):
+            checksum_validator = ChecksumValidator(
+                any_table_name(),
+                MockValidationResultFactory(),
+                self.logger,
+                checksum_cache=checksum_cache,
+            )
+
+        checksum_validator.validate_url_multihash(url, EMPTY_FILE_MULTIHASH)
+        checksum_validator.validate_url_multihash(url, EMPTY_FILE_MULTIHASH)
+
+        assert get_object_mock.call_count == 2
+
+    @patch("backend.check_files_checksums.utils.S3_CLIENT.get_object")
+    def should_report_size_mismatch_before_reading_object(self, get_object_mock: MagicMock) -> None:
+        # Given an object one byte shorter than the size in the metadata
+        expected_size = any_file_size()
+        body = MagicMock()
+        get_object_mock.return_value = {
+            "Body": body,
+            "ContentLength": expected_size - 1,
+            "ETag": any_etag(),
+        }
+
+        # When
+        with raises(SizeMismatchError) as error, patch(
+            "backend.check_files_checksums.utils.processing_assets_model_with_meta"
+        ):
+            ChecksumValidator(
+                any_table_name(), MockValidationResultFactory(), self.logger
+            ).validate_url_multihash(any_s3_url(), any_hex_multihash(), expected_size)
+
+        # Then
+        assert error.value.actual_size == expected_size - 1
+        assert body.mock_calls == [call.close()]
+
+    @patch("backend.check_files_checksums.utils.S3_CLIENT.get_object")
+    @patch("backend.check_files_checksums.utils.S3_CLIENT.head_object")
+    def should_check_size_before_looking_up_cached_checksum(
+        self, head_object_mock: MagicMock, get_object_mock: MagicMock
+    ) -> None:
+        expected_size = any_file_size()
+        head_object_mock.return_value = {"ContentLength": expected_size + 1, "ETag": any_etag()}
+
+        with raises(SizeMismatchError), patch(
+            "backend.check_files_checksums.utils.processing_assets_model_with_meta"
+        ):
+            ChecksumValidator(
+                any_table_name(),
+                MockValidationResultFactory(),
+                self.logger,
+                checksum_cache=InMemoryChecksumCache(),
+            ).validate_url_multihash(any_s3_url(), any_hex_multihash(), expected_size)
+
+        get_object_mock.assert_not_called()
@@ -0,0 +1,56 @@
+from hashlib import sha256
+from io import BytesIO
+from os import urandom
+from timeit import repeat
+from unittest.mock import MagicMock
+
+from botocore.response import StreamingBody  # type: ignore[import]
+from pytest import mark
+
+from backend.check_files_checksums.utils import DEFAULT_BUFFER_SIZE, update_digest_from_stream
+
+OBJECT_SIZE = 32 * 1024 * 1024
+SMALL_CHUNK_SIZE = 1024
+
+CONTENTS = urandom(OBJECT_SIZE)
+
+
+def _hash_in_small_chunks() -> None:
+    file_digest = sha256()
+    for chunk in StreamingBody(BytesIO(CONTENTS), OBJECT_SIZE).iter_chunks(
+        chunk_size=SMALL_CHUNK_SIZE
+    ):
+        file_digest.update(chunk)
+
+
+def _hash_with_reused_buffer() -> None:
+    file_digest = sha256()
+    update_digest_from_stream(
+        file_digest, StreamingBody(BytesIO(CONTENTS), OBJECT_SIZE), DEFAULT_BUFFER_SIZE
+    )
+
+
+@mark.benchmark
+def should_hash_stream_with_reused_buffer_faster_than_in_small_chunks() -> None:
+    small_chunks_seconds = min(repeat(_hash_in_small_chunks, number=1, repeat=5))
+    reused_buffer_seconds = min(repeat(_hash_with_reused_buffer, number=1, repeat=5))
+
+    assert reused_buffer_seconds < small_chunks_seconds
+
+
+def should_update_digest_once_per_buffer() -> None:
+    file_digest = MagicMock()
+
+    update_digest_from_stream(
+        file_digest, StreamingBody(BytesIO(CONTENTS), OBJECT_SIZE), DEFAULT_BUFFER_SIZE
+    )
+
+    assert file_digest.update.call_count == OBJECT_SIZE // DEFAULT_BUFFER_SIZE
+
+
+def should_produce_same_digest_as_small_chunks() -> None:
+    file_digest = sha256()
+
+    update_digest_from_stream(file_digest, StreamingBody(BytesIO(CONTENTS), OBJECT_SIZE), 1000)
+
+    assert file_digest.digest() == sha256(CONTENTS).digest()
@@ -0,0 +1,68 @@
+from unittest.mock import MagicMock
+
+from pytest_subtests import SubTests  # type: ignore[import]
+
+from backend.check_files_checksums.content_checks import (
+    MAGIC_NUMBERS,
+    ContentCheckFeed,
+    MediaTypeCheck,
+    get_media_type_check,
+)
+from backend.processing_assets_model import ProcessingAssetsModelBase
+from backend.validation_results_model import ValidationResult
+
+from .aws_utils import any_s3_url
+from .general_generators import any_file_contents
+
+
+def should_pass_media_type_check_when_contents_start_with_magic_number() -> None:
+    # Given the contents arrive one byte at a time
+    media_type_check = MediaTypeCheck("image/tiff", MAGIC_NUMBERS["image/tiff"])
+
+    for byte in b"MM\x00*" + any_file_contents():
+        media_type_check.update(bytes([byte]))
+
+    assert media_type_check.result() == (ValidationResult.PASSED, None)
+
+
+def should_report_media_type_mismatch_when_contents_do_not_start_with_magic_number() -> None:
+    media_type = "image/png"
+    media_type_check = MediaTypeCheck(media_type, MAGIC_NUMBERS[media_type])
+
+    media_type_check.update(b"II*\x00" + any_file_contents())
+
+    assert media_type_check.result() == (
+        ValidationResult.FAILED,
+        {"message": f"Contents don't match media type “{media_type}”"},
+    )
+
+
+def should_report_media_type_mismatch_for_empty_object() -> None:
+    media_type_check = MediaTypeCheck("image/jpeg", MAGIC_NUMBERS["image/jpeg"])
+
+    assert media_type_check.result()[0] == ValidationResult.FAILED
+
+
+def should_only_check_media_types_with_known_magic_numbers(subtests: SubTests) -> None:
+    for media_type, expected_check in [
+        (None, False),
+        ("application/json", False),
+        ("image/tiff; application=geotiff; profile=cloud-optimized", True),
+        ("Image/JPEG", True),
+    ]:
+        item = ProcessingAssetsModelBase(url=any_s3_url(), media_type=media_type)
+
+        with subtests.test(msg=media_type):
+            assert (get_media_type_check(item) is not None) == expected_check
+
+
+def should_feed_digest_and_every_content_check() -> None:
+    contents = any_file_contents()
+    file_digest = MagicMock()
+    first_check = MagicMock()
+    second_check = MagicMock()
+
+    ContentCheckFeed(file_digest, [first_check, second_check]).update(contents)
+
+    for mock in [file_digest, first_check, second_check]:
+        mock.update.assert_called_once_with(contents)
@@ -0,0 +1,200 @@
+import logging
+from hashlib import sha256
+from io import BytesIO
+from unittest.mock import ANY, MagicMock, call, patch
+
+from botocore.exceptions import EndpointConnectionError  # type: ignore[import]
+from pytest import raises
+
+from backend.check_files_checksums.utils import (
+    DEFAULT_CONCURRENCY,
+    PARTS_IN_FLIGHT,
+    S3_CLIENT,
+    ChecksumValidator,
+    ReconnectPolicy,
+    get_object_part,
+    update_digest_from_resumable_stream,
+)
+from backend.types import JsonObject
+
+from .aws_utils import (
+    EMPTY_FILE_MULTIHASH,
+    MockValidationResultFactory,
+    any_s3_bucket_name,
+    any_s3_url,
+    any_s3_version_id,
+    any_table_name,
+)
+from .general_generators import any_etag, any_file_contents, any_safe_filename
+from .stac_generators import sha256_hex_digest_to_multihash
+
+
+class InterruptedStream(BytesIO):
+    """Drops the connection after `interrupt_at` bytes"""
+
+    def __init__(self, contents: bytes, interrupt_at: int):
+        super().__init__(contents)
+        self.interrupt_at = interrupt_at
+
+    def readinto(self, buffer: bytearray) -> int:  # type: ignore[override]
+        byte_count = min(len(buffer), self.interrupt_at - self.tell())
+        if byte_count <= 0:
+            raise ConnectionResetError()
+        return super().readinto(memoryview(buffer)[:byte_count])
+
+
+@patch("backend.check_files_checksums.utils.sleep")
+@patch("backend.check_files_checksums.utils.S3_CLIENT.get_object")
+def should_resume_interrupted_stream_from_last_hashed_byte_of_same_version(
+    get_object_mock: MagicMock, sleep_mock: MagicMock
+) -> None:
+    # Given a versioned object whose first download is interrupted
+    contents = any_file_contents()
+    interrupt_at = len(contents) // 2
+    version_id = any_s3_version_id()
+
+    def get_object(**kwargs: str) -> JsonObject:
+        if "VersionId" not in kwargs:
+            return {
+                "Body": InterruptedStream(contents, interrupt_at),
+                "ContentLength": len(contents),
+                "ContentRange": f"bytes 0-{len(contents) - 1}/{len(contents)}",
+                "ETag": any_etag(),
+                "VersionId": version_id,
+            }
+
+        first_byte = int(kwargs["Range"][6:-1])
+        return {"Body": BytesIO(contents[first_byte:])}
+
+    get_object_mock.side_effect = get_object
+
+    with patch("backend.check_files_checksums.utils.processing_assets_model_with_meta"):
+        checksum_validator = ChecksumValidator(
+            any_table_name(),
+            MockValidationResultFactory(),
+            logging.getLogger("backend.check_files_checksums.task"),
+            buffer_size=3,
+            reconnect_policy=ReconnectPolicy(backoff=0.5),
+        )
+
+    # When
+    checksum_validator.validate_url_multihash(
+        any_s3_url(), sha256_hex_digest_to_multihash(sha256(contents).hexdigest())
+    )
+
+    # Then
+    assert get_object_mock.mock_calls[1] == call(
+        Bucket=ANY, Key=ANY, Range=f"bytes={interrupt_at}-", VersionId=version_id
+    )
+    assert sleep_mock.mock_calls == [call(0.5)]
+
+
+@patch("backend.check_files_checksums.utils.sleep")
+@patch("backend.check_files_checksums.utils.S3_CLIENT.get_object")
+def should_give_up_after_max_reconnects(get_object_mock: MagicMock, sleep_mock: MagicMock) -> None:
+    contents = any_file_contents()
+    get_object_mock.side_effect = lambda **_kwargs: {
+        "Body": InterruptedStream(contents, 1),
+        "ContentLength": len(contents),
+        "ETag": any_etag(),
+    }
+
+    with patch("backend.check_files_checksums.utils.processing_assets_model_with_meta"):
+        checksum_validator = ChecksumValidator(
+            any_table_name(),
+            MockValidationResultFactory(),
+            logging.getLogger("backend.check_files_checksums.task"),
+            reconnect_policy=ReconnectPolicy(max_reconnects=2, backoff=1),
+        )
+
+    with raises(ConnectionResetError):
+        checksum_validator.validate_url_multihash(any_s3_url(), EMPTY_FILE_MULTIHASH)
+
+    assert get_object_mock.call_count == 3
+    assert sleep_mock.mock_calls == [call(1), call(2)]
+
+
+@patch("backend.check_files_checksums.utils.sleep")
+@patch("backend.check_files_checksums.utils.S3_CLIENT.get_object")
+def should_resume_interrupted_part_within_its_byte_range(
+    get_object_mock: MagicMock, _sleep_mock: MagicMock
+) -> None:
+    contents = any_file_contents()
+    etag = any_etag()
+    first_byte = 2
+    last_byte = len(contents) - 2
+    interrupt_at = 3
+    get_object_mock.side_effect = [
+        {"Body": InterruptedStream(contents[first_byte : last_byte + 1], interrupt_at)},
+        {"Body": BytesIO(contents[first_byte + interrupt_at : last_byte + 1])},
+    ]
+
+    part = get_object_part(
+        any_s3_bucket_name(), any_safe_filename(), etag, first_byte, last_byte, ReconnectPolicy()
+    )
+
+    assert part == contents[first_byte : last_byte + 1]
+    assert get_object_mock.mock_calls[1] == call(
+        Bucket=ANY, Key=ANY, Range=f"bytes={first_byte + interrupt_at}-{last_byte}", IfMatch=etag
+    )
+
+
+@patch("backend.check_files_checksums.utils.sleep")
+def should_finish_without_reopening_stream_interrupted_after_its_last_byte(
+    _sleep_mock: MagicMock,
+) -> None:
+    contents = any_file_contents()
+    reopen_stream = MagicMock()
+    digest = sha256()
+
+    update_digest_from_resumable_stream(
+        digest,
+        InterruptedStream(contents, len(contents)),
+        3,
+        len(contents),
+        reopen_stream,
+        ReconnectPolicy(),
+    )
+
+    assert digest.digest() == sha256(contents).digest()
+    reopen_stream.assert_not_called()
+
+
+@patch("backend.check_files_checksums.utils.sleep")
+def should_retry_reopening_stream_when_connecting_fails(sleep_mock: MagicMock) -> None:
+    contents = any_file_contents()
+    interrupt_at = len(contents) // 2
+    reopen_stream = MagicMock(
+        side_effect=[
+            EndpointConnectionError(endpoint_url=any_s3_url()),
+            BytesIO(contents[interrupt_at:]),
+        ]
+    )
+    digest = sha256()
+
+    update_digest_from_resumable_stream(
+        digest,
+        InterruptedStream(contents, interrupt_at),
+        3,
+        len(contents),
+        reopen_stream,
+        ReconnectPolicy(backoff=1),
+    )
+
+    assert digest.digest() == sha256(contents).digest()
+    assert reopen_stream.mock_calls == [call(interrupt_at), call(interrupt_at)]
+    assert sleep_mock.mock_calls == [call(1), call(2)]
+
+
+def should_keep_a_connection_for_every_part_in_flight() -> None:
+    assert S3_CLIENT.meta.config.max_pool_connections == DEFAULT_CONCURRENCY * PARTS_IN_FLIGHT
+
+
+def should_cap_reconnect_backoff() -> None:
+    assert list(ReconnectPolicy(max_reconnects=5, backoff=1, max_backoff=3).delays()) == [
+        1,
+        2,
+        3,
+        3,
+        3,
+    ]
@@ -3,11 +3,14 @@ from copy import deepcopy
 from datetime import timedelta
 from hashlib import sha256, sha512
 from io import BytesIO, StringIO
-from json import JSONDecodeError, dumps
-from typing import Dict, List
-from unittest.mock import MagicMock, call, patch
+from json import JSONDecodeError, dumps, loads
+from threading import Barrier
+from time import sleep
+from typing import Any, Callable, Dict, List, Tuple
+from unittest.mock import ANY, MagicMock, call, patch
 
 from botocore.exceptions import ClientError  # type: ignore[import]
+from botocore.response import StreamingBody  # type: ignore[import]
 from jsonschema import ValidationError  # type: ignore[import]
 from pytest import mark, raises
 from pytest_subtests import SubTests  # type: ignore[import]
@@ -15,18 +18,25 @@ from pytest_subtests import SubTests  # type: ignore[import]
 from backend.check import Check
 from backend.check_stac_metadata.stac_validators import STACCollectionSchemaValidator
 from backend.check_stac_metadata.task import lambda_handler
-from backend.check_stac_metadata.utils import STACDatasetValidator
+from backend.check_stac_metadata.utils import (
+    BATCH_WRITE_ITEM_LIMIT,
+    STACDatasetValidator,
+    maybe_convert_relative_url_to_absolute,
+)
 from backend.parameter_store import ParameterName, get_param
 from backend.processing_assets_model import ProcessingAssetType, processing_assets_model_with_meta
 from backend.resources import ResourceName
 from backend.step_function_event_keys import DATASET_ID_KEY, METADATA_URL_KEY, VERSION_ID_KEY
+from backend.types import JsonObject
 from backend.validation_results_model import ValidationResult, validation_results_model_with_meta
 
 from .aws_utils import (
+    InMemoryTableConnection,
     MockJSONURLReader,
     MockValidationResultFactory,
     S3Object,
     any_lambda_context,
+    any_s3_bucket_name,
     any_s3_url,
     any_table_name,
 )
@@ -34,6 +44,7 @@ from .file_utils import json_dict_to_file_object
 from .general_generators import (
     any_error_message,
     any_file_contents,
+    any_file_size,
     any_https_url,
     any_program_name,
     any_safe_filename,
@@ -52,7 +63,7 @@ from .stac_objects import (
 )
 
 
-@patch("backend.check_stac_metadata.task.STACDatasetValidator.validate")
+@patch("backend.check_stac_metadata.task.STACDatasetValidator.validate_urls")
 def should_succeed_with_validation_failure(validate_url_mock: MagicMock) -> None:
     validate_url_mock.side_effect = ValidationError(any_error_message())
 
@@ -147,6 +158,51 @@ def should_report_duplicate_asset_names(validation_results_factory_mock: MagicMo
     )
 
 
+def should_decode_like_pair_by_pair_duplicate_name_detection(subtests: SubTests) -> None:
+    large_item_stac_object = deepcopy(MINIMAL_VALID_STAC_ITEM_OBJECT)
+    large_item_stac_object["assets"] = {
+        any_asset_name(): {"href": any_s3_url(), "file:checksum": any_hex_multihash()}
+        for _ in range(100)
+    }
+    corpus = [
+        "{}",
+        "[]",
+        '"string"',
+        "null",
+        '{"a": 1, "b": 2}',
+        '{"a": 1, "a": 2}',
+        '{"a": 1, "a": 2, "a": 3}',
+        '{"a": {"b": 1, "b": 2}, "b": {"a": 1}}',
+        '[{"a": 1}, {"a": 1, "a": {"a": 1, "a": 2}}]',
+        '{"a": 1, "b": 2, "a": 3, "b": 4}',
+        '{"a\\u0062": 1, "ab": 2}',
+        '{"\\"": 1, "\\"": 2, "\\u00e6": 3, "æ": 4}',
+        '{"a": null, "a": null}',
+        dumps(large_item_stac_object),
+        dumps(large_item_stac_object)[:-1] + ', "id": "duplicate"}',
+    ]
+
+    for json_string in corpus:
+        url = any_s3_url()
+        expected_factory = MockValidationResultFactory()
+        actual_factory = MockValidationResultFactory()
+        with patch("backend.check_stac_metadata.utils.processing_assets_model_with_meta"):
+            validator = STACDatasetValidator(MagicMock(), actual_factory)
+
+        expected_object = loads(
+            json_string,
+            object_pairs_hook=_report_duplicate_object_names_pair_by_pair(url, expected_factory),
+        )
+        actual_object = loads(
+            json_string,
+            object_pairs_hook=validator.duplicate_object_names_report_builder(url),
+        )
+
+        with subtests.test(msg=json_string[:100]):
+            assert actual_object == expected_object
+            assert actual_factory.mock_calls == expected_factory.mock_calls
+
+
 @mark.infrastructure
 @patch("backend.check_stac_metadata.task.S3_CLIENT.get_object")
 @patch("backend.check_stac_metadata.task.ValidationResultFactory")
@@ -357,8 +413,9 @@ def should_insert_asset_urls_and_checksums_into_database(subtests: SubTests) ->
                     assert actual_item.attribute_values == expected_item.attribute_values
 
 
-@patch("backend.check_stac_metadata.task.STACDatasetValidator.validate")
+@patch("backend.check_stac_metadata.task.STACDatasetValidator.validate_urls")
 def should_validate_given_url(validate_url_mock: MagicMock) -> None:
+    validate_url_mock.return_value = []
     url = any_s3_url()
 
     with patch("backend.check_stac_metadata.utils.processing_assets_model_with_meta"):
@@ -371,7 +428,52 @@ def should_validate_given_url(validate_url_mock: MagicMock) -> None:
             any_lambda_context(),
         )
 
-    validate_url_mock.assert_called_once_with(url)
+    validate_url_mock.assert_called_once_with([url])
+
+
+def should_write_processing_assets_in_batches_and_resend_unprocessed_items(
+    subtests: SubTests,
+) -> None:
+    # Given
+    hash_key = f"DATASET#{any_dataset_id()}#VERSION#{any_dataset_version_id()}"
+    metadata_urls = [any_s3_url() for _ in range(30)]
+    asset_urls = [any_s3_url() for _ in range(40)]
+    table_name = any_table_name()
+    processing_assets_model = processing_assets_model_with_meta(table_name)
+    connection = InMemoryTableConnection(table_name, unprocessed_interval=7)
+
+    with patch(
+        "backend.check_stac_metadata.utils.processing_assets_model_with_meta",
+        return_value=processing_assets_model,
+    ), patch.object(processing_assets_model, "_get_connection", return_value=connection):
+        validator = STACDatasetValidator(MagicMock(), MagicMock(), write_concurrency=4)
+        validator.dataset_metadata = [{"url": url} for url in metadata_urls]
+        validator.dataset_assets = [
+            {"url": url, "multihash": any_hex_multihash()} for url in asset_urls
+        ]
+
+        # When
+        with patch.object(validator, "validate_urls", return_value=[]):
+            validator.run(any_s3_url(), hash_key)
+
+    # Then
+    with subtests.test(msg="Batch sizes"):
+        assert max(connection.batch_sizes) == BATCH_WRITE_ITEM_LIMIT
+
+    with subtests.test(msg="Unprocessed items resent"):
+        assert connection.unprocessed_keys
+
+    with subtests.test(msg="Metadata"):
+        assert [
+            connection.items[(hash_key, f"{ProcessingAssetType.METADATA.value}#{index}")]["url"]
+            for index in range(len(metadata_urls))
+        ] == [{"S": url} for url in metadata_urls]
+
+    with subtests.test(msg="Assets"):
+        assert [
+            connection.items[(hash_key, f"{ProcessingAssetType.DATA.value}#{index}")]["url"]
+            for index in range(len(asset_urls))
+        ] == [{"S": url} for url in asset_urls]
 
 
 def should_treat_minimal_stac_object_as_valid() -> None:
@@ -454,6 +556,100 @@ def should_only_validate_each_file_once() -> None:
     assert url_reader.mock_calls == [call(root_url), call(child_url), call(leaf_url)]
 
 
+def should_only_validate_each_file_once_when_linked_through_parent_directories() -> None:
+    # Given a catalog and item in a subdirectory which link to each other relatively
+    bucket_url = f"s3://{any_s3_bucket_name()}"
+    directory_name = any_safe_filename()
+    catalog_filename = any_safe_filename()
+    item_filename = any_safe_filename()
+    catalog_url = f"{bucket_url}/{catalog_filename}"
+    item_url = f"{bucket_url}/{directory_name}/{item_filename}"
+    catalog_stac_object = deepcopy(MINIMAL_VALID_STAC_CATALOG_OBJECT)
+    catalog_stac_object["links"] = [
+        {"href": f"./{catalog_filename}", "rel": "self"},
+        {"href": f"./{directory_name}/{item_filename}", "rel": "item"},
+    ]
+    item_stac_object = deepcopy(MINIMAL_VALID_STAC_ITEM_OBJECT)
+    item_stac_object["links"] = [
+        {"href": f"../{catalog_filename}", "rel": "root"},
+        {"href": f"../{catalog_filename}", "rel": "parent"},
+        {"href": f"../{directory_name}/./{item_filename}", "rel": "self"},
+    ]
+    url_reader = MockJSONURLReader(
+        {catalog_url: catalog_stac_object, item_url: item_stac_object}, call_limit=2
+    )
+
+    with patch("backend.check_stac_metadata.utils.processing_assets_model_with_meta"):
+        STACDatasetValidator(url_reader, MockValidationResultFactory()).validate(catalog_url)
+
+    assert url_reader.mock_calls == [call(catalog_url), call(item_url)]
+
+
+def should_normalize_relative_path_segments_in_urls(subtests: SubTests) -> None:
+    parent_url = "s3://bucket/first/second/catalog.json"
+    for url_or_path, expected_url in [
+        ("item.json", "s3://bucket/first/second/item.json"),
+        ("./item.json", "s3://bucket/first/second/item.json"),
+        ("../item.json", "s3://bucket/first/item.json"),
+        ("../second/./sub/../item.json", "s3://bucket/first/second/item.json"),
+        ("s3://other/first/../item.json", "s3://other/item.json"),
+        ("item#1?.json", "s3://bucket/first/second/item#1?.json"),
+        ("sub//item.json", "s3://bucket/first/second/sub//item.json"),
+        ("sub/", "s3://bucket/first/second/sub/"),
+        ("sub/.", "s3://bucket/first/second/sub/"),
+        ("s3://other/first//../item.json", "s3://other/first/item.json"),
+    ]:
+        with subtests.test(msg=url_or_path):
+            assert maybe_convert_relative_url_to_absolute(url_or_path, parent_url) == expected_url
+
+
+def should_resolve_relative_paths_from_key_with_empty_segment() -> None:
+    assert (
+        maybe_convert_relative_url_to_absolute("./item.json", "s3://bucket/first//catalog.json")
+        == "s3://bucket/first//item.json"
+    )
+
+
+def should_download_linked_metadata_files_concurrently_and_validate_them_in_link_order() -> None:
+    # Given a catalog whose children can only finish downloading when all of them are in flight
+    concurrency = 3
+    barrier = Barrier(concurrency, timeout=5)
+    base_url = any_s3_url()
+    root_url = f"{base_url}/{any_safe_filename()}"
+    child_urls = [f"{base_url}/{any_safe_filename()}" for _ in range(concurrency)]
+    root_stac_object = deepcopy(MINIMAL_VALID_STAC_CATALOG_OBJECT)
+    root_stac_object["links"] = [{"href": child_url, "rel": "child"} for child_url in child_urls]
+    json_url_reader = MockJSONURLReader(
+        {
+            root_url: root_stac_object,
+            **{
+                child_url: deepcopy(MINIMAL_VALID_STAC_COLLECTION_OBJECT)
+                for child_url in child_urls
+            },
+        }
+    )
+
+    def url_reader(url: str) -> StreamingBody:
+        if url != root_url:
+            barrier.wait()
+            # Finish in reverse order of the links
+            sleep(0.01 * (concurrency - child_urls.index(url)))
+        body: StreamingBody = json_url_reader(url)
+        return body
+
+    validation_result_factory = MockValidationResultFactory()
+    with patch("backend.check_stac_metadata.utils.processing_assets_model_with_meta"):
+        validator = STACDatasetValidator(url_reader, validation_result_factory, concurrency)
+
+    # When
+    validator.validate(root_url)
+
+    # Then
+    assert validation_result_factory.save.mock_calls == [
+        call(url, Check.JSON_SCHEMA, ValidationResult.PASSED) for url in [root_url, *child_urls]
+    ]
+
+
 def should_collect_assets_from_validated_collection_metadata_files(subtests: SubTests) -> None:
     # Given one asset in another directory and one relative link
     base_url = any_s3_url()
@@ -524,6 +720,237 @@ def should_collect_assets_from_validated_item_metadata_files(subtests: SubTests)
         assert validator.dataset_metadata == expected_metadata
 
 
+def should_collect_each_asset_once_when_referenced_by_multiple_metadata_files() -> None:
+    # Given two items referring to the same asset, one of them relatively
+    base_url = any_s3_url()
+    catalog_url = f"{base_url}/{any_safe_filename()}"
+    first_item_url = f"{base_url}/{any_safe_filename()}"
+    second_item_url = f"{base_url}/{any_safe_filename()}"
+    asset_filename = any_safe_filename()
+    asset_multihash = any_hex_multihash()
+
+    catalog_stac_object = deepcopy(MINIMAL_VALID_STAC_CATALOG_OBJECT)
+    catalog_stac_object["links"] = [
+        {"href": first_item_url, "rel": "item"},
+        {"href": second_item_url, "rel": "item"},
+    ]
+    first_item_stac_object = deepcopy(MINIMAL_VALID_STAC_ITEM_OBJECT)
+    first_item_stac_object["assets"] = {
+        any_asset_name(): {"href": f"{base_url}/{asset_filename}", "file:checksum": asset_multihash}
+    }
+    second_item_stac_object = deepcopy(MINIMAL_VALID_STAC_ITEM_OBJECT)
+    second_item_stac_object["assets"] = {
+        any_asset_name(): {"href": asset_filename, "file:checksum": asset_multihash}
+    }
+    url_reader = MockJSONURLReader(
+        {
+            catalog_url: catalog_stac_object,
+            first_item_url: first_item_stac_object,
+            second_item_url: second_item_stac_object,
+        }
+    )
+    hash_key = any_dataset_id()
+
+    with patch(
+        "backend.check_stac_metadata.utils.processing_assets_model_with_meta"
+    ) as processing_assets_model_mock:
+        validator = STACDatasetValidator(url_reader, MockValidationResultFactory())
+
+        # When
+        validator.run(catalog_url, hash_key)
+
+    # Then
+    assert [
+        asset_call
+        for asset_call in processing_assets_model_mock.return_value.call_args_list
+        if asset_call.kwargs["range_key"].startswith(f"{ProcessingAssetType.DATA.value}#")
+    ] == [
+        call(
+            hash_key=hash_key,
+            range_key=f"{ProcessingAssetType.DATA.value}#0",
+            url=f"{base_url}/{asset_filename}",
+            multihash=asset_multihash,
+            size=None,
+            media_type=None,
+            metadata_url=None,
+        )
+    ]
+
+
+def should_write_discovered_rows_during_crawl_with_contiguous_indexes(
+    subtests: SubTests,
+) -> None:
+    # pylint: disable=too-many-locals
+    # Given a catalog with more items and assets than are kept in memory
+    base_url = any_s3_url()
+    catalog_url = f"{base_url}/{any_safe_filename()}"
+    item_urls = [f"{base_url}/{any_safe_filename()}" for _ in range(7)]
+    asset_urls = [f"{base_url}/{any_safe_filename()}" for _ in item_urls]
+    catalog_stac_object = deepcopy(MINIMAL_VALID_STAC_CATALOG_OBJECT)
+    catalog_stac_object["links"] = [{"href": item_url, "rel": "item"} for item_url in item_urls]
+    url_to_json: Dict[str, JsonObject] = {catalog_url: catalog_stac_object}
+    for item_url, asset_url in zip(item_urls, asset_urls):
+        item_stac_object = deepcopy(MINIMAL_VALID_STAC_ITEM_OBJECT)
+        item_stac_object["assets"] = {
+            any_asset_name(): {"href": asset_url, "file:checksum": any_hex_multihash()}
+        }
+        url_to_json[item_url] = item_stac_object
+
+    hash_key = f"DATASET#{any_dataset_id()}#VERSION#{any_dataset_version_id()}"
+    table_name = any_table_name()
+    processing_assets_model = processing_assets_model_with_meta(table_name)
+    connection = InMemoryTableConnection(table_name)
+    json_url_reader = MockJSONURLReader(url_to_json)
+    written_row_counts = []
+
+    def url_reader(url: str) -> StreamingBody:
+        written_row_counts.append(len(connection.items))
+        body: StreamingBody = json_url_reader(url)
+        return body
+
+    with patch(
+        "backend.check_stac_metadata.utils.processing_assets_model_with_meta",
+        return_value=processing_assets_model,
+    ), patch.object(processing_assets_model, "_get_connection", return_value=connection):
+        validator = STACDatasetValidator(url_reader, MockValidationResultFactory(), flush_size=2)
+
+        # When
+        validator.run(catalog_url, hash_key)
+
+    # Then
+    with subtests.test(msg="Written during crawl"):
+        assert written_row_counts[-1] > 0
+
+    with subtests.test(msg="Metadata"):
+        assert [
+            connection.items[(hash_key, f"{ProcessingAssetType.METADATA.value}#{index}")]["url"]
+            for index in range(len(url_to_json))
+        ] == [{"S": url} for url in url_to_json]
+
+    with subtests.test(msg="Assets"):
+        assert [
+            connection.items[(hash_key, f"{ProcessingAssetType.DATA.value}#{index}")]["url"]
+            for index in range(len(asset_urls))
+        ] == [{"S": url} for url in asset_urls]
+
+    with subtests.test(msg="Nothing left in memory"):
+        assert not validator.dataset_metadata and not validator.dataset_assets
+
+
+def should_collect_optional_asset_size_and_media_type() -> None:
+    base_url = any_s3_url()
+    metadata_url = f"{base_url}/{any_safe_filename()}"
+    asset_url = f"{base_url}/{any_safe_filename()}"
+    asset_multihash = any_hex_multihash()
+    asset_size = any_file_size()
+    asset_media_type = "image/tiff; application=geotiff"
+    stac_object = deepcopy(MINIMAL_VALID_STAC_ITEM_OBJECT)
+    stac_object["assets"] = {
+        any_asset_name(): {
+            "href": asset_url,
+            "file:checksum": asset_multihash,
+            "file:size": asset_size,
+            "type": asset_media_type,
+        }
+    }
+    url_reader = MockJSONURLReader({metadata_url: stac_object})
+
+    with patch("backend.check_stac_metadata.utils.processing_assets_model_with_meta"):
+        validator = STACDatasetValidator(url_reader, MockValidationResultFactory())
+
+    validator.validate(metadata_url)
+
+    assert validator.dataset_assets == [
+        {
+            "url": asset_url,
+            "multihash": asset_multihash,
+            "size": asset_size,
+            "media_type": asset_media_type,
+        }
+    ]
+
+
+def should_report_invalid_asset_size_and_collect_asset_without_it(subtests: SubTests) -> None:
+    for invalid_size in ["1024", 1024.5, -1, True, None]:
+        base_url = any_s3_url()
+        metadata_url = f"{base_url}/{any_safe_filename()}"
+        asset_url = f"{base_url}/{any_safe_filename()}"
+        asset_multihash = any_hex_multihash()
+        stac_object = deepcopy(MINIMAL_VALID_STAC_ITEM_OBJECT)
+        stac_object["assets"] = {
+            any_asset_name(): {
+                "href": asset_url,
+                "file:checksum": asset_multihash,
+                "file:size": invalid_size,
+            }
+        }
+        validation_result_factory = MockValidationResultFactory()
+
+        with patch("backend.check_stac_metadata.utils.processing_assets_model_with_meta"):
+            validator = STACDatasetValidator(
+                MockJSONURLReader({metadata_url: stac_object}), validation_result_factory
+            )
+
+        validator.validate(metadata_url)
+
+        with subtests.test(msg=f"Asset collected without size {invalid_size!r}"):
+            assert validator.dataset_assets == [{"url": asset_url, "multihash": asset_multihash}]
+
+        with subtests.test(msg=f"Result of size {invalid_size!r}"):
+            assert (
+                call(
+                    asset_url,
+                    Check.FILE_SIZE,
+                    ValidationResult.FAILED,
+                    details={"message": ANY},
+                )
+                in validation_result_factory.save.mock_calls
+            )
+
+
+def should_report_conflicting_multihashes_for_same_asset(subtests: SubTests) -> None:
+    # Given one asset referenced with two different multihashes, and another valid asset
+    base_url = any_s3_url()
+    metadata_url = f"{base_url}/{any_safe_filename()}"
+    conflicting_asset_url = f"{base_url}/{any_safe_filename()}"
+    first_multihash = any_hex_multihash()
+    second_multihash = any_hex_multihash()
+    other_asset = {"url": f"{base_url}/{any_safe_filename()}", "multihash": any_hex_multihash()}
+    stac_object = deepcopy(MINIMAL_VALID_STAC_ITEM_OBJECT)
+    stac_object["assets"] = {
+        any_asset_name(): {"href": conflicting_asset_url, "file:checksum": first_multihash},
+        any_asset_name(): {"href": other_asset["url"], "file:checksum": other_asset["multihash"]},
+        any_asset_name(): {"href": conflicting_asset_url, "file:checksum": second_multihash},
+        any_asset_name(): {"href": conflicting_asset_url, "file:checksum": first_multihash},
+    }
+    url_reader = MockJSONURLReader({metadata_url: stac_object})
+    validation_result_factory = MockValidationResultFactory()
+
+    with patch("backend.check_stac_metadata.utils.processing_assets_model_with_meta"):
+        validator = STACDatasetValidator(url_reader, validation_result_factory)
+
+    # When
+    validator.validate(metadata_url)
+
+    # Then
+    with subtests.test(msg="Validation result"):
+        assert (
+            call(
+                conflicting_asset_url,
+                Check.CONFLICTING_ASSET_CHECKSUM,
+                ValidationResult.FAILED,
+                details={
+                    "message": f"Found conflicting multihashes “{first_multihash}” and"
+                    f" “{second_multihash}” for asset “{conflicting_asset_url}” in “{metadata_url}”"
+                },
+            )
+            in validation_result_factory.save.mock_calls
+        )
+
+    with subtests.test(msg="Assets"):
+        assert validator.dataset_assets == [other_asset]
+
+
 @patch("backend.check_stac_metadata.task.ValidationResultFactory")
 def should_report_invalid_json(validation_results_factory_mock: MagicMock) -> None:
     # Given
@@ -551,3 +978,23 @@ def should_report_invalid_json(validation_results_factory_mock: MagicMock) -> No
 
 def _sort_assets(assets: List[Dict[str, str]]) -> List[Dict[str, str]]:
     return sorted(assets, key=lambda entry: entry["url"])
+
+
+def _report_duplicate_object_names_pair_by_pair(
+    url: str, validation_result_factory: MockValidationResultFactory
+) -> Callable[[List[Tuple[str, Any]]], JsonObject]:
+    def report_duplicate_object_names(object_pairs: List[Tuple[str, Any]]) -> JsonObject:
+        result = {}
+        for key, value in object_pairs:
+            if key in result:
+                validation_result_factory.save(
+                    url,
+                    Check.DUPLICATE_OBJECT_KEY,
+                    ValidationResult.FAILED,
+                    details={"message": f"Found duplicate object name “{key}” in “{url}”"},
+                )
+            else:
+                result[key] = value
+        return result
+
+    return report_duplicate_object_names
@@ -0,0 +1,270 @@
+from copy import deepcopy
+from io import BytesIO, StringIO
+from json import dumps, loads
+from math import inf
+from sys import getrecursionlimit
+from time import perf_counter
+from timeit import repeat, timeit
+from typing import Any, List, Tuple
+from unittest.mock import MagicMock, patch
+
+from botocore.response import StreamingBody  # type: ignore[import]
+from pytest import mark
+
+from backend.check_stac_metadata.stac_validators import (
+    CompiledSTACValidator,
+    STACItemSchemaValidator,
+)
+from backend.check_stac_metadata.utils import (
+    BATCH_WRITE_ITEM_LIMIT,
+    STAC_ITEM_TYPE,
+    STACDatasetValidator,
+    get_stac_validator,
+)
+from backend.processing_assets_model import processing_assets_model_with_meta
+from backend.types import JsonObject
+
+from .aws_utils import InMemoryTableConnection, any_s3_bucket_name, any_s3_url, any_table_name
+from .stac_objects import MINIMAL_VALID_STAC_ITEM_OBJECT
+
+FILE_COUNT = 100
+
+WIDE_CATALOG_ITEM_COUNT = 1_000
+BENCHMARK_WIDE_CATALOG_ITEM_COUNT = 100_000
+WIDE_CATALOG_TIME_BUDGET_SECONDS = 60
+
+LARGE_ITEM_ASSET_COUNT = 1_000
+LARGE_ITEM_ASSET_PROPERTY_COUNT = 100
+DECODE_REPEAT = 30
+
+PROCESSING_ASSET_ROW_COUNT = 10_000
+BENCHMARK_PROCESSING_ASSET_ROW_COUNT = 100_000
+BATCH_WRITE_ITEM_LATENCY_SECONDS = 0.005
+PROCESSING_ASSETS_WRITE_CONCURRENCY = 8
+PROCESSING_ASSETS_WRITE_TIME_BUDGET_SECONDS = 30
+
+STAC_ITEM = deepcopy(MINIMAL_VALID_STAC_ITEM_OBJECT)
+
+LARGE_STAC_ITEM = deepcopy(MINIMAL_VALID_STAC_ITEM_OBJECT)
+LARGE_STAC_ITEM["assets"] = {
+    f"asset{asset_index}": {
+        "href": f"./{asset_index}.tif",
+        "file:checksum": "1220" + "0" * 64,
+        **{
+            f"property{property_index}": property_index
+            for property_index in range(LARGE_ITEM_ASSET_PROPERTY_COUNT)
+        },
+    }
+    for asset_index in range(LARGE_ITEM_ASSET_COUNT)
+}
+LARGE_STAC_ITEM_JSON = dumps(LARGE_STAC_ITEM)
+
+
+def _validate_with_new_validator_per_file() -> None:
+    for _ in range(FILE_COUNT):
+        STACItemSchemaValidator().validate(STAC_ITEM)
+
+
+def _validate_with_shared_validator() -> None:
+    for _ in range(FILE_COUNT):
+        get_stac_validator(STAC_ITEM_TYPE).validate(STAC_ITEM)
+
+
+@mark.benchmark
+def should_validate_files_faster_with_shared_validator() -> None:
+    new_validator_seconds = min(repeat(_validate_with_new_validator_per_file, number=1, repeat=3))
+    shared_validator_seconds = min(repeat(_validate_with_shared_validator, number=1, repeat=3))
+
+    assert shared_validator_seconds < new_validator_seconds
+
+
+@mark.benchmark
+def should_validate_files_faster_with_compiled_validator() -> None:
+    jsonschema_validator = STACItemSchemaValidator()
+    compiled_validator = CompiledSTACValidator(jsonschema_validator)
+
+    def _validate_with_jsonschema() -> None:
+        for _ in range(FILE_COUNT):
+            jsonschema_validator.validate(STAC_ITEM)
+
+    def _validate_compiled() -> None:
+        for _ in range(FILE_COUNT):
+            compiled_validator.validate(STAC_ITEM)
+
+    jsonschema_seconds = min(repeat(_validate_with_jsonschema, number=1, repeat=3))
+    compiled_seconds = min(repeat(_validate_compiled, number=1, repeat=3))
+
+    assert compiled_seconds < jsonschema_seconds
+
+
+def should_accept_valid_objects_without_running_jsonschema_validator() -> None:
+    jsonschema_validator = STACItemSchemaValidator()
+    compiled_validator = CompiledSTACValidator(jsonschema_validator)
+
+    with patch.object(jsonschema_validator, "validate") as validate_mock:
+        for _ in range(FILE_COUNT):
+            compiled_validator.validate(STAC_ITEM)
+
+    validate_mock.assert_not_called()
+
+
+def _build_object_pair_by_pair(object_pairs: List[Tuple[str, Any]]) -> JsonObject:
+    result = {}
+    for key, value in object_pairs:
+        if key not in result:
+            result[key] = value
+    return result
+
+
+def _decode_with_pair_by_pair_hook() -> None:
+    loads(LARGE_STAC_ITEM_JSON, object_pairs_hook=_build_object_pair_by_pair)
+
+
+@mark.benchmark
+def should_decode_large_item_faster_than_pair_by_pair() -> None:
+    with patch("backend.check_stac_metadata.utils.processing_assets_model_with_meta"):
+        validator = STACDatasetValidator(MagicMock(), MagicMock())
+    object_pairs_hook = validator.duplicate_object_names_report_builder(any_s3_url())
+
+    def _decode_with_validator_hook() -> None:
+        loads(LARGE_STAC_ITEM_JSON, object_pairs_hook=object_pairs_hook)
+
+    # Alternate the measurements, so that both are equally affected by changing machine load
+    pair_by_pair_seconds = validator_seconds = inf
+    for _ in range(DECODE_REPEAT):
+        pair_by_pair_seconds = min(
+            pair_by_pair_seconds, timeit(_decode_with_pair_by_pair_hook, number=1)
+        )
+        validator_seconds = min(validator_seconds, timeit(_decode_with_validator_hook, number=1))
+
+    assert validator_seconds < pair_by_pair_seconds
+
+
+def should_reuse_validator_for_each_stac_type() -> None:
+    assert get_stac_validator(STAC_ITEM_TYPE) is get_stac_validator(STAC_ITEM_TYPE)
+
+
+def crawl_wide_catalog(item_count: int) -> Tuple[STACDatasetValidator, MagicMock]:
+    """Crawls a catalog with `item_count` items, all linking back to it"""
+    catalog_url = f"s3://{any_s3_bucket_name()}/catalog.json"
+    catalog = {
+        "type": "Catalog",
+        "links": [{"href": f"./items/{index}.json", "rel": "item"} for index in range(item_count)],
+    }
+
+    def read_url(url: str) -> StringIO:
+        if url == catalog_url:
+            return StringIO(dumps(catalog))
+
+        return StringIO(
+            dumps(
+                {
+                    "type": "Feature",
+                    "links": [
+                        {"href": "../catalog.json", "rel": "root"},
+                        {"href": "../catalog.json", "rel": "parent"},
+                        {"href": f"./{url.rsplit('/', 1)[-1]}", "rel": "self"},
+                    ],
+                }
+            )
+        )
+
+    url_reader = MagicMock(side_effect=read_url)
+    with patch("backend.check_stac_metadata.utils.processing_assets_model_with_meta"):
+        validator = STACDatasetValidator(url_reader, MagicMock())
+
+    validator.validate(catalog_url)
+
+    return validator, url_reader
+
+
+@patch("backend.check_stac_metadata.utils.get_stac_validator")
+def should_read_each_metadata_file_of_wide_catalog_once(
+    _get_stac_validator_mock: MagicMock,
+) -> None:
+    validator, url_reader = crawl_wide_catalog(WIDE_CATALOG_ITEM_COUNT)
+
+    assert len(validator.dataset_metadata) == WIDE_CATALOG_ITEM_COUNT + 1
+    assert url_reader.call_count == WIDE_CATALOG_ITEM_COUNT + 1
+
+
+@mark.benchmark
+@patch("backend.check_stac_metadata.utils.get_stac_validator")
+def should_crawl_wide_catalog_within_time_budget(_get_stac_validator_mock: MagicMock) -> None:
+    start = perf_counter()
+    validator, _ = crawl_wide_catalog(BENCHMARK_WIDE_CATALOG_ITEM_COUNT)
+    seconds = perf_counter() - start
+
+    assert len(validator.dataset_metadata) == BENCHMARK_WIDE_CATALOG_ITEM_COUNT + 1
+    assert seconds < WIDE_CATALOG_TIME_BUDGET_SECONDS
+
+
+@patch("backend.check_stac_metadata.utils.get_stac_validator")
+def should_crawl_link_chains_deeper_than_recursion_limit(
+    _get_stac_validator_mock: MagicMock,
+) -> None:
+    # Given a chain of catalogs, each linking to the next one and the first one
+    depth = getrecursionlimit() * 2
+    bucket_url = f"s3://{any_s3_bucket_name()}"
+
+    def url_reader(url: str) -> StreamingBody:
+        index = int(url.rsplit("/", 1)[-1].split(".")[0])
+        links = [{"href": "./0.json", "rel": "root"}]
+        if index < depth - 1:
+            links.append({"href": f"./{index + 1}.json", "rel": "child"})
+        contents = dumps({"type": "Catalog", "links": links}).encode()
+        return StreamingBody(BytesIO(contents), len(contents))
+
+    with patch("backend.check_stac_metadata.utils.processing_assets_model_with_meta"):
+        validator = STACDatasetValidator(url_reader, MagicMock())
+
+    validator.validate(f"{bucket_url}/0.json")
+
+    assert len(validator.dataset_metadata) == depth
+
+
+def write_processing_asset_rows(row_count: int, latency: float) -> InMemoryTableConnection:
+    """Writes `row_count` asset rows to a table which leaves some items unprocessed"""
+    table_name = any_table_name()
+    processing_assets_model = processing_assets_model_with_meta(table_name)
+    connection = InMemoryTableConnection(table_name, unprocessed_interval=1000, latency=latency)
+
+    with patch(
+        "backend.check_stac_metadata.utils.processing_assets_model_with_meta",
+        return_value=processing_assets_model,
+    ), patch.object(processing_assets_model, "_get_connection", return_value=connection):
+        validator = STACDatasetValidator(
+            MagicMock(), MagicMock(), write_concurrency=PROCESSING_ASSETS_WRITE_CONCURRENCY
+        )
+        validator.dataset_assets = [
+            {"url": f"s3://{any_s3_bucket_name()}/{index}", "multihash": "1220"}
+            for index in range(row_count)
+        ]
+
+        with patch.object(validator, "validate_urls", return_value=[]):
+            validator.run(any_s3_url(), "any hash key")
+
+    return connection
+
+
+def should_write_processing_asset_rows_in_full_batches() -> None:
+    connection = write_processing_asset_rows(PROCESSING_ASSET_ROW_COUNT, latency=0)
+
+    # Each asset row is written along with its URL lookup row, and then the checksum progress row
+    written_row_count = 2 * PROCESSING_ASSET_ROW_COUNT
+    assert len(connection.items) == written_row_count + 1
+    assert max(connection.batch_sizes) == BATCH_WRITE_ITEM_LIMIT
+    # Only the unprocessed items are sent again
+    assert sum(connection.batch_sizes) == written_row_count + len(connection.unprocessed_keys)
+
+
+@mark.benchmark
+def should_write_processing_asset_rows_within_time_budget() -> None:
+    start = perf_counter()
+    connection = write_processing_asset_rows(
+        BENCHMARK_PROCESSING_ASSET_ROW_COUNT, latency=BATCH_WRITE_ITEM_LATENCY_SECONDS
+    )
+    seconds = perf_counter() - start
+
+    assert len(connection.items) == BENCHMARK_PROCESSING_ASSET_ROW_COUNT
+    assert seconds < PROCESSING_ASSETS_WRITE_TIME_BUDGET_SECONDS
@@ -0,0 +1,61 @@
+from backend.check_stac_metadata.checksum_jobs import (
+    ASSET_OVERHEAD_SIZE,
+    UNDECLARED_ASSET_SIZE,
+    pack_checksum_jobs,
+)
+from backend.check_stac_metadata.utils import get_planned_asset_size
+from backend.processing_assets_model import ProcessingAssetType, processing_assets_model_with_meta
+
+from .aws_utils import any_s3_url, any_table_name
+from .stac_generators import any_dataset_id
+
+
+def should_pack_small_assets_into_one_job() -> None:
+    assert pack_checksum_jobs([2048, 1, 0, 4096]) == [[0, 1, 2, 3]]
+
+
+def should_plan_zero_jobs_for_dataset_without_assets() -> None:
+    assert not pack_checksum_jobs([])
+
+
+def should_give_asset_larger_than_target_size_a_job_of_its_own() -> None:
+    target_size = 10 * ASSET_OVERHEAD_SIZE
+    large_asset_size = 3 * target_size
+
+    jobs = pack_checksum_jobs([1, large_asset_size, 1, 1], target_size)
+
+    assert [1] in jobs
+    assert sorted(index for job in jobs for index in job) == [0, 1, 2, 3]
+
+
+def should_balance_bytes_between_jobs() -> None:
+    asset_sizes = [(index * 7_919) % 50 * ASSET_OVERHEAD_SIZE for index in range(200)]
+    target_size = 200 * ASSET_OVERHEAD_SIZE
+
+    jobs = pack_checksum_jobs(asset_sizes, target_size)
+
+    job_costs = [sum(asset_sizes[index] + ASSET_OVERHEAD_SIZE for index in job) for job in jobs]
+    assert len(jobs) == -(-sum(asset_sizes + [ASSET_OVERHEAD_SIZE] * 200) // target_size)
+    assert max(job_costs) - min(job_costs) <= max(asset_sizes) + ASSET_OVERHEAD_SIZE
+
+
+def should_limit_assets_per_job() -> None:
+    jobs = pack_checksum_jobs([0] * 7, max_item_count=3)
+
+    assert sorted(len(job) for job in jobs) == [2, 2, 3]
+
+
+def should_estimate_size_the_metadata_does_not_declare() -> None:
+    processing_assets_model = processing_assets_model_with_meta(any_table_name())
+
+    assert [
+        get_planned_asset_size(
+            processing_assets_model(
+                hash_key=any_dataset_id(),
+                range_key=f"{ProcessingAssetType.DATA.value}#{index}",
+                url=any_s3_url(),
+                size=size,
+            )
+        )
+        for index, size in enumerate([2, None])
+    ] == [2, UNDECLARED_ASSET_SIZE]
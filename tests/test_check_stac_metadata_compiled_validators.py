@@ -0,0 +1,186 @@
+from copy import deepcopy
+from functools import lru_cache
+from glob import glob
+from json import load
+from os.path import join
+from typing import Any, Iterator, List, Tuple
+from unittest.mock import patch
+
+from fastjsonschema import JsonSchemaDefinitionException  # type: ignore[import]
+from fastjsonschema.draft07 import CodeGeneratorDraft07  # type: ignore[import]
+from jsonschema import ValidationError  # type: ignore[import]
+from pytest import raises
+from pytest_subtests import SubTests  # type: ignore[import]
+
+from backend.check_stac_metadata.stac_validators import (
+    SCRIPT_DIR,
+    CompiledSTACValidator,
+    STACValidatorBackend,
+    build_stac_validator,
+)
+from backend.check_stac_metadata.utils import (
+    STAC_ITEM_TYPE,
+    STAC_TYPE_VALIDATION_MAP,
+    get_bundled_stac_extensions,
+)
+from backend.types import JsonObject
+
+from .stac_objects import (
+    MINIMAL_VALID_STAC_CATALOG_OBJECT,
+    MINIMAL_VALID_STAC_COLLECTION_OBJECT,
+    MINIMAL_VALID_STAC_ITEM_OBJECT,
+)
+
+EO_EXTENSION = "https://stac-extensions.github.io/eo/v1.0.0/schema.json"
+PROJECTION_EXTENSION = "https://stac-extensions.github.io/projection/v1.0.0/schema.json"
+
+WRONG_TYPE_VALUES: List[Any] = [None, True, 1, "text", [], {}]
+
+STAC_SPEC_EXAMPLE_GLOBS = ["stac-spec/examples/*.json", "stac-spec/*-spec/examples/*.json"]
+
+
+def _get_stac_spec_examples() -> Iterator[JsonObject]:
+    for pattern in STAC_SPEC_EXAMPLE_GLOBS:
+        for path in sorted(glob(join(SCRIPT_DIR, pattern))):
+            with open(path, encoding="utf-8") as file_pointer:
+                yield load(file_pointer)
+
+
+def _get_invalid_variants(stac_object: JsonObject) -> Iterator[JsonObject]:
+    for key in stac_object:
+        missing_key_object = deepcopy(stac_object)
+        missing_key_object.pop(key)
+        yield missing_key_object
+
+        for value in WRONG_TYPE_VALUES:
+            wrong_type_object = deepcopy(stac_object)
+            wrong_type_object[key] = value
+            yield wrong_type_object
+
+
+def _get_differential_corpus() -> Iterator[JsonObject]:
+    for stac_object in [
+        MINIMAL_VALID_STAC_CATALOG_OBJECT,
+        MINIMAL_VALID_STAC_COLLECTION_OBJECT,
+        MINIMAL_VALID_STAC_ITEM_OBJECT,
+        *_get_stac_spec_examples(),
+    ]:
+        yield deepcopy(stac_object)
+        yield from _get_invalid_variants(stac_object)
+
+    invalid_datetime_collection = deepcopy(MINIMAL_VALID_STAC_COLLECTION_OBJECT)
+    invalid_datetime_collection["extent"]["temporal"]["interval"][0][0] = "2021-02-30T00:00:00Z"
+    yield invalid_datetime_collection
+
+    for cloud_cover in [0, 12.5, 100, -1, 101, "cloudy"]:
+        for epsg in [2193, None, "2193"]:
+            extension_item = deepcopy(MINIMAL_VALID_STAC_ITEM_OBJECT)
+            extension_item["stac_extensions"] = [EO_EXTENSION, PROJECTION_EXTENSION]
+            extension_item["properties"]["eo:cloud_cover"] = cloud_cover
+            extension_item["properties"]["proj:epsg"] = epsg
+            yield extension_item
+
+
+@lru_cache
+def _build_compiled_validator(
+    stac_type: str, stac_extensions: Tuple[str, ...]
+) -> CompiledSTACValidator:
+    validator = build_stac_validator(
+        STAC_TYPE_VALIDATION_MAP[stac_type](stac_extensions), STACValidatorBackend.COMPILED
+    )
+    assert isinstance(validator, CompiledSTACValidator)
+    return validator
+
+
+def _get_compiled_validator(stac_object: JsonObject) -> CompiledSTACValidator:
+    return _build_compiled_validator(stac_object["type"], get_bundled_stac_extensions(stac_object))
+
+
+def should_agree_with_jsonschema_on_differential_corpus(subtests: SubTests) -> None:
+    for index, stac_object in enumerate(_get_differential_corpus()):
+        if not isinstance(stac_object.get("type"), str):
+            continue
+        if stac_object["type"] not in STAC_TYPE_VALIDATION_MAP:
+            continue
+        if not isinstance(stac_object.get("stac_extensions", []), list):
+            continue
+
+        with subtests.test(msg=f"{index}: {stac_object}"):
+            compiled_validator = _get_compiled_validator(stac_object)
+
+            assert compiled_validator.is_valid_compiled(
+                stac_object
+            ) == compiled_validator.validator.is_valid(stac_object)
+
+
+def should_report_same_failure_as_jsonschema() -> None:
+    stac_object = deepcopy(MINIMAL_VALID_STAC_COLLECTION_OBJECT)
+    stac_object["extent"]["temporal"]["interval"][0][0] = "not a datetime"
+    compiled_validator = _get_compiled_validator(stac_object)
+
+    with raises(ValidationError) as jsonschema_error:
+        compiled_validator.validator.validate(stac_object)
+    with raises(ValidationError) as compiled_error:
+        compiled_validator.validate(stac_object)
+
+    assert str(compiled_error.value) == str(jsonschema_error.value)
+
+
+def should_validate_with_jsonschema_when_schemas_use_uncompiled_keyword() -> None:
+    stac_object = deepcopy(MINIMAL_VALID_STAC_ITEM_OBJECT)
+    stac_object.pop("id")
+
+    with patch(
+        "backend.check_stac_metadata.stac_validators.UNCOMPILED_KEYWORDS",
+        frozenset(["required"]),
+    ):
+        compiled_validator = build_stac_validator(
+            STAC_TYPE_VALIDATION_MAP[STAC_ITEM_TYPE](), STACValidatorBackend.COMPILED
+        )
+
+    assert isinstance(compiled_validator, CompiledSTACValidator)
+    assert compiled_validator.compiled_validate is None
+    with raises(ValidationError):
+        compiled_validator.validate(stac_object)
+
+
+def should_validate_with_jsonschema_when_schemas_fail_to_compile() -> None:
+    stac_object = deepcopy(MINIMAL_VALID_STAC_ITEM_OBJECT)
+    stac_object.pop("id")
+
+    with patch(
+        "backend.check_stac_metadata.stac_validators.fastjsonschema.compile",
+        side_effect=JsonSchemaDefinitionException("unsupported"),
+    ):
+        compiled_validator = build_stac_validator(
+            STAC_TYPE_VALIDATION_MAP[STAC_ITEM_TYPE](), STACValidatorBackend.COMPILED
+        )
+
+    assert isinstance(compiled_validator, CompiledSTACValidator)
+    assert compiled_validator.compiled_validate is None
+    with raises(ValidationError):
+        compiled_validator.validate(stac_object)
+
+
+def should_check_every_format_with_jsonschema_format_checker(subtests: SubTests) -> None:
+    with patch(
+        "backend.check_stac_metadata.stac_validators.fastjsonschema.compile"
+    ) as compile_mock:
+        compiled_validator = build_stac_validator(
+            STAC_TYPE_VALIDATION_MAP[STAC_ITEM_TYPE](), STACValidatorBackend.COMPILED
+        )
+
+    assert isinstance(compiled_validator, CompiledSTACValidator)
+    format_checker = compiled_validator.validator.format_checker
+    formats = compile_mock.call_args.kwargs["formats"]
+    assert {*CodeGeneratorDraft07.FORMAT_REGEXS, "regex"} <= set(formats)
+    for format_name, conforms in formats.items():
+        for instance in ["", "text", "2021-02-30T00:00:00Z", "https://example.com/ a", "[a-"]:
+            with subtests.test(msg=f"{format_name}: {instance}"):
+                assert conforms(instance) == format_checker.conforms(instance, format_name)
+
+
+def should_select_jsonschema_backend() -> None:
+    validator = STAC_TYPE_VALIDATION_MAP[STAC_ITEM_TYPE]()
+
+    assert build_stac_validator(validator, STACValidatorBackend.JSONSCHEMA) is validator
@@ -0,0 +1,898 @@
+from copy import deepcopy
+from io import StringIO
+from typing import Any, Dict, List
+from unittest.mock import MagicMock, patch
+
+from pytest_subtests import SubTests  # type: ignore[import]
+
+from backend.check import Check
+from backend.check_stac_metadata.task import MAX_CRAWL_SHARD_COUNT, lambda_handler
+from backend.check_stac_metadata.utils import (
+    CRAWL_FRONTIER_PREFIX,
+    CRAWL_SHARD_PREFIX,
+    STACDatasetValidator,
+)
+from backend.processing_assets_model import (
+    CHECKSUM_JOB_PREFIX,
+    CHECKSUM_PROGRESS_RANGE_KEY,
+    VERSION_SUMMARY_RANGE_KEY,
+    ProcessingAssetType,
+    processing_assets_model_with_meta,
+)
+from backend.step_function_event_keys import (
+    CRAWL_KEY,
+    CRAWL_PASSES_KEY,
+    CRAWL_SHARDS_KEY,
+    CRAWL_SHARD_KEY,
+    DATASET_ID_KEY,
+    METADATA_URL_KEY,
+    MORE_TO_CRAWL_KEY,
+    PIPELINED_KEY,
+    VERSION_ID_KEY,
+)
+
+from .aws_utils import (
+    InMemoryTableConnection,
+    MockJSONURLReader,
+    MockValidationResultFactory,
+    any_lambda_context,
+    any_s3_url,
+    any_table_name,
+)
+from .general_generators import any_safe_filename
+from .stac_generators import (
+    any_asset_name,
+    any_dataset_id,
+    any_dataset_version_id,
+    any_hex_multihash,
+)
+from .stac_objects import MINIMAL_VALID_STAC_CATALOG_OBJECT, MINIMAL_VALID_STAC_ITEM_OBJECT
+
+
+@patch("backend.check_stac_metadata.task.get_param")
+@patch("backend.check_stac_metadata.task.STACDatasetValidator.run_shard")
+def should_crawl_given_shard(run_shard_mock: MagicMock, get_param_mock: MagicMock) -> None:
+    get_param_mock.return_value = any_table_name()
+    dataset_id = any_dataset_id()
+    version_id = any_dataset_version_id()
+    shard = 3
+    metadata_url = any_s3_url()
+
+    run_shard_mock.return_value = True
+
+    with patch("backend.check_stac_metadata.utils.processing_assets_model_with_meta"):
+        response = lambda_handler(
+            {
+                DATASET_ID_KEY: dataset_id,
+                VERSION_ID_KEY: version_id,
+                METADATA_URL_KEY: metadata_url,
+                CRAWL_SHARD_KEY: shard,
+                CRAWL_KEY: {CRAWL_PASSES_KEY: 2},
+            },
+            any_lambda_context(),
+        )
+
+    run_shard_mock.assert_called_once_with(
+        f"DATASET#{dataset_id}#VERSION#{version_id}", shard, metadata_url
+    )
+    assert response == {MORE_TO_CRAWL_KEY: True, CRAWL_PASSES_KEY: 3}
+
+
+@patch("backend.check_stac_metadata.task.get_param")
+@patch("backend.check_stac_metadata.task.STACDatasetValidator.merge_shards")
+def should_merge_given_shards(merge_shards_mock: MagicMock, get_param_mock: MagicMock) -> None:
+    get_param_mock.return_value = any_table_name()
+    dataset_id = any_dataset_id()
+    version_id = any_dataset_version_id()
+    shards = [0, 1, 2]
+    metadata_url = any_s3_url()
+
+    with patch("backend.check_stac_metadata.utils.processing_assets_model_with_meta"):
+        lambda_handler(
+            {
+                DATASET_ID_KEY: dataset_id,
+                VERSION_ID_KEY: version_id,
+                METADATA_URL_KEY: metadata_url,
+                CRAWL_SHARDS_KEY: shards,
+            },
+            any_lambda_context(),
+        )
+
+    merge_shards_mock.assert_called_once_with(
+        f"DATASET#{dataset_id}#VERSION#{version_id}", shards, metadata_url
+    )
+
+
+@patch("backend.check_stac_metadata.task.get_param")
+@patch("backend.check_stac_metadata.task.STACDatasetValidator.merge_finished_shards")
+def should_merge_finished_shards_when_pipelined(
+    merge_finished_shards_mock: MagicMock, get_param_mock: MagicMock
+) -> None:
+    get_param_mock.return_value = any_table_name()
+    dataset_id = any_dataset_id()
+    version_id = any_dataset_version_id()
+    shards = [0, 1, 2]
+    metadata_url = any_s3_url()
+
+    with patch("backend.check_stac_metadata.utils.processing_assets_model_with_meta"):
+        lambda_handler(
+            {
+                DATASET_ID_KEY: dataset_id,
+                VERSION_ID_KEY: version_id,
+                METADATA_URL_KEY: metadata_url,
+                CRAWL_SHARDS_KEY: shards,
+                PIPELINED_KEY: True,
+            },
+            any_lambda_context(),
+        )
+
+    merge_finished_shards_mock.assert_called_once_with(
+        f"DATASET#{dataset_id}#VERSION#{version_id}", shards, metadata_url
+    )
+
+
+def should_leave_frontier_beyond_limit_unvisited() -> None:
+    # Given a catalog linking to more items than the frontier limit
+    base_url = any_s3_url()
+    catalog_url = f"{base_url}/{any_safe_filename()}"
+    item_urls = [f"{base_url}/{any_safe_filename()}" for _ in range(5)]
+    catalog_stac_object = deepcopy(MINIMAL_VALID_STAC_CATALOG_OBJECT)
+    catalog_stac_object["links"] = [{"href": item_url, "rel": "item"} for item_url in item_urls]
+    url_reader = MockJSONURLReader({catalog_url: catalog_stac_object})
+
+    with patch("backend.check_stac_metadata.utils.processing_assets_model_with_meta"):
+        validator = STACDatasetValidator(
+            url_reader, MockValidationResultFactory(), frontier_limit=3
+        )
+
+        # When
+        unvisited_urls = validator.validate(catalog_url)
+
+    # Then the catalog is left to follow its other links later
+    assert unvisited_urls == [*((item_url, 0) for item_url in item_urls[:3]), (catalog_url, 3)]
+    assert validator.dataset_metadata == [{"url": catalog_url}]
+
+
+def should_leave_frontier_unvisited_once_time_budget_is_spent() -> None:
+    # Given a catalog linking to some items
+    base_url = any_s3_url()
+    catalog_url = f"{base_url}/{any_safe_filename()}"
+    item_urls = [f"{base_url}/{any_safe_filename()}" for _ in range(3)]
+    catalog_stac_object = deepcopy(MINIMAL_VALID_STAC_CATALOG_OBJECT)
+    catalog_stac_object["links"] = [{"href": item_url, "rel": "item"} for item_url in item_urls]
+    url_reader = MockJSONURLReader({catalog_url: catalog_stac_object})
+
+    with patch("backend.check_stac_metadata.utils.processing_assets_model_with_meta"):
+        validator = STACDatasetValidator(url_reader, MockValidationResultFactory(), time_budget=0)
+
+        # When
+        unvisited_urls = validator.validate(catalog_url)
+
+    # Then only the first metadata file is validated
+    assert unvisited_urls == [(item_url, 0) for item_url in item_urls]
+    assert validator.dataset_metadata == [{"url": catalog_url}]
+
+
+def should_split_crawl_frontier_into_at_most_max_shard_count_shards() -> None:
+    # Given a catalog linking to more items than fit in the maximum number of shards
+    base_url = any_s3_url()
+    catalog_url = f"{base_url}/{any_safe_filename()}"
+    item_urls = [f"{base_url}/{any_safe_filename()}" for _ in range(10)]
+    catalog_stac_object = deepcopy(MINIMAL_VALID_STAC_CATALOG_OBJECT)
+    catalog_stac_object["links"] = [{"href": item_url, "rel": "item"} for item_url in item_urls]
+
+    hash_key = f"DATASET#{any_dataset_id()}#VERSION#{any_dataset_version_id()}"
+    table_name = any_table_name()
+    processing_assets_model = processing_assets_model_with_meta(table_name)
+    connection = InMemoryTableConnection(table_name)
+
+    with patch(
+        "backend.check_stac_metadata.utils.processing_assets_model_with_meta",
+        return_value=processing_assets_model,
+    ), patch.object(processing_assets_model, "_get_connection", return_value=connection):
+        coordinator = STACDatasetValidator(
+            MockJSONURLReader({catalog_url: catalog_stac_object}),
+            MockValidationResultFactory(),
+            frontier_limit=len(item_urls),
+        )
+
+        # When
+        shards = coordinator.save_crawl_frontier(
+            catalog_url, coordinator.run(catalog_url, hash_key), 2, 3
+        )
+
+    # Then
+    assert shards == [0, 1, 2]
+    assert [
+        [
+            connection.items[(hash_key, f"{CRAWL_FRONTIER_PREFIX}#{shard}#{index}")]["url"]["S"]
+            for index in range(len(shard_item_urls))
+        ]
+        for shard, shard_item_urls in enumerate([item_urls[:3], item_urls[3:6], item_urls[6:]])
+    ] == [item_urls[:3], item_urls[3:6], item_urls[6:]]
+
+
+def should_crawl_shard_in_passes_which_hand_the_rest_of_their_frontier_back(
+    subtests: SubTests,
+) -> None:
+    # pylint: disable=too-many-locals
+    # Given a catalog linking to catalogs which each link to items with an asset of their own
+    base_url = any_s3_url()
+    catalog_url = f"{base_url}/{any_safe_filename()}"
+    child_catalog_urls = [f"{base_url}/{any_safe_filename()}" for _ in range(3)]
+    item_urls = [f"{base_url}/{any_safe_filename()}" for _ in range(2 * len(child_catalog_urls))]
+
+    catalog_stac_object = deepcopy(MINIMAL_VALID_STAC_CATALOG_OBJECT)
+    catalog_stac_object["links"] = [{"href": url, "rel": "child"} for url in child_catalog_urls]
+    url_to_json = {catalog_url: catalog_stac_object}
+    for index, child_catalog_url in enumerate(child_catalog_urls):
+        child_catalog_stac_object = deepcopy(MINIMAL_VALID_STAC_CATALOG_OBJECT)
+        child_catalog_stac_object["links"] = [
+            {"href": item_url, "rel": "item"} for item_url in item_urls[2 * index : 2 * index + 2]
+        ]
+        url_to_json[child_catalog_url] = child_catalog_stac_object
+    for item_url in item_urls:
+        item_stac_object = deepcopy(MINIMAL_VALID_STAC_ITEM_OBJECT)
+        item_stac_object["assets"] = {
+            any_asset_name(): {"href": any_s3_url(), "file:checksum": any_hex_multihash()}
+        }
+        url_to_json[item_url] = item_stac_object
+
+    hash_key = f"DATASET#{any_dataset_id()}#VERSION#{any_dataset_version_id()}"
+    table_name = any_table_name()
+    processing_assets_model = processing_assets_model_with_meta(table_name)
+    connection = InMemoryTableConnection(table_name)
+
+    with patch(
+        "backend.check_stac_metadata.utils.processing_assets_model_with_meta",
+        return_value=processing_assets_model,
+    ), patch.object(processing_assets_model, "_get_connection", return_value=connection):
+
+        def get_validator(frontier_limit: int) -> STACDatasetValidator:
+            return STACDatasetValidator(
+                MockJSONURLReader(url_to_json),
+                MockValidationResultFactory(),
+                frontier_limit=frontier_limit,
+            )
+
+        coordinator = get_validator(1)
+        shards = coordinator.save_crawl_frontier(
+            catalog_url, coordinator.run(catalog_url, hash_key), 10, MAX_CRAWL_SHARD_COUNT
+        )
+
+        # When the shard crawls in passes until it has nothing more to crawl
+        pass_count = 1
+        while get_validator(2).run_shard(hash_key, 0, catalog_url):
+            pass_count += 1
+        while get_validator(2).merge_shards(hash_key, shards, catalog_url):
+            pass
+
+    # Then
+    with subtests.test(msg="Several passes"):
+        assert pass_count > 1
+
+    with subtests.test(msg="Metadata"):
+        assert sorted(
+            connection.items[(hash_key, f"{ProcessingAssetType.METADATA.value}#{index}")]["url"][
+                "S"
+            ]
+            for index in range(len(url_to_json))
+        ) == sorted(url_to_json)
+
+    with subtests.test(msg="Version summary"):
+        assert connection.items[(hash_key, VERSION_SUMMARY_RANGE_KEY)]["asset_count"] == {
+            "N": str(len(item_urls))
+        }
+
+    with subtests.test(msg="Shard rows deleted"):
+        assert not [
+            range_key
+            for _, range_key in connection.items
+            if range_key.startswith((CRAWL_FRONTIER_PREFIX, CRAWL_SHARD_PREFIX))
+        ]
+
+
+def should_merge_crawl_shards_deterministically(subtests: SubTests) -> None:
+    # pylint: disable=too-many-locals
+    # Given a catalog whose items share an asset and link to a common item
+    base_url = any_s3_url()
+    catalog_url = f"{base_url}/{any_safe_filename()}"
+    common_item_url = f"{base_url}/{any_safe_filename()}"
+    item_urls = [f"{base_url}/{any_safe_filename()}" for _ in range(5)]
+    common_asset_url = f"{base_url}/{any_safe_filename()}"
+    common_asset_multihash = any_hex_multihash()
+    asset_urls = [f"{base_url}/{any_safe_filename()}" for _ in item_urls]
+
+    catalog_stac_object = deepcopy(MINIMAL_VALID_STAC_CATALOG_OBJECT)
+    catalog_stac_object["links"] = [{"href": item_url, "rel": "item"} for item_url in item_urls]
+    common_item_stac_object = deepcopy(MINIMAL_VALID_STAC_ITEM_OBJECT)
+    common_item_stac_object["assets"] = {}
+    url_to_json = {catalog_url: catalog_stac_object, common_item_url: common_item_stac_object}
+    for item_url, asset_url in zip(item_urls, asset_urls):
+        item_stac_object = deepcopy(MINIMAL_VALID_STAC_ITEM_OBJECT)
+        item_stac_object["assets"] = {
+            any_asset_name(): {
+                "href": asset_url,
+                "file:checksum": any_hex_multihash(),
+                "file:size": 10,
+            },
+            any_asset_name(): {
+                "href": common_asset_url,
+                "file:checksum": common_asset_multihash,
+                "file:size": 1,
+            },
+        }
+        item_stac_object["links"] = [
+            {"href": catalog_url, "rel": "root"},
+            {"href": common_item_url, "rel": "related"},
+        ]
+        url_to_json[item_url] = item_stac_object
+
+    hash_key = f"DATASET#{any_dataset_id()}#VERSION#{any_dataset_version_id()}"
+    table_name = any_table_name()
+    processing_assets_model = processing_assets_model_with_meta(table_name)
+    connection = InMemoryTableConnection(table_name)
+
+    with patch(
+        "backend.check_stac_metadata.utils.processing_assets_model_with_meta",
+        return_value=processing_assets_model,
+    ), patch.object(processing_assets_model, "_get_connection", return_value=connection):
+
+        def get_validator() -> STACDatasetValidator:
+            return STACDatasetValidator(
+                MockJSONURLReader(url_to_json), MockValidationResultFactory()
+            )
+
+        coordinator = STACDatasetValidator(
+            MockJSONURLReader(url_to_json), MockValidationResultFactory(), frontier_limit=3
+        )
+        shards = coordinator.save_crawl_frontier(
+            catalog_url, coordinator.run(catalog_url, hash_key), 2, MAX_CRAWL_SHARD_COUNT
+        )
+
+        # When the shards finish in reverse order
+        for shard in reversed(shards):
+            get_validator().run_shard(hash_key, shard, catalog_url)
+        more_to_merge = get_validator().merge_shards(hash_key, shards, catalog_url)
+
+    # Then
+    with subtests.test(msg="Shards"):
+        assert shards == [0, 1]
+
+    with subtests.test(msg="Metadata"):
+        assert [
+            connection.items[(hash_key, f"{ProcessingAssetType.METADATA.value}#{index}")]["url"]
+            for index in range(len(url_to_json))
+        ] == [{"S": url} for url in [catalog_url, *item_urls[:2], common_item_url, *item_urls[2:]]]
+
+    with subtests.test(msg="Assets"):
+        assert [
+            connection.items[(hash_key, f"{ProcessingAssetType.DATA.value}#{index}")]["url"]
+            for index in range(len(asset_urls) + 1)
+        ] == [{"S": url} for url in [asset_urls[0], common_asset_url, *asset_urls[1:]]]
+
+    with subtests.test(msg="Version summary"):
+        version_summary = connection.items[(hash_key, VERSION_SUMMARY_RANGE_KEY)]
+        assert (
+            version_summary["url"],
+            version_summary["asset_count"],
+            version_summary["metadata_count"],
+            version_summary["total_asset_size"],
+            version_summary["checksum_job_count"],
+        ) == (
+            {"S": catalog_url},
+            {"N": str(len(asset_urls) + 1)},
+            {"N": str(len(url_to_json))},
+            {"N": str(10 * len(asset_urls) + 1)},
+            {"N": "1"},
+        )
+
+    with subtests.test(msg="Checksum jobs"):
+        checksum_job = connection.items[(hash_key, f"{CHECKSUM_JOB_PREFIX}#0")]
+        assert (checksum_job["item_indexes"], checksum_job["size"]) == (
+            {"L": [{"N": str(index)} for index in range(len(asset_urls) + 1)]},
+            {"N": str(10 * len(asset_urls) + 1)},
+        )
+
+    with subtests.test(msg="Merged in one call"):
+        assert not more_to_merge
+
+    with subtests.test(msg="Only merged rows, their lookups, checksum job, progress and summary"):
+        assert len(connection.items) == 2 * (len(url_to_json) + len(asset_urls) + 1) + 3
+
+
+def should_publish_checksum_jobs_of_finished_shards_while_others_are_crawling(
+    subtests: SubTests,
+) -> None:
+    # pylint: disable=too-many-locals
+    # Given a catalog with more items than the frontier limit, each with an asset of its own
+    base_url = any_s3_url()
+    catalog_url = f"{base_url}/{any_safe_filename()}"
+    item_urls = [f"{base_url}/{any_safe_filename()}" for _ in range(5)]
+    asset_urls = [f"{base_url}/{any_safe_filename()}" for _ in item_urls]
+
+    catalog_stac_object = deepcopy(MINIMAL_VALID_STAC_CATALOG_OBJECT)
+    catalog_stac_object["links"] = [{"href": item_url, "rel": "item"} for item_url in item_urls]
+    url_to_json = {catalog_url: catalog_stac_object}
+    for item_url, asset_url in zip(item_urls, asset_urls):
+        item_stac_object = deepcopy(MINIMAL_VALID_STAC_ITEM_OBJECT)
+        item_stac_object["assets"] = {
+            any_asset_name(): {
+                "href": asset_url,
+                "file:checksum": any_hex_multihash(),
+                "file:size": 10,
+            },
+        }
+        url_to_json[item_url] = item_stac_object
+
+    hash_key = f"DATASET#{any_dataset_id()}#VERSION#{any_dataset_version_id()}"
+    table_name = any_table_name()
+    processing_assets_model = processing_assets_model_with_meta(table_name)
+    connection = InMemoryTableConnection(table_name)
+
+    def get_published_checksum_job_count() -> int:
+        checksum_progress = connection.items[(hash_key, CHECKSUM_PROGRESS_RANGE_KEY)]
+        return int(checksum_progress["checksum_job_count"]["N"])
+
+    with patch(
+        "backend.check_stac_metadata.utils.processing_assets_model_with_meta",
+        return_value=processing_assets_model,
+    ), patch.object(processing_assets_model, "_get_connection", return_value=connection), patch(
+        "backend.check_stac_metadata.utils.CHECKSUM_WINDOW_SIZE", 2
+    ):
+
+        def get_validator() -> STACDatasetValidator:
+            return STACDatasetValidator(
+                MockJSONURLReader(url_to_json), MockValidationResultFactory()
+            )
+
+        coordinator = STACDatasetValidator(
+            MockJSONURLReader(url_to_json), MockValidationResultFactory(), frontier_limit=3
+        )
+        shards = coordinator.save_crawl_frontier(
+            catalog_url, coordinator.run(catalog_url, hash_key), 1, MAX_CRAWL_SHARD_COUNT
+        )
+
+        # When merging after each shard finishes, with the last shard finishing before the third
+        get_validator().merge_finished_shards(hash_key, shards, catalog_url)
+        job_counts = [get_published_checksum_job_count()]
+        for shard in [0, 1, 3, 2]:
+            get_validator().run_shard(hash_key, shard, catalog_url)
+            get_validator().merge_finished_shards(hash_key, shards, catalog_url)
+            job_counts.append(get_published_checksum_job_count())
+
+    # Then
+    with subtests.test(msg="Published checksum job counts"):
+        assert job_counts == [0, 0, 1, 1, 3]
+
+    with subtests.test(msg="Assets"):
+        assert [
+            connection.items[(hash_key, f"{ProcessingAssetType.DATA.value}#{index}")]["url"]
+            for index in range(len(asset_urls))
+        ] == [{"S": url} for url in asset_urls]
+
+    with subtests.test(msg="Checksum jobs"):
+        assert [
+            connection.items[(hash_key, f"{CHECKSUM_JOB_PREFIX}#{job_index}")]["item_indexes"]
+            for job_index in range(3)
+        ] == [
+            {"L": [{"N": str(index)} for index in item_indexes]}
+            for item_indexes in [[0, 1], [2, 3], [4]]
+        ]
+
+    with subtests.test(msg="Version summary"):
+        version_summary = connection.items[(hash_key, VERSION_SUMMARY_RANGE_KEY)]
+        assert (version_summary["asset_count"], version_summary["checksum_job_count"]) == (
+            {"N": str(len(asset_urls))},
+            {"N": "3"},
+        )
+
+
+def should_leave_asset_out_of_checksum_jobs_when_conflict_is_found_after_it_was_written(
+    subtests: SubTests,
+) -> None:
+    # pylint: disable=too-many-locals
+    # Given two items referencing the same asset with different multihashes, and another asset
+    base_url = any_s3_url()
+    catalog_url = f"{base_url}/{any_safe_filename()}"
+    item_urls = [f"{base_url}/{any_safe_filename()}" for _ in range(2)]
+    conflicting_asset_url = f"{base_url}/{any_safe_filename()}"
+    other_asset_url = f"{base_url}/{any_safe_filename()}"
+
+    catalog_stac_object = deepcopy(MINIMAL_VALID_STAC_CATALOG_OBJECT)
+    catalog_stac_object["links"] = [{"href": item_url, "rel": "item"} for item_url in item_urls]
+    url_to_json = {catalog_url: catalog_stac_object}
+    for item_url, asset_urls in zip(
+        item_urls, [[conflicting_asset_url, other_asset_url], [conflicting_asset_url]]
+    ):
+        item_stac_object = deepcopy(MINIMAL_VALID_STAC_ITEM_OBJECT)
+        item_stac_object["assets"] = {
+            any_asset_name(): {"href": asset_url, "file:checksum": any_hex_multihash()}
+            for asset_url in asset_urls
+        }
+        url_to_json[item_url] = item_stac_object
+
+    hash_key = f"DATASET#{any_dataset_id()}#VERSION#{any_dataset_version_id()}"
+    table_name = any_table_name()
+    processing_assets_model = processing_assets_model_with_meta(table_name)
+    connection = InMemoryTableConnection(table_name)
+    validation_result_factory = MockValidationResultFactory()
+
+    with patch(
+        "backend.check_stac_metadata.utils.processing_assets_model_with_meta",
+        return_value=processing_assets_model,
+    ), patch.object(processing_assets_model, "_get_connection", return_value=connection):
+        # When the first item's assets are written before the second item is read
+        STACDatasetValidator(
+            MockJSONURLReader(url_to_json), validation_result_factory, flush_size=1
+        ).run(catalog_url, hash_key)
+        STACDatasetValidator(
+            MockJSONURLReader(url_to_json), MockValidationResultFactory()
+        ).merge_shards(hash_key, [], catalog_url)
+
+    # Then
+    with subtests.test(msg="Conflict reported"):
+        assert [
+            save_call.args[:2]
+            for save_call in validation_result_factory.save.mock_calls
+            if save_call.args[1] == Check.CONFLICTING_ASSET_CHECKSUM
+        ] == [(conflicting_asset_url, Check.CONFLICTING_ASSET_CHECKSUM)]
+
+    with subtests.test(msg="Written asset marked as conflicting"):
+        assert connection.items[(hash_key, f"{ProcessingAssetType.DATA.value}#0")][
+            "conflicting"
+        ] == {"BOOL": True}
+
+    with subtests.test(msg="Checksum jobs"):
+        assert connection.items[(hash_key, f"{CHECKSUM_JOB_PREFIX}#0")]["item_indexes"] == {
+            "L": [{"N": "1"}]
+        }
+        assert (hash_key, f"{CHECKSUM_JOB_PREFIX}#1") not in connection.items
+
+
+def should_delete_written_rows_when_crawl_fails() -> None:
+    # Given a catalog whose second item isn't valid JSON
+    base_url = any_s3_url()
+    catalog_url = f"{base_url}/{any_safe_filename()}"
+    item_urls = [f"{base_url}/{any_safe_filename()}" for _ in range(2)]
+    catalog_stac_object = deepcopy(MINIMAL_VALID_STAC_CATALOG_OBJECT)
+    catalog_stac_object["links"] = [{"href": item_url, "rel": "item"} for item_url in item_urls]
+    item_stac_object = deepcopy(MINIMAL_VALID_STAC_ITEM_OBJECT)
+    item_stac_object["assets"] = {
+        any_asset_name(): {"href": any_s3_url(), "file:checksum": any_hex_multihash()}
+    }
+    url_to_json = {
+        catalog_url: catalog_stac_object,
+        item_urls[0]: item_stac_object,
+        item_urls[1]: StringIO("{"),
+    }
+
+    hash_key = f"DATASET#{any_dataset_id()}#VERSION#{any_dataset_version_id()}"
+    table_name = any_table_name()
+    processing_assets_model = processing_assets_model_with_meta(table_name)
+    connection = InMemoryTableConnection(table_name)
+
+    with patch(
+        "backend.check_stac_metadata.utils.processing_assets_model_with_meta",
+        return_value=processing_assets_model,
+    ), patch.object(processing_assets_model, "_get_connection", return_value=connection):
+        # When the first item's rows are written before the second item is read
+        STACDatasetValidator(
+            MockJSONURLReader(url_to_json), MockValidationResultFactory(), flush_size=1
+        ).run(catalog_url, hash_key)
+
+    # Then
+    assert list(connection.items) == [(hash_key, CHECKSUM_PROGRESS_RANGE_KEY)]
+    assert connection.items[(hash_key, CHECKSUM_PROGRESS_RANGE_KEY)]["metadata_count"] == {"N": "0"}
+
+
+def should_discard_crawled_rows_instead_of_publishing_checksum_jobs_when_a_shard_fails(
+    subtests: SubTests,
+) -> None:
+    # pylint: disable=too-many-locals
+    # Given a catalog with more items than the frontier limit, one of which isn't valid JSON
+    base_url = any_s3_url()
+    catalog_url = f"{base_url}/{any_safe_filename()}"
+    item_urls = [f"{base_url}/{any_safe_filename()}" for _ in range(5)]
+
+    catalog_stac_object = deepcopy(MINIMAL_VALID_STAC_CATALOG_OBJECT)
+    catalog_stac_object["links"] = [{"href": item_url, "rel": "item"} for item_url in item_urls]
+    url_to_json: Dict[str, Any] = {catalog_url: catalog_stac_object}
+    for item_url in item_urls:
+        item_stac_object = deepcopy(MINIMAL_VALID_STAC_ITEM_OBJECT)
+        item_stac_object["assets"] = {
+            any_asset_name(): {"href": any_s3_url(), "file:checksum": any_hex_multihash()}
+        }
+        url_to_json[item_url] = item_stac_object
+    url_to_json[item_urls[3]] = StringIO("{")
+
+    hash_key = f"DATASET#{any_dataset_id()}#VERSION#{any_dataset_version_id()}"
+    table_name = any_table_name()
+    processing_assets_model = processing_assets_model_with_meta(table_name)
+    connection = InMemoryTableConnection(table_name)
+
+    with patch(
+        "backend.check_stac_metadata.utils.processing_assets_model_with_meta",
+        return_value=processing_assets_model,
+    ), patch.object(processing_assets_model, "_get_connection", return_value=connection):
+
+        def get_validator() -> STACDatasetValidator:
+            return STACDatasetValidator(
+                MockJSONURLReader(url_to_json), MockValidationResultFactory()
+            )
+
+        coordinator = STACDatasetValidator(
+            MockJSONURLReader(url_to_json), MockValidationResultFactory(), frontier_limit=3
+        )
+        shards = coordinator.save_crawl_frontier(
+            catalog_url, coordinator.run(catalog_url, hash_key), 2, MAX_CRAWL_SHARD_COUNT
+        )
+
+        # When every shard has run and the middle one failed
+        for shard in shards:
+            get_validator().run_shard(hash_key, shard, catalog_url)
+        while get_validator().merge_shards(hash_key, shards, catalog_url):
+            pass
+
+    # Then
+    with subtests.test(msg="Only progress and version summary left"):
+        assert sorted(connection.items) == sorted(
+            [(hash_key, CHECKSUM_PROGRESS_RANGE_KEY), (hash_key, VERSION_SUMMARY_RANGE_KEY)]
+        )
+
+    with subtests.test(msg="Failure recorded"):
+        assert connection.items[(hash_key, CHECKSUM_PROGRESS_RANGE_KEY)]["crawl_failed"] == {
+            "BOOL": True
+        }
+
+    with subtests.test(msg="No checksum jobs"):
+        assert connection.items[(hash_key, VERSION_SUMMARY_RANGE_KEY)]["checksum_job_count"] == {
+            "N": "0"
+        }
+
+
+def should_keep_published_checksum_jobs_when_a_later_shard_fails(subtests: SubTests) -> None:
+    # pylint: disable=too-many-locals
+    # Given a catalog with more items than the frontier limit, the last of which isn't valid JSON
+    base_url = any_s3_url()
+    catalog_url = f"{base_url}/{any_safe_filename()}"
+    item_urls = [f"{base_url}/{any_safe_filename()}" for _ in range(5)]
+    asset_urls = [f"{base_url}/{any_safe_filename()}" for _ in item_urls]
+
+    catalog_stac_object = deepcopy(MINIMAL_VALID_STAC_CATALOG_OBJECT)
+    catalog_stac_object["links"] = [{"href": item_url, "rel": "item"} for item_url in item_urls]
+    url_to_json: Dict[str, Any] = {catalog_url: catalog_stac_object}
+    for item_url, asset_url in zip(item_urls, asset_urls):
+        item_stac_object = deepcopy(MINIMAL_VALID_STAC_ITEM_OBJECT)
+        item_stac_object["assets"] = {
+            any_asset_name(): {"href": asset_url, "file:checksum": any_hex_multihash()}
+        }
+        url_to_json[item_url] = item_stac_object
+    url_to_json[item_urls[4]] = StringIO("{")
+
+    hash_key = f"DATASET#{any_dataset_id()}#VERSION#{any_dataset_version_id()}"
+    table_name = any_table_name()
+    processing_assets_model = processing_assets_model_with_meta(table_name)
+    connection = InMemoryTableConnection(table_name)
+
+    with patch(
+        "backend.check_stac_metadata.utils.processing_assets_model_with_meta",
+        return_value=processing_assets_model,
+    ), patch.object(processing_assets_model, "_get_connection", return_value=connection), patch(
+        "backend.check_stac_metadata.utils.CHECKSUM_WINDOW_SIZE", 2
+    ):
+
+        def get_validator() -> STACDatasetValidator:
+            return STACDatasetValidator(
+                MockJSONURLReader(url_to_json), MockValidationResultFactory()
+            )
+
+        coordinator = STACDatasetValidator(
+            MockJSONURLReader(url_to_json), MockValidationResultFactory(), frontier_limit=3
+        )
+        shards = coordinator.save_crawl_frontier(
+            catalog_url, coordinator.run(catalog_url, hash_key), 2, MAX_CRAWL_SHARD_COUNT
+        )
+
+        # When the first shards are merged and published before the last one fails
+        for shard in shards:
+            get_validator().run_shard(hash_key, shard, catalog_url)
+            get_validator().merge_finished_shards(hash_key, shards, catalog_url)
+        while get_validator().merge_finished_shards(hash_key, shards, catalog_url):
+            pass
+
+    # Then the last shard, which also follows the catalog's links beyond the frontier limit, is
+    # discarded
+    with subtests.test(msg="Published assets kept"):
+        assert [
+            connection.items[(hash_key, f"{ProcessingAssetType.DATA.value}#{index}")]["url"]
+            for index in range(2)
+        ] == [{"S": url} for url in asset_urls[:2]]
+        assert (hash_key, f"{ProcessingAssetType.DATA.value}#2") not in connection.items
+
+    with subtests.test(msg="Published checksum jobs kept"):
+        assert connection.items[(hash_key, f"{CHECKSUM_JOB_PREFIX}#0")]["item_indexes"] == {
+            "L": [{"N": "0"}, {"N": "1"}]
+        }
+        assert (hash_key, f"{CHECKSUM_JOB_PREFIX}#1") not in connection.items
+
+    with subtests.test(msg="Version summary"):
+        assert connection.items[(hash_key, VERSION_SUMMARY_RANGE_KEY)]["checksum_job_count"] == {
+            "N": "1"
+        }
+
+
+def should_merge_many_crawl_shards_a_page_at_a_time(subtests: SubTests) -> None:
+    # pylint: disable=too-many-locals
+    # Given a catalog crawled by many shards, whose items share an asset and have one of their own
+    base_url = any_s3_url()
+    catalog_url = f"{base_url}/{any_safe_filename()}"
+    item_urls = [f"{base_url}/{any_safe_filename()}" for _ in range(40)]
+    common_asset_url = f"{base_url}/{any_safe_filename()}"
+    common_asset_multihash = any_hex_multihash()
+    asset_urls = [f"{base_url}/{any_safe_filename()}" for _ in item_urls]
+
+    catalog_stac_object = deepcopy(MINIMAL_VALID_STAC_CATALOG_OBJECT)
+    catalog_stac_object["links"] = [{"href": item_url, "rel": "item"} for item_url in item_urls]
+    url_to_json = {catalog_url: catalog_stac_object}
+    for item_url, asset_url in zip(item_urls, asset_urls):
+        item_stac_object = deepcopy(MINIMAL_VALID_STAC_ITEM_OBJECT)
+        item_stac_object["assets"] = {
+            "own": {"href": asset_url, "file:checksum": any_hex_multihash(), "file:size": 1},
+            "common": {"href": common_asset_url, "file:checksum": common_asset_multihash},
+        }
+        url_to_json[item_url] = item_stac_object
+
+    hash_key = f"DATASET#{any_dataset_id()}#VERSION#{any_dataset_version_id()}"
+    table_name = any_table_name()
+    processing_assets_model = processing_assets_model_with_meta(table_name)
+    connection = InMemoryTableConnection(table_name)
+    merge_row_limit = 10
+
+    with patch(
+        "backend.check_stac_metadata.utils.processing_assets_model_with_meta",
+        return_value=processing_assets_model,
+    ), patch.object(processing_assets_model, "_get_connection", return_value=connection), patch(
+        "backend.check_stac_metadata.utils.MERGE_PAGE_SIZE", 4
+    ), patch(
+        "backend.check_stac_metadata.utils.MERGE_ROW_LIMIT", merge_row_limit
+    ), patch(
+        "backend.check_stac_metadata.utils.CHECKSUM_WINDOW_SIZE", 8
+    ):
+
+        def get_validator() -> STACDatasetValidator:
+            return STACDatasetValidator(
+                MockJSONURLReader(url_to_json), MockValidationResultFactory()
+            )
+
+        coordinator = STACDatasetValidator(
+            MockJSONURLReader(url_to_json),
+            MockValidationResultFactory(),
+            frontier_limit=len(item_urls),
+        )
+        shards = coordinator.save_crawl_frontier(
+            catalog_url, coordinator.run(catalog_url, hash_key), 2, MAX_CRAWL_SHARD_COUNT
+        )
+        for shard in shards:
+            get_validator().run_shard(hash_key, shard, catalog_url)
+
+        # When merging until there's nothing more to merge
+        read_counts = []
+        more_to_merge = True
+        while more_to_merge:
+            previous_read_count = connection.read_count
+            more_to_merge = get_validator().merge_shards(hash_key, shards, catalog_url)
+            read_counts.append(connection.read_count - previous_read_count)
+
+    # Then
+    with subtests.test(msg="Rows read by each merge call"):
+        assert len(shards) == 20
+        assert max(read_counts) <= 4 * merge_row_limit < sum(read_counts)
+
+    with subtests.test(msg="Metadata"):
+        assert [
+            connection.items[(hash_key, f"{ProcessingAssetType.METADATA.value}#{index}")]["url"]
+            for index in range(len(url_to_json))
+        ] == [{"S": url} for url in [catalog_url, *item_urls]]
+
+    with subtests.test(msg="Assets"):
+        assert [
+            connection.items[(hash_key, f"{ProcessingAssetType.DATA.value}#{index}")]["url"]
+            for index in range(len(asset_urls) + 1)
+        ] == [{"S": url} for url in [asset_urls[0], common_asset_url, *asset_urls[1:]]]
+
+    with subtests.test(msg="Checksum jobs"):
+        version_summary = connection.items[(hash_key, VERSION_SUMMARY_RANGE_KEY)]
+        assert sorted(
+            int(item_index["N"])
+            for job_index in range(int(version_summary["checksum_job_count"]["N"]))
+            for item_index in connection.items[(hash_key, f"{CHECKSUM_JOB_PREFIX}#{job_index}")][
+                "item_indexes"
+            ]["L"]
+        ) == list(range(len(asset_urls) + 1))
+
+    with subtests.test(msg="Version summary"):
+        assert (
+            version_summary["asset_count"],
+            version_summary["metadata_count"],
+            version_summary["total_asset_size"],
+        ) == (
+            {"N": str(len(asset_urls) + 1)},
+            {"N": str(len(url_to_json))},
+            {"N": str(len(asset_urls))},
+        )
+
+    with subtests.test(msg="Shard rows deleted"):
+        assert not [
+            range_key
+            for _, range_key in connection.items
+            if range_key.startswith((CRAWL_FRONTIER_PREFIX, CRAWL_SHARD_PREFIX))
+        ]
+
+
+def should_only_read_rows_of_newly_finished_shards_when_polling(subtests: SubTests) -> None:
+    # pylint: disable=too-many-locals
+    # Given a catalog crawled by a shard per item, each item with an asset of its own
+    base_url = any_s3_url()
+    catalog_url = f"{base_url}/{any_safe_filename()}"
+    item_urls = [f"{base_url}/{any_safe_filename()}" for _ in range(6)]
+
+    catalog_stac_object = deepcopy(MINIMAL_VALID_STAC_CATALOG_OBJECT)
+    catalog_stac_object["links"] = [{"href": item_url, "rel": "item"} for item_url in item_urls]
+    url_to_json: Dict[str, Any] = {catalog_url: catalog_stac_object}
+    for item_url in item_urls:
+        item_stac_object = deepcopy(MINIMAL_VALID_STAC_ITEM_OBJECT)
+        item_stac_object["assets"] = {
+            any_asset_name(): {"href": any_s3_url(), "file:checksum": any_hex_multihash()}
+        }
+        url_to_json[item_url] = item_stac_object
+
+    hash_key = f"DATASET#{any_dataset_id()}#VERSION#{any_dataset_version_id()}"
+    table_name = any_table_name()
+    processing_assets_model = processing_assets_model_with_meta(table_name)
+    connection = InMemoryTableConnection(table_name)
+
+    with patch(
+        "backend.check_stac_metadata.utils.processing_assets_model_with_meta",
+        return_value=processing_assets_model,
+    ), patch.object(processing_assets_model, "_get_connection", return_value=connection):
+
+        def get_validator() -> STACDatasetValidator:
+            return STACDatasetValidator(
+                MockJSONURLReader(url_to_json), MockValidationResultFactory()
+            )
+
+        def poll(shards: List[int]) -> int:
+            previous_read_count = connection.read_count
+            get_validator().merge_finished_shards(hash_key, shards, catalog_url)
+            return connection.read_count - previous_read_count
+
+        coordinator = STACDatasetValidator(
+            MockJSONURLReader(url_to_json),
+            MockValidationResultFactory(),
+            frontier_limit=len(item_urls),
+        )
+        shards = coordinator.save_crawl_frontier(
+            catalog_url, coordinator.run(catalog_url, hash_key), 1, MAX_CRAWL_SHARD_COUNT
+        )
+
+        # When polling after each shard finishes, and once more while the next one is crawling
+        merge_read_counts = []
+        idle_poll_read_counts = []
+        idle_poll_wrote = []
+        for shard in shards:
+            get_validator().run_shard(hash_key, shard, catalog_url)
+            merge_read_counts.append(poll(shards))
+            items_after_merge = deepcopy(connection.items)
+            idle_poll_read_counts.append(poll(shards))
+            idle_poll_wrote.append(connection.items != items_after_merge)
+
+    # Then
+    with subtests.test(msg="Merging a shard reads as many rows however many are merged"):
+        assert len(set(merge_read_counts[:-1])) == 1
+
+    with subtests.test(msg="Polling with no newly finished shard only reads the progress row"):
+        assert idle_poll_read_counts[:-1] == [1] * (len(shards) - 1)
+
+    with subtests.test(msg="Polling with no newly finished shard writes nothing"):
+        assert not any(idle_poll_wrote)
@@ -0,0 +1,93 @@
+from copy import deepcopy
+from unittest.mock import patch
+
+from jsonschema import RefResolutionError, ValidationError  # type: ignore[import]
+from pytest import raises
+from pytest_subtests import SubTests  # type: ignore[import]
+
+from backend.check_stac_metadata.stac_validators import (
+    STACItemSchemaValidator,
+    get_extension_schema_store,
+    refuse_remote_reference,
+)
+from backend.check_stac_metadata.utils import (
+    STAC_ITEM_TYPE,
+    get_bundled_stac_extensions,
+    get_stac_validator,
+)
+
+from .aws_utils import any_s3_url
+from .stac_objects import MINIMAL_VALID_STAC_ITEM_OBJECT
+
+EO_EXTENSION = "https://stac-extensions.github.io/eo/v1.0.0/schema.json"
+FILE_EXTENSION = "https://stac-extensions.github.io/file/v2.0.0/schema.json"
+PROJECTION_EXTENSION = "https://stac-extensions.github.io/projection/v1.0.0/schema.json"
+
+
+def should_bundle_checksum_projection_and_eo_extension_schemas() -> None:
+    assert {EO_EXTENSION, FILE_EXTENSION, PROJECTION_EXTENSION} <= set(get_extension_schema_store())
+
+
+def should_treat_item_with_valid_extension_fields_as_valid() -> None:
+    stac_object = deepcopy(MINIMAL_VALID_STAC_ITEM_OBJECT)
+    stac_object["stac_extensions"] = [EO_EXTENSION, FILE_EXTENSION, PROJECTION_EXTENSION]
+    stac_object["properties"]["eo:cloud_cover"] = 12.5
+    stac_object["properties"]["proj:epsg"] = 2193
+
+    STACItemSchemaValidator(get_bundled_stac_extensions(stac_object)).validate(stac_object)
+
+
+def should_detect_invalid_extension_field() -> None:
+    stac_object = deepcopy(MINIMAL_VALID_STAC_ITEM_OBJECT)
+    stac_object["stac_extensions"] = [EO_EXTENSION]
+    stac_object["properties"]["eo:cloud_cover"] = 101
+
+    with raises(ValidationError):
+        STACItemSchemaValidator(get_bundled_stac_extensions(stac_object)).validate(stac_object)
+
+
+def should_only_validate_against_bundled_extension_schemas() -> None:
+    stac_object = deepcopy(MINIMAL_VALID_STAC_ITEM_OBJECT)
+    stac_object["stac_extensions"] = [any_s3_url(), EO_EXTENSION, EO_EXTENSION]
+
+    assert get_bundled_stac_extensions(stac_object) == (EO_EXTENSION,)
+
+
+def should_leave_invalid_extension_list_to_core_schema(subtests: SubTests) -> None:
+    for stac_extensions, bundled_extensions in [
+        (5, ()),
+        ([1], ()),
+        ([EO_EXTENSION, None], (EO_EXTENSION,)),
+    ]:
+        stac_object = deepcopy(MINIMAL_VALID_STAC_ITEM_OBJECT)
+        stac_object["stac_extensions"] = stac_extensions
+
+        with subtests.test(msg=f"Bundled extensions of {stac_extensions}"):
+            assert get_bundled_stac_extensions(stac_object) == bundled_extensions
+
+        with subtests.test(msg=f"Core schema rejects {stac_extensions}"), raises(ValidationError):
+            STACItemSchemaValidator(bundled_extensions).validate(stac_object)
+
+
+def should_reuse_validator_for_each_extension_combination() -> None:
+    assert get_stac_validator(STAC_ITEM_TYPE, (EO_EXTENSION,)) is get_stac_validator(
+        STAC_ITEM_TYPE, (EO_EXTENSION,)
+    )
+
+
+def should_resolve_extension_schemas_without_network_access() -> None:
+    stac_object = deepcopy(MINIMAL_VALID_STAC_ITEM_OBJECT)
+    stac_object["stac_extensions"] = [PROJECTION_EXTENSION]
+    stac_object["properties"]["proj:epsg"] = None
+    stac_object["properties"]["proj:geometry"] = {"type": "Point", "coordinates": [174.8, -41.3]}
+
+    with patch("jsonschema.validators.urlopen") as urlopen_mock, patch("requests.get") as get_mock:
+        STACItemSchemaValidator(get_bundled_stac_extensions(stac_object)).validate(stac_object)
+
+    urlopen_mock.assert_not_called()
+    get_mock.assert_not_called()
+
+
+def should_refuse_to_download_schema() -> None:
+    with raises(RefResolutionError):
+        refuse_remote_reference("https://example.com/schema.json")
@@ -0,0 +1,153 @@
+from copy import deepcopy
+from datetime import timedelta
+from typing import Any, Dict
+from unittest.mock import MagicMock, call, patch
+
+from jsonschema import ValidationError  # type: ignore[import]
+from pytest import raises
+from pytest_subtests import SubTests  # type: ignore[import]
+
+from backend.check import Check
+from backend.check_stac_metadata.metadata_fingerprints import MetadataFingerprints
+from backend.check_stac_metadata.utils import STACDatasetValidator
+from backend.validation_results_model import ValidationResult
+
+from .aws_utils import (
+    InMemoryTableConnection,
+    MockJSONURLReader,
+    MockValidationResultFactory,
+    any_s3_url,
+    any_table_name,
+)
+from .stac_generators import any_dataset_id
+from .stac_objects import MINIMAL_VALID_STAC_ITEM_OBJECT
+
+
+def _validate_version(
+    url_to_json: Dict[str, Any],
+    metadata_fingerprints: MetadataFingerprints,
+    connection: InMemoryTableConnection,
+    stac_validator: MagicMock,
+) -> MockValidationResultFactory:
+    validation_result_factory = MockValidationResultFactory()
+    with patch("backend.check_stac_metadata.utils.processing_assets_model_with_meta"), patch(
+        "backend.check_stac_metadata.utils.get_stac_validator", return_value=stac_validator
+    ), patch.object(
+        metadata_fingerprints.metadata_fingerprint_model,
+        "_get_connection",
+        return_value=connection,
+    ):
+        validator = STACDatasetValidator(
+            MockJSONURLReader(url_to_json),
+            validation_result_factory,
+            metadata_fingerprints=metadata_fingerprints,
+        )
+        validator.run(next(iter(url_to_json)), any_dataset_id())
+    return validation_result_factory
+
+
+def should_skip_schema_validation_of_unchanged_metadata_file(subtests: SubTests) -> None:
+    # Given a metadata file which passed validation in the previous version
+    item_url = any_s3_url()
+    item_object = deepcopy(MINIMAL_VALID_STAC_ITEM_OBJECT)
+    connection = InMemoryTableConnection(any_table_name())
+    metadata_fingerprints = MetadataFingerprints(any_dataset_id(), connection.table_name)
+    _validate_version({item_url: item_object}, metadata_fingerprints, connection, MagicMock())
+    stac_validator = MagicMock()
+
+    # When validating the next version
+    validation_result_factory = _validate_version(
+        {item_url: item_object}, metadata_fingerprints, connection, stac_validator
+    )
+
+    # Then
+    with subtests.test(msg="Schema validation skipped"):
+        stac_validator.validate.assert_not_called()
+
+    with subtests.test(msg="Result carried forward"):
+        assert validation_result_factory.save.mock_calls == [
+            call(item_url, Check.JSON_SCHEMA, ValidationResult.PASSED)
+        ]
+
+
+def should_validate_changed_metadata_file() -> None:
+    item_url = any_s3_url()
+    connection = InMemoryTableConnection(any_table_name())
+    metadata_fingerprints = MetadataFingerprints(any_dataset_id(), connection.table_name)
+    _validate_version(
+        {item_url: deepcopy(MINIMAL_VALID_STAC_ITEM_OBJECT)},
+        metadata_fingerprints,
+        connection,
+        MagicMock(),
+    )
+    changed_item_object = deepcopy(MINIMAL_VALID_STAC_ITEM_OBJECT)
+    changed_item_object["properties"]["title"] = "Changed"
+    stac_validator = MagicMock()
+
+    _validate_version(
+        {item_url: changed_item_object}, metadata_fingerprints, connection, stac_validator
+    )
+
+    stac_validator.validate.assert_called_once_with(changed_item_object)
+
+
+def should_validate_unchanged_metadata_file_again_after_validator_upgrade() -> None:
+    item_url = any_s3_url()
+    item_object = deepcopy(MINIMAL_VALID_STAC_ITEM_OBJECT)
+    dataset_id = any_dataset_id()
+    connection = InMemoryTableConnection(any_table_name())
+    _validate_version(
+        {item_url: item_object},
+        MetadataFingerprints(dataset_id, connection.table_name, validator_version="1"),
+        connection,
+        MagicMock(),
+    )
+    stac_validator = MagicMock()
+
+    _validate_version(
+        {item_url: item_object},
+        MetadataFingerprints(dataset_id, connection.table_name, validator_version="2"),
+        connection,
+        stac_validator,
+    )
+
+    stac_validator.validate.assert_called_once_with(item_object)
+
+
+def should_validate_unchanged_metadata_file_again_after_fingerprint_expires() -> None:
+    item_url = any_s3_url()
+    item_object = deepcopy(MINIMAL_VALID_STAC_ITEM_OBJECT)
+    connection = InMemoryTableConnection(any_table_name())
+    metadata_fingerprints = MetadataFingerprints(
+        any_dataset_id(), connection.table_name, time_to_live=timedelta()
+    )
+    _validate_version({item_url: item_object}, metadata_fingerprints, connection, MagicMock())
+    stac_validator = MagicMock()
+
+    _validate_version({item_url: item_object}, metadata_fingerprints, connection, stac_validator)
+
+    stac_validator.validate.assert_called_once_with(item_object)
+
+
+def should_only_record_fingerprints_of_valid_metadata_files() -> None:
+    item_url = any_s3_url()
+    metadata_fingerprints = MetadataFingerprints(any_dataset_id(), any_table_name())
+    stac_validator = MagicMock()
+    stac_validator.validate.side_effect = ValidationError("invalid")
+
+    with patch("backend.check_stac_metadata.utils.processing_assets_model_with_meta"), patch(
+        "backend.check_stac_metadata.utils.get_stac_validator", return_value=stac_validator
+    ), patch.object(
+        metadata_fingerprints.metadata_fingerprint_model,
+        "_get_connection",
+        return_value=InMemoryTableConnection(any_table_name()),
+    ), raises(
+        ValidationError
+    ):
+        STACDatasetValidator(
+            MockJSONURLReader({item_url: deepcopy(MINIMAL_VALID_STAC_ITEM_OBJECT)}),
+            MockValidationResultFactory(),
+            metadata_fingerprints=metadata_fingerprints,
+        ).validate(item_url)
+
+    assert not metadata_fingerprints.passed
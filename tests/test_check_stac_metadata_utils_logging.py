@@ -62,7 +62,7 @@ def should_log_non_s3_url_prefix_validation() -> None:
         logger_mock.assert_any_call(expected_message)
 
 
-@patch("backend.check_stac_metadata.utils.STACDatasetValidator.validate")
+@patch("backend.check_stac_metadata.utils.STACDatasetValidator.validate_urls")
 def should_log_staging_access_validation(validate_mock: MagicMock) -> None:
     metadata_url = any_s3_url()
     hash_key = f"DATASET#{any_dataset_id()}#VERSION#{any_dataset_version_id()}"
@@ -84,7 +84,7 @@ def should_log_staging_access_validation(validate_mock: MagicMock) -> None:
         logger_mock.assert_any_call(expected_message)
 
 
-@patch("backend.check_stac_metadata.utils.STACDatasetValidator.validate")
+@patch("backend.check_stac_metadata.utils.STACDatasetValidator.validate_urls")
 def should_log_schema_mismatch_validation(validate_mock: MagicMock) -> None:
     metadata_url = any_s3_url()
     hash_key = f"DATASET#{any_dataset_id()}#VERSION#{any_dataset_version_id()}"
@@ -104,7 +104,7 @@ def should_log_schema_mismatch_validation(validate_mock: MagicMock) -> None:
         logger_mock.assert_any_call(expected_message)
 
 
-@patch("backend.check_stac_metadata.utils.STACDatasetValidator.validate")
+@patch("backend.check_stac_metadata.utils.STACDatasetValidator.validate_urls")
 def should_log_json_parse_validation(validate_mock: MagicMock) -> None:
     metadata_url = any_s3_url()
     hash_key = f"DATASET#{any_dataset_id()}#VERSION#{any_dataset_version_id()}"
@@ -1,13 +1,25 @@
 from copy import deepcopy
-from typing import Any, Dict
+from os import environ
+from typing import Any, Dict, Optional
 from unittest.mock import MagicMock, patch
 
 from jsonschema import ValidationError  # type: ignore[import]
 from pytest import mark, raises
 from pytest_subtests import SubTests  # type: ignore[import]
 
-from backend.content_iterator.task import MAX_ITERATION_SIZE, lambda_handler
-from backend.processing_assets_model import ProcessingAssetType, processing_assets_model_with_meta
+from backend.content_iterator.task import (
+    CONCURRENT_ITERATIONS_VARIABLE_NAME,
+    MAX_ITERATION_SIZE,
+    MAX_PARTITION_COUNT,
+    PIPELINED_ITERATIONS_VARIABLE_NAME,
+    get_partitions,
+    lambda_handler,
+)
+from backend.processing_assets_model import (
+    CHECKSUM_PROGRESS_RANGE_KEY,
+    VERSION_SUMMARY_RANGE_KEY,
+    processing_assets_model_with_meta,
+)
 from backend.step_function_event_keys import DATASET_ID_KEY, METADATA_URL_KEY, VERSION_ID_KEY
 
 from .aws_utils import (
@@ -18,7 +30,7 @@ from .aws_utils import (
     any_table_name,
 )
 from .general_generators import any_dictionary_key
-from .stac_generators import any_dataset_id, any_dataset_version_id, any_hex_multihash
+from .stac_generators import any_dataset_id, any_dataset_version_id
 
 INITIAL_EVENT: Dict[str, Any] = {
     DATASET_ID_KEY: any_dataset_id(),
@@ -130,7 +142,7 @@ def should_return_zero_as_first_item_if_no_content(
     processing_assets_model_mock: MagicMock,
 ) -> None:
     event = deepcopy(INITIAL_EVENT)
-    processing_assets_model_mock.return_value.count.return_value = any_item_count()
+    processing_assets_model_mock.return_value.get.return_value.checksum_job_count = any_item_count()
 
     response = lambda_handler(event, any_lambda_context())
 
@@ -142,7 +154,7 @@ def should_return_next_item_as_first_item(processing_assets_model_mock: MagicMoc
     event = deepcopy(SUBSEQUENT_EVENT)
     next_item_index = any_next_item_index()
     event["content"]["next_item"] = next_item_index
-    processing_assets_model_mock.return_value.count.return_value = any_item_count()
+    processing_assets_model_mock.return_value.get.return_value.checksum_job_count = any_item_count()
 
     response = lambda_handler(event, any_lambda_context())
 
@@ -158,21 +170,28 @@ def should_return_minus_one_next_item_if_remaining_item_count_is_less_than_itera
 
     assets_table_name = any_table_name()
     results_table_name = any_table_name()
-    get_param_mock.side_effect = [assets_table_name, results_table_name]
+    checksum_cache_table_name = any_table_name()
+    get_param_mock.side_effect = [
+        assets_table_name,
+        results_table_name,
+        checksum_cache_table_name,
+    ]
 
     remaining_item_count = MAX_ITERATION_SIZE - 1
     next_item_index = any_next_item_index()
     event = deepcopy(SUBSEQUENT_EVENT)
     event["content"]["next_item"] = next_item_index
-    processing_assets_model_mock.return_value.count.return_value = (
+    processing_assets_model_mock.return_value.get.return_value.checksum_job_count = (
         next_item_index + remaining_item_count
     )
     expected_response = {
         "first_item": str(next_item_index),
         "iteration_size": remaining_item_count,
         "next_item": -1,
+        "job_count": str(next_item_index + remaining_item_count),
         "assets_table_name": assets_table_name,
         "results_table_name": results_table_name,
+        "checksum_cache_table_name": checksum_cache_table_name,
     }
 
     response = lambda_handler(event, any_lambda_context())
@@ -189,21 +208,28 @@ def should_return_minus_one_next_item_if_remaining_item_count_matches_iteration_
 
     assets_table_name = any_table_name()
     results_table_name = any_table_name()
-    get_param_mock.side_effect = [assets_table_name, results_table_name]
+    checksum_cache_table_name = any_table_name()
+    get_param_mock.side_effect = [
+        assets_table_name,
+        results_table_name,
+        checksum_cache_table_name,
+    ]
 
     remaining_item_count = MAX_ITERATION_SIZE
     next_item_index = any_next_item_index()
     event = deepcopy(SUBSEQUENT_EVENT)
     event["content"]["next_item"] = next_item_index
-    processing_assets_model_mock.return_value.count.return_value = (
+    processing_assets_model_mock.return_value.get.return_value.checksum_job_count = (
         next_item_index + remaining_item_count
     )
     expected_response = {
         "first_item": str(next_item_index),
         "iteration_size": MAX_ITERATION_SIZE,
         "next_item": -1,
+        "job_count": str(next_item_index + remaining_item_count),
         "assets_table_name": assets_table_name,
         "results_table_name": results_table_name,
+        "checksum_cache_table_name": checksum_cache_table_name,
     }
 
     response = lambda_handler(event, any_lambda_context())
@@ -220,21 +246,28 @@ def should_return_content_when_remaining_item_count_is_more_than_iteration_size(
 
     assets_table_name = any_table_name()
     results_table_name = any_table_name()
-    get_param_mock.side_effect = [assets_table_name, results_table_name]
+    checksum_cache_table_name = any_table_name()
+    get_param_mock.side_effect = [
+        assets_table_name,
+        results_table_name,
+        checksum_cache_table_name,
+    ]
 
     remaining_item_count = MAX_ITERATION_SIZE + 1
     next_item_index = any_next_item_index()
     event = deepcopy(SUBSEQUENT_EVENT)
     event["content"]["next_item"] = next_item_index
-    processing_assets_model_mock.return_value.count.return_value = (
+    processing_assets_model_mock.return_value.get.return_value.checksum_job_count = (
         next_item_index + remaining_item_count
     )
     expected_response = {
         "first_item": str(next_item_index),
         "iteration_size": MAX_ITERATION_SIZE,
         "next_item": next_item_index + MAX_ITERATION_SIZE,
+        "job_count": str(next_item_index + remaining_item_count),
         "assets_table_name": assets_table_name,
         "results_table_name": results_table_name,
+        "checksum_cache_table_name": checksum_cache_table_name,
     }
 
     response = lambda_handler(event, any_lambda_context())
@@ -242,22 +275,126 @@ def should_return_content_when_remaining_item_count_is_more_than_iteration_size(
     assert response == expected_response, response
 
 
+@patch("backend.content_iterator.task.processing_assets_model_with_meta")
+@patch("backend.content_iterator.task.get_param")
+def should_reuse_job_count_of_previous_iteration(
+    get_param_mock: MagicMock, processing_assets_model_mock: MagicMock
+) -> None:
+    get_param_mock.return_value = any_table_name()
+    job_count = any_item_count()
+    event = deepcopy(SUBSEQUENT_EVENT)
+    event["content"]["job_count"] = str(job_count)
+
+    response = lambda_handler(event, any_lambda_context())
+
+    assert response["job_count"] == str(job_count), response
+    processing_assets_model_mock.assert_not_called()
+
+
+@patch("backend.content_iterator.task.get_param")
+def should_iterate_over_planned_checksum_jobs(get_param_mock: MagicMock) -> None:
+    get_param_mock.return_value = any_table_name()
+    processing_assets_model = MagicMock()
+    processing_assets_model.get.return_value.checksum_job_count = 3
+    processing_assets_model.get.return_value.asset_count = MAX_ITERATION_SIZE + 1
+
+    with patch(
+        "backend.content_iterator.task.processing_assets_model_with_meta",
+        return_value=processing_assets_model,
+    ):
+        response = lambda_handler(deepcopy(INITIAL_EVENT), any_lambda_context())
+
+    assert response["iteration_size"] == 3, response
+    assert response["next_item"] == -1, response
+    processing_assets_model.get.assert_called_once_with(
+        f"DATASET#{INITIAL_EVENT[DATASET_ID_KEY]}#VERSION#{INITIAL_EVENT[VERSION_ID_KEY]}",
+        range_key=VERSION_SUMMARY_RANGE_KEY,
+        consistent_read=True,
+    )
+
+
+@patch("backend.content_iterator.task.processing_assets_model_with_meta")
+@patch("backend.content_iterator.task.get_param")
+def should_return_all_iterations_as_partitions_when_running_them_concurrently(
+    get_param_mock: MagicMock, processing_assets_model_mock: MagicMock
+) -> None:
+    table_name = any_table_name()
+    get_param_mock.return_value = table_name
+    job_count = 2 * MAX_ITERATION_SIZE + 1
+    processing_assets_model_mock.return_value.get.return_value.checksum_job_count = job_count
+    expected_response = {
+        "partitions": [
+            {
+                "first_item": "0",
+                "end_item": str(MAX_ITERATION_SIZE),
+                "iterations": [{"first_item": "0", "iteration_size": MAX_ITERATION_SIZE}],
+            },
+            {
+                "first_item": str(MAX_ITERATION_SIZE),
+                "end_item": str(2 * MAX_ITERATION_SIZE),
+                "iterations": [
+                    {"first_item": str(MAX_ITERATION_SIZE), "iteration_size": MAX_ITERATION_SIZE}
+                ],
+            },
+            {
+                "first_item": str(2 * MAX_ITERATION_SIZE),
+                "end_item": str(job_count),
+                "iterations": [{"first_item": str(2 * MAX_ITERATION_SIZE), "iteration_size": 1}],
+            },
+        ],
+        "job_count": str(job_count),
+        "assets_table_name": table_name,
+        "results_table_name": table_name,
+        "checksum_cache_table_name": table_name,
+    }
+
+    with patch.dict(environ, {CONCURRENT_ITERATIONS_VARIABLE_NAME: "true"}):
+        response = lambda_handler(deepcopy(INITIAL_EVENT), any_lambda_context())
+
+    assert response == expected_response, response
+
+
+def should_split_iterations_into_bounded_number_of_contiguous_partitions() -> None:
+    job_count = (3 * MAX_PARTITION_COUNT + 1) * MAX_ITERATION_SIZE - 1
+
+    partitions = get_partitions(job_count)
+
+    assert len(partitions) == MAX_PARTITION_COUNT
+    assert {len(partition["iterations"]) for partition in partitions} == {3, 4}
+    assert partitions[0]["first_item"] == "0"
+    assert partitions[-1]["end_item"] == str(job_count)
+    for partition, next_partition in zip(partitions, partitions[1:]):
+        assert partition["end_item"] == next_partition["first_item"]
+
+
+@patch("backend.content_iterator.task.processing_assets_model_with_meta")
+@patch("backend.content_iterator.task.get_param")
+def should_raise_does_not_exist_when_version_summary_row_is_missing(
+    get_param_mock: MagicMock, processing_assets_model_mock: MagicMock
+) -> None:
+    class DoesNotExist(Exception):
+        pass
+
+    get_param_mock.return_value = any_table_name()
+    processing_assets_model_mock.return_value.DoesNotExist = DoesNotExist
+    processing_assets_model_mock.return_value.get.side_effect = DoesNotExist()
+
+    with raises(DoesNotExist):
+        lambda_handler(deepcopy(INITIAL_EVENT), any_lambda_context())
+
+    processing_assets_model_mock.return_value.count.assert_not_called()
+
+
 @mark.infrastructure
-def should_count_only_asset_files() -> None:
-    # Given a single metadata and asset entry in the database
+def should_read_checksum_job_count_from_version_summary() -> None:
+    # Given a version summary with a single checksum job
     event = deepcopy(INITIAL_EVENT)
     hash_key = f"DATASET#{event['dataset_id']}#VERSION#{event['version_id']}"
-    processing_assets_model = processing_assets_model_with_meta()
-    processing_assets_model(
-        hash_key=hash_key,
-        range_key=f"{ProcessingAssetType.METADATA.value}#0",
-        url=any_s3_url(),
-    ).save()
-    processing_assets_model(
+    processing_assets_model_with_meta()(
         hash_key=hash_key,
-        range_key=f"{ProcessingAssetType.DATA.value}#0",
+        range_key=VERSION_SUMMARY_RANGE_KEY,
         url=any_s3_url(),
-        multihash=any_hex_multihash(),
+        checksum_job_count=1,
     ).save()
 
     # When running the Lambda handler
@@ -265,3 +402,110 @@ def should_count_only_asset_files() -> None:
 
     # Then the iteration size should be one
     assert response["iteration_size"] == 1
+
+
+def get_pipelined_response(
+    previous_next_item: Optional[int], checksum_job_counts: Dict[str, int], previous_steps: int = 0
+) -> Dict[str, Any]:
+    """
+    Iterates after an iteration ending at `previous_next_item` after `previous_steps`, or the first
+    time if `None`, with the given checksum job counts by range key.
+    """
+
+    class DoesNotExist(Exception):
+        pass
+
+    def get_checksum_progress(_hash_key: str, range_key: str, consistent_read: bool) -> MagicMock:
+        assert consistent_read
+        if range_key not in checksum_job_counts:
+            raise DoesNotExist()
+        return MagicMock(checksum_job_count=checksum_job_counts[range_key])
+
+    event = deepcopy(INITIAL_EVENT)
+    if previous_next_item is not None:
+        event["content"] = {
+            "first_item": "0",
+            "iteration_size": previous_next_item,
+            "next_item": previous_next_item,
+            "steps": previous_steps,
+        }
+    processing_assets_model = MagicMock(DoesNotExist=DoesNotExist)
+    processing_assets_model.get.side_effect = get_checksum_progress
+
+    with patch("backend.content_iterator.task.get_param", return_value=any_table_name()), patch(
+        "backend.content_iterator.task.processing_assets_model_with_meta",
+        return_value=processing_assets_model,
+    ), patch.dict(environ, {PIPELINED_ITERATIONS_VARIABLE_NAME: "true"}):
+        response: Dict[str, Any] = lambda_handler(event, any_lambda_context())
+    return response
+
+
+def should_wait_until_checksum_jobs_are_published_when_pipelined() -> None:
+    response = get_pipelined_response(None, {})
+
+    assert (response["first_item"], response["iteration_size"], response["next_item"]) == (
+        "0",
+        0,
+        0,
+    )
+
+
+def should_iterate_over_checksum_jobs_published_since_previous_iteration() -> None:
+    response = get_pipelined_response(2, {CHECKSUM_PROGRESS_RANGE_KEY: 5})
+
+    assert (response["first_item"], response["iteration_size"], response["next_item"]) == (
+        "2",
+        3,
+        5,
+    )
+
+
+def should_split_pipelined_iteration_into_partitions() -> None:
+    response = get_pipelined_response(
+        MAX_ITERATION_SIZE, {CHECKSUM_PROGRESS_RANGE_KEY: 2 * MAX_ITERATION_SIZE + 1}
+    )
+
+    assert (response["iteration_size"], response["next_item"], response["partitions"]) == (
+        MAX_ITERATION_SIZE + 1,
+        2 * MAX_ITERATION_SIZE + 1,
+        get_partitions(2 * MAX_ITERATION_SIZE + 1, MAX_ITERATION_SIZE),
+    )
+    assert [partition["first_item"] for partition in response["partitions"]] == [
+        str(MAX_ITERATION_SIZE),
+        str(2 * MAX_ITERATION_SIZE),
+    ]
+
+
+def should_count_pipelined_iteration_and_its_partitions_as_steps(subtests: SubTests) -> None:
+    with subtests.test(msg="First iteration without jobs"):
+        assert get_pipelined_response(None, {})["steps"] == 1
+
+    with subtests.test(msg="Later iteration with jobs"):
+        assert get_pipelined_response(2, {CHECKSUM_PROGRESS_RANGE_KEY: 5}, 7)["steps"] == 9
+
+
+def should_start_pipelined_iterations_of_later_execution_from_next_item() -> None:
+    event = deepcopy(INITIAL_EVENT)
+    event["content"] = {"next_item": 3}
+    processing_assets_model = MagicMock()
+    processing_assets_model.get.return_value.checksum_job_count = 5
+
+    with patch("backend.content_iterator.task.get_param", return_value=any_table_name()), patch(
+        "backend.content_iterator.task.processing_assets_model_with_meta",
+        return_value=processing_assets_model,
+    ), patch.dict(environ, {PIPELINED_ITERATIONS_VARIABLE_NAME: "true"}):
+        response = lambda_handler(event, any_lambda_context())
+
+    assert (response["first_item"], response["iteration_size"], response["steps"]) == ("3", 2, 2)
+
+
+def should_finish_pipelined_iterations_with_last_job_once_crawl_has_finished() -> None:
+    response = get_pipelined_response(
+        5, {CHECKSUM_PROGRESS_RANGE_KEY: 5, VERSION_SUMMARY_RANGE_KEY: 7}
+    )
+
+    assert (response["first_item"], response["iteration_size"], response["next_item"]) == (
+        "5",
+        2,
+        -1,
+    )
@@ -0,0 +1,430 @@
+from json import loads
+from tempfile import TemporaryDirectory
+from typing import Optional, Tuple, Union
+
+from aws_cdk.aws_stepfunctions import CfnStateMachine
+from aws_cdk.core import App, Environment, IConstruct, Stack
+from pytest import fixture
+
+from backend.content_iterator.task import MAX_PIPELINED_EXECUTION_STEPS
+from backend.environment import ENV
+from backend.step_function_event_keys import PIPELINED_KEY
+from backend.types import JsonObject
+from infrastructure.lambda_layers_stack import LambdaLayersStack
+from infrastructure.processing_stack import (
+    CHECK_STAC_METADATA_MAX_SHARD_CONCURRENCY,
+    CHECK_STAC_METADATA_SHARD_PASSES_PER_EXECUTION,
+    ProcessingStack,
+)
+from infrastructure.storage_stack import StorageStack
+
+# Skips building the Lambda bundles, which needs Docker
+BUNDLING_STACKS_CONTEXT_KEY = "aws:cdk:bundling-stacks"
+
+CHECKSUM_ITERATION_CONCURRENCY = 7
+
+CONTENT_ITERATOR_STATE_NAME = "content-iterator-task-lambda-invoke"
+CHECKSUM_PARTITIONS_STATE_NAME = "check-files-checksums-partitions"
+CHECKSUM_PARTITION_EXECUTION_STATE_NAME = "check-files-checksums-partition-execution"
+CHECKSUM_ITERATIONS_STATE_NAME = "check-files-checksums-iterations"
+CHECKSUM_PARTITION_SUMMARY_STATE_NAME = "check-files-checksums-partition-summary"
+CHECKSUM_ITERATION_FINISHED_STATE_NAME = "content_iteration_finished"
+VALIDATION_SUMMARY_STATE_NAME = "validation-summary-task-lambda-invoke"
+CHECK_STAC_METADATA_STATE_NAME = "check-stac-metadata-task-lambda-invoke"
+CHECK_STAC_METADATA_SHARDS_STATE_NAME = "check-stac-metadata-shards"
+CHECK_STAC_METADATA_SHARD_EXECUTION_STATE_NAME = "check-stac-metadata-shard-execution"
+CHECK_STAC_METADATA_SHARD_LAMBDA_INVOKE_STATE_NAME = "check-stac-metadata-shard-lambda-invoke"
+CHECK_STAC_METADATA_SHARD_EXECUTION_FINISHED_STATE_NAME = (
+    "check_stac_metadata_shard_execution_finished"
+)
+MERGE_SHARDS_STATE_NAME = "check-stac-metadata-merge-shards-lambda-invoke"
+MORE_TO_MERGE_STATE_NAME = "more_crawl_shard_rows_to_merge"
+PIPELINED_VALIDATION_STATE_NAME = "check-stac-metadata-shards-and-files-checksums"
+PIPELINED_CHECKSUMS_EXECUTION_STATE_NAME = "check-files-checksums-pipelined-execution"
+PIPELINED_CHECKSUMS_PROGRESS_STATE_NAME = "check-files-checksums-pipelined-progress"
+PIPELINED_CHECKSUM_EXECUTIONS_FINISHED_STATE_NAME = "pipelined_checksum_executions_finished"
+PIPELINED_CHECKSUM_EXECUTION_FINISHED_STATE_NAME = "pipelined_checksum_execution_finished"
+PIPELINED_CONTENT_ITERATION_FINISHED_STATE_NAME = "pipelined_content_iteration_finished"
+
+
+def synthesize_state_machine_definitions(
+    pipelined_validation: bool = False, **processing_stack_kwargs: int
+) -> Tuple[JsonObject, JsonObject, JsonObject, Optional[JsonObject]]:
+    """
+    Returns the dataset version creation definition, the checksum partition definition, the crawl
+    shard definition, and the pipelined checksums definition with `pipelined_validation`.
+    """
+    with TemporaryDirectory() as output_directory:
+        app = App(outdir=output_directory, context={BUNDLING_STACKS_CONTEXT_KEY: []})
+        stack = Stack(
+            app, "datalake", env=Environment(account="000000000000", region="ap-southeast-2")
+        )
+        storage = StorageStack(stack, "storage", deploy_env=ENV)
+        lambda_layers = LambdaLayersStack(stack, "lambda-layers", deploy_env=ENV)
+        processing = ProcessingStack(
+            storage,
+            "processing",
+            botocore_lambda_layer=lambda_layers.botocore,
+            datasets_table=storage.datasets_table,
+            deploy_env=ENV,
+            storage_bucket=storage.storage_bucket,
+            validation_results_table=storage.validation_results_table,
+            pipelined_validation=pipelined_validation,
+            **processing_stack_kwargs,
+        )
+        app.synth()
+
+        dataset_version_creation_definition = get_definition(processing, processing.state_machine)
+        checksum_partition_definition = get_definition(
+            processing, processing.node.find_child(f"{ENV}-check-files-checksums")
+        )
+        check_stac_metadata_shard_definition = get_definition(
+            processing, processing.node.find_child(f"{ENV}-check-stac-metadata-shard")
+        )
+        pipelined_checksums_state_machine = processing.node.try_find_child(
+            f"{ENV}-check-files-checksums-pipelined"
+        )
+        return (
+            dataset_version_creation_definition,
+            checksum_partition_definition,
+            check_stac_metadata_shard_definition,
+            (
+                None
+                if pipelined_checksums_state_machine is None
+                else get_definition(processing, pipelined_checksums_state_machine)
+            ),
+        )
+
+
+def get_definition(stack: Stack, state_machine: IConstruct) -> JsonObject:
+    cfn_state_machine = state_machine.node.default_child
+    assert isinstance(cfn_state_machine, CfnStateMachine)
+    return parse_definition(stack.resolve(cfn_state_machine.definition_string))
+
+
+def parse_definition(definition: Union[str, JsonObject]) -> JsonObject:
+    """
+    The definition is joined from strings and references to other resources, such as Lambda ARNs,
+    which only occur within JSON strings and are replaced with a placeholder.
+    """
+    if isinstance(definition, str):
+        parsed_definition: JsonObject = loads(definition)
+        return parsed_definition
+
+    _, parts = definition["Fn::Join"]
+    parsed_join: JsonObject = loads(
+        "".join(part if isinstance(part, str) else "REFERENCE" for part in parts)
+    )
+    return parsed_join
+
+
+@fixture(name="default_synthesis", scope="module")
+def fixture_default_synthesis() -> Tuple[JsonObject, JsonObject, JsonObject, Optional[JsonObject]]:
+    return synthesize_state_machine_definitions()
+
+
+@fixture(name="default_definitions", scope="module")
+def fixture_default_definitions(
+    default_synthesis: Tuple[JsonObject, JsonObject, JsonObject, Optional[JsonObject]],
+) -> Tuple[JsonObject, JsonObject]:
+    definition, checksum_partition_definition, _, pipelined_checksums_definition = default_synthesis
+    assert pipelined_checksums_definition is None
+    return definition, checksum_partition_definition
+
+
+@fixture(name="check_stac_metadata_shard_definitions", scope="module")
+def fixture_check_stac_metadata_shard_definitions(
+    default_synthesis: Tuple[JsonObject, JsonObject, JsonObject, Optional[JsonObject]],
+) -> Tuple[JsonObject, JsonObject]:
+    """Returns the dataset version creation and crawl shard definitions"""
+    definition, _, check_stac_metadata_shard_definition, _ = default_synthesis
+    return definition, check_stac_metadata_shard_definition
+
+
+@fixture(name="concurrent_definitions", scope="module")
+def fixture_concurrent_definitions() -> Tuple[JsonObject, JsonObject]:
+    definition, checksum_partition_definition, _, pipelined_checksums_definition = (
+        synthesize_state_machine_definitions(
+            checksum_iteration_concurrency=CHECKSUM_ITERATION_CONCURRENCY
+        )
+    )
+    assert pipelined_checksums_definition is None
+    return definition, checksum_partition_definition
+
+
+@fixture(name="pipelined_definitions", scope="module")
+def fixture_pipelined_definitions() -> Tuple[JsonObject, JsonObject]:
+    """Returns the dataset version creation and pipelined checksums definitions"""
+    definition, _, _, pipelined_checksums_definition = synthesize_state_machine_definitions(
+        pipelined_validation=True, checksum_iteration_concurrency=CHECKSUM_ITERATION_CONCURRENCY
+    )
+    assert pipelined_checksums_definition is not None
+    return definition, pipelined_checksums_definition
+
+
+def should_merge_shards_until_merge_has_caught_up(
+    default_definitions: Tuple[JsonObject, JsonObject],
+) -> None:
+    states = default_definitions[0]["States"]
+    more_to_merge_choice = states[MORE_TO_MERGE_STATE_NAME]
+
+    assert states[MERGE_SHARDS_STATE_NAME]["Next"] == MORE_TO_MERGE_STATE_NAME
+    assert states[MERGE_SHARDS_STATE_NAME]["ResultPath"] == "$.crawl.merge"
+    assert more_to_merge_choice["Choices"] == [
+        {
+            "Variable": "$.crawl.merge.more_to_merge",
+            "BooleanEquals": True,
+            "Next": MERGE_SHARDS_STATE_NAME,
+        }
+    ]
+    assert more_to_merge_choice["Default"] == CONTENT_ITERATOR_STATE_NAME
+
+
+def should_crawl_each_shard_in_child_executions_until_it_has_nothing_more_to_crawl(
+    check_stac_metadata_shard_definitions: Tuple[JsonObject, JsonObject],
+) -> None:
+    shards_state = check_stac_metadata_shard_definitions[0]["States"][
+        CHECK_STAC_METADATA_SHARDS_STATE_NAME
+    ]
+    iterator_states = shards_state["Iterator"]["States"]
+
+    assert shards_state["MaxConcurrency"] == CHECK_STAC_METADATA_MAX_SHARD_CONCURRENCY
+    assert shards_state["Iterator"]["StartAt"] == CHECK_STAC_METADATA_SHARD_EXECUTION_STATE_NAME
+    assert iterator_states[CHECK_STAC_METADATA_SHARD_EXECUTION_STATE_NAME]["Resource"].startswith(
+        "arn:REFERENCE:states:::states:startExecution.sync"
+    )
+    assert iterator_states["check_stac_metadata_shard_executions_finished"]["Choices"] == [
+        {
+            "Variable": "$.crawl_shard.Output.more_to_crawl",
+            "BooleanEquals": True,
+            "Next": CHECK_STAC_METADATA_SHARD_EXECUTION_STATE_NAME,
+        }
+    ]
+    assert "lambda:invoke" not in str(shards_state)
+
+
+def should_crawl_shard_passes_until_shard_has_nothing_more_to_crawl_or_execution_stops(
+    check_stac_metadata_shard_definitions: Tuple[JsonObject, JsonObject],
+) -> None:
+    shard_definition = check_stac_metadata_shard_definitions[1]
+    states = shard_definition["States"]
+
+    assert shard_definition["StartAt"] == CHECK_STAC_METADATA_SHARD_LAMBDA_INVOKE_STATE_NAME
+    assert states[CHECK_STAC_METADATA_SHARD_LAMBDA_INVOKE_STATE_NAME]["ResultPath"] == "$.crawl"
+    assert states["check_stac_metadata_shard_pass_finished"] == {
+        "Type": "Choice",
+        "Choices": [
+            {
+                "Variable": "$.crawl.more_to_crawl",
+                "BooleanEquals": False,
+                "Next": CHECK_STAC_METADATA_SHARD_EXECUTION_FINISHED_STATE_NAME,
+            },
+            {
+                "Variable": "$.crawl.passes",
+                "NumericGreaterThanEquals": CHECK_STAC_METADATA_SHARD_PASSES_PER_EXECUTION,
+                "Next": CHECK_STAC_METADATA_SHARD_EXECUTION_FINISHED_STATE_NAME,
+            },
+        ],
+        "Default": CHECK_STAC_METADATA_SHARD_LAMBDA_INVOKE_STATE_NAME,
+    }
+    assert states[CHECK_STAC_METADATA_SHARD_EXECUTION_FINISHED_STATE_NAME]["Parameters"] == {
+        "more_to_crawl.$": "$.crawl.more_to_crawl"
+    }
+
+
+def should_check_one_checksum_partition_at_a_time_by_default(
+    default_definitions: Tuple[JsonObject, JsonObject],
+) -> None:
+    checksum_partitions_state = default_definitions[0]["States"][CHECKSUM_PARTITIONS_STATE_NAME]
+
+    assert checksum_partitions_state["MaxConcurrency"] == 1
+
+
+def should_run_checksum_partitions_through_map_state(
+    concurrent_definitions: Tuple[JsonObject, JsonObject],
+) -> None:
+    states = concurrent_definitions[0]["States"]
+    checksum_partitions_state = states[CHECKSUM_PARTITIONS_STATE_NAME]
+
+    assert states[CONTENT_ITERATOR_STATE_NAME]["Next"] == CHECKSUM_PARTITIONS_STATE_NAME
+    assert checksum_partitions_state["Type"] == "Map"
+    assert checksum_partitions_state["ItemsPath"] == "$.content.partitions"
+    assert checksum_partitions_state["Next"] == VALIDATION_SUMMARY_STATE_NAME
+    assert CHECKSUM_ITERATION_FINISHED_STATE_NAME not in states
+
+
+def should_limit_concurrent_checksum_partitions(
+    concurrent_definitions: Tuple[JsonObject, JsonObject],
+) -> None:
+    checksum_partitions_state = concurrent_definitions[0]["States"][CHECKSUM_PARTITIONS_STATE_NAME]
+
+    assert checksum_partitions_state["MaxConcurrency"] == CHECKSUM_ITERATION_CONCURRENCY
+
+
+def should_check_each_partition_in_child_execution(
+    concurrent_definitions: Tuple[JsonObject, JsonObject],
+) -> None:
+    checksum_partitions_state = concurrent_definitions[0]["States"][CHECKSUM_PARTITIONS_STATE_NAME]
+    iterator_states = checksum_partitions_state["Iterator"]["States"]
+
+    assert checksum_partitions_state["Iterator"]["StartAt"] == (
+        CHECKSUM_PARTITION_EXECUTION_STATE_NAME
+    )
+    assert list(iterator_states) == [CHECKSUM_PARTITION_EXECUTION_STATE_NAME]
+    assert iterator_states[CHECKSUM_PARTITION_EXECUTION_STATE_NAME]["Resource"].startswith(
+        "arn:REFERENCE:states:::states:startExecution.sync"
+    )
+    assert checksum_partitions_state["Parameters"]["iterations.$"] == (
+        "$$.Map.Item.Value.iterations"
+    )
+
+
+def should_run_batch_jobs_in_child_executions(
+    default_definitions: Tuple[JsonObject, JsonObject],
+    concurrent_definitions: Tuple[JsonObject, JsonObject],
+) -> None:
+    for definition, checksum_partition_definition in [default_definitions, concurrent_definitions]:
+        assert "batch:submitJob" not in str(definition)
+        assert "batch:submitJob" in str(checksum_partition_definition)
+
+
+def should_check_files_checksums_of_each_iteration_in_partition(
+    concurrent_definitions: Tuple[JsonObject, JsonObject],
+) -> None:
+    states = concurrent_definitions[1]["States"]
+    checksum_iterations_state = states[CHECKSUM_ITERATIONS_STATE_NAME]
+    iterator_states = checksum_iterations_state["Iterator"]["States"]
+
+    assert checksum_iterations_state["ItemsPath"] == "$.iterations"
+    assert checksum_iterations_state["MaxConcurrency"] == 1
+    assert checksum_iterations_state["Iterator"]["StartAt"] == "check_files_checksums_maybe_array"
+    assert {state["Resource"] for state in iterator_states.values() if state["Type"] == "Task"} == {
+        "arn:REFERENCE:states:::batch:submitJob.sync"
+    }
+    assert checksum_iterations_state["Parameters"]["content"]["first_item.$"] == (
+        "$$.Map.Item.Value.first_item"
+    )
+    assert checksum_iterations_state["ResultPath"] is None
+
+
+def should_report_compact_partition_summary(
+    concurrent_definitions: Tuple[JsonObject, JsonObject],
+) -> None:
+    states = concurrent_definitions[1]["States"]
+
+    assert states[CHECKSUM_ITERATIONS_STATE_NAME]["Next"] == CHECKSUM_PARTITION_SUMMARY_STATE_NAME
+    assert states[CHECKSUM_PARTITION_SUMMARY_STATE_NAME]["Parameters"] == {
+        "first_item.$": "$.first_item",
+        "end_item.$": "$.end_item",
+    }
+
+
+def should_crawl_shards_while_checking_published_checksum_jobs(
+    pipelined_definitions: Tuple[JsonObject, JsonObject],
+) -> None:
+    states = pipelined_definitions[0]["States"]
+    pipelined_validation_state = states[PIPELINED_VALIDATION_STATE_NAME]
+
+    assert states[CHECK_STAC_METADATA_STATE_NAME]["Next"] == PIPELINED_VALIDATION_STATE_NAME
+    assert pipelined_validation_state["Type"] == "Parallel"
+    assert [branch["StartAt"] for branch in pipelined_validation_state["Branches"]] == [
+        CHECK_STAC_METADATA_SHARDS_STATE_NAME,
+        PIPELINED_CHECKSUMS_EXECUTION_STATE_NAME,
+    ]
+    assert pipelined_validation_state["ResultPath"] is None
+
+
+def should_run_validation_summary_once_crawl_and_checksums_have_finished(
+    pipelined_definitions: Tuple[JsonObject, JsonObject],
+) -> None:
+    states = pipelined_definitions[0]["States"]
+
+    assert states[PIPELINED_VALIDATION_STATE_NAME]["Next"] == VALIDATION_SUMMARY_STATE_NAME
+    assert MERGE_SHARDS_STATE_NAME not in states
+    assert CHECKSUM_PARTITIONS_STATE_NAME not in states
+
+
+def should_start_pipelined_checksums_execution_until_last_job_has_been_checked(
+    pipelined_definitions: Tuple[JsonObject, JsonObject],
+) -> None:
+    checksum_branch_states = pipelined_definitions[0]["States"][PIPELINED_VALIDATION_STATE_NAME][
+        "Branches"
+    ][1]["States"]
+
+    assert checksum_branch_states[PIPELINED_CHECKSUMS_EXECUTION_STATE_NAME]["Resource"].startswith(
+        "arn:REFERENCE:states:::states:startExecution.sync"
+    )
+    progress_parameters = checksum_branch_states[PIPELINED_CHECKSUMS_PROGRESS_STATE_NAME][
+        "Parameters"
+    ]
+    assert progress_parameters["content.$"] == "$.pipelined_checksums.Output"
+    assert checksum_branch_states[PIPELINED_CHECKSUM_EXECUTIONS_FINISHED_STATE_NAME] == {
+        "Type": "Choice",
+        "Choices": [
+            {
+                "Variable": "$.content.next_item",
+                "NumericEquals": -1,
+                "Next": "pipelined_checksum_iterations_finished",
+            }
+        ],
+        "Default": PIPELINED_CHECKSUMS_EXECUTION_STATE_NAME,
+    }
+
+
+def should_stop_pipelined_checksums_execution_after_its_steps(
+    pipelined_definitions: Tuple[JsonObject, JsonObject],
+) -> None:
+    states = pipelined_definitions[1]["States"]
+
+    assert {
+        "Variable": "$.content.steps",
+        "NumericGreaterThanEquals": MAX_PIPELINED_EXECUTION_STEPS,
+        "Next": PIPELINED_CHECKSUM_EXECUTION_FINISHED_STATE_NAME,
+    } in states[PIPELINED_CONTENT_ITERATION_FINISHED_STATE_NAME]["Choices"]
+    assert states[PIPELINED_CHECKSUM_EXECUTION_FINISHED_STATE_NAME]["Parameters"] == {
+        "next_item.$": "$.content.next_item"
+    }
+
+
+def should_check_published_checksum_partitions_in_child_executions(
+    pipelined_definitions: Tuple[JsonObject, JsonObject],
+) -> None:
+    states = pipelined_definitions[1]["States"]
+    checksum_partitions_state = states[CHECKSUM_PARTITIONS_STATE_NAME]
+
+    assert states["checksum_jobs_published"]["Choices"][0]["Next"] == (
+        CHECKSUM_PARTITIONS_STATE_NAME
+    )
+    assert checksum_partitions_state["MaxConcurrency"] == CHECKSUM_ITERATION_CONCURRENCY
+    assert checksum_partitions_state["ResultPath"] is None
+    assert checksum_partitions_state["Next"] == PIPELINED_CONTENT_ITERATION_FINISHED_STATE_NAME
+    for definition in pipelined_definitions:
+        assert "batch:submitJob" not in str(definition)
+
+
+def should_merge_finished_shards_before_each_pipelined_iteration(
+    pipelined_definitions: Tuple[JsonObject, JsonObject],
+) -> None:
+    states = pipelined_definitions[1]["States"]
+
+    assert pipelined_definitions[1]["StartAt"] == MERGE_SHARDS_STATE_NAME
+    assert states[MERGE_SHARDS_STATE_NAME]["Parameters"][PIPELINED_KEY] is True
+    assert states[MERGE_SHARDS_STATE_NAME]["Next"] == CONTENT_ITERATOR_STATE_NAME
+    assert states["wait_for_published_checksum_jobs"]["Next"] == MERGE_SHARDS_STATE_NAME
+
+
+def should_merge_again_without_waiting_while_merge_is_behind(
+    pipelined_definitions: Tuple[JsonObject, JsonObject],
+) -> None:
+    iteration_finished_state = pipelined_definitions[1]["States"][
+        PIPELINED_CONTENT_ITERATION_FINISHED_STATE_NAME
+    ]
+
+    assert {
+        "Or": [
+            {"Variable": "$.content.iteration_size", "NumericGreaterThan": 0},
+            {"Variable": "$.crawl.merge.more_to_merge", "BooleanEquals": True},
+        ],
+        "Next": MERGE_SHARDS_STATE_NAME,
+    } in iteration_finished_state["Choices"]
+    assert iteration_finished_state["Default"] == "wait_for_published_checksum_jobs"